@@ -1,6 +1,9 @@
 from __future__ import annotations
 import os
+from typing import AsyncIterator
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker,Session
 
 # MySQL 연결 URL
@@ -20,6 +23,48 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# 읽기 위주 핫 경로(홈 / 알림 / 진행 중 듀얼 / 해시톡방 / 감자캐기)용 async 엔진
+# - 요청이 MySQL 응답을 기다리는 동안 AnyIO 워커 스레드를 잡고 있지 않음
+# - 기본값은 DB_URL 의 드라이버만 async 드라이버로 바꾼 것 (같은 DB)
+# - 처음 쓸 때 만듦 → async 드라이버가 없는 환경(스크립트 등)에서도 import 는 됨
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_db_url(url: str) -> str:
+    """sync URL → async 드라이버 URL (모르는 드라이버면 그대로, HASHBROWN_ASYNC_DB_URL 로 직접 지정)"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+
+ASYNC_DB_URL = os.getenv("HASHBROWN_ASYNC_DB_URL") or _async_db_url(DB_URL)
+
+_async_engine: AsyncEngine | None = None
+
+# expire_on_commit=False: commit 뒤에 속성을 읽어도 (lazy load 없이) 그대로 쓸 수 있게
+# 엔진은 async_session() 에서 연결
+_AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        options = {"pool_pre_ping": True, "echo": False}
+        if make_url(ASYNC_DB_URL).get_backend_name() == "mysql":
+            options["pool_recycle"] = 3600
+        _async_engine = create_async_engine(ASYNC_DB_URL, **options)
+    return _async_engine
+
+
+def async_session() -> AsyncSession:
+    """async 엔진에 연결된 새 AsyncSession (async with 로 사용)"""
+    return _AsyncSessionLocal(bind=get_async_engine())
+
 def get_db() -> Session:
     """
     FastAPI 의존성 주입용 DB 세션 생성기
@@ -28,4 +73,13 @@ def get_db() -> Session:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    async 라우터용 DB 세션
+    - 동기 헬퍼(app/utils 의 Session 기반 함수)는 await db.run_sync(fn, ...) 로 그대로 재사용
+    """
+    async with async_session() as db:
+        yield db
@@ -19,6 +19,7 @@ from app.models import (
     shop,
     user_habit,
     wallet,
+    scheduler_lease,
 )
 
 def drop_all_tables() -> None:
@@ -6,7 +6,8 @@ from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.scheduler import start_scheduler
+from app.scheduler import SCHEDULER_MODE, start_scheduler
+from app.utils import metrics
 
 from app.routers import (
     register,auth,
@@ -19,7 +20,11 @@ from app.routers import (
     notification,wallet,shop)
 
 app = FastAPI(title="Hashbrown API", version="1.0.0")
-start_scheduler()
+
+# 여러 워커/컨테이너가 떠도 lease 를 가진 리더 하나만 tick 을 처리함
+# HASHBROWN_SCHEDULER=off 면 API 만 실행 (스케줄러는 python -m app.scheduler 로 별도 실행)
+if SCHEDULER_MODE == "on":
+    start_scheduler()
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],   # 페이지네이션 cursor 를 헤더로 주는 목록 API 용
 )
 
 # 업로드 폴더 정적 서빙 (/uploads/**)
@@ -53,3 +59,8 @@ app.include_router(wallet.router)
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics")
+def get_metrics():
+    # 스케줄러 처리 건수/소요시간 등 프로세스 내부 지표
+    return metrics.snapshot()
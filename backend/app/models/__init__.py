@@ -1,13 +1,14 @@
 from .base import Base, create_all
 from .user import User, Interest, UserInterest, Follow
-from .habit import Habit
+from .habit import Habit, HabitStat
 from .user_habit import UserHabit
 from .exchange import ExchangeRequest
 from .duel import Duel
 from .media import MediaAsset
 from .certification import Certification
 from .dispute import Dispute
-from .wallet import WalletTransaction
-from .notification import Notification
+from .wallet import WalletTransaction, WalletSnapshot
+from .notification import Notification, NotificationCounter, NotificationArchive
 from .badge import Badge, UserBadge
 from .shop import ShopItem, Order
+from .scheduler_lease import SchedulerLease
@@ -8,4 +8,5 @@ def create_all():
     # 모든 모델 import
     from . import user, habit, user_habit, exchange, duel, media,attendance_log
     from . import certification, dispute, wallet, notification, badge, shop
+    from . import scheduler_lease
     Base.metadata.create_all(bind=engine)
@@ -2,14 +2,18 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
 from sqlalchemy import (
-    BigInteger, String, Text, DateTime, ForeignKey, Enum, UniqueConstraint,Date
+    BigInteger, String, Text, DateTime, ForeignKey, Enum, UniqueConstraint,Date, Index
 )
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class Certification(Base):
     __tablename__ = "certifications"
-    __table_args__ = (UniqueConstraint("user_id", "user_habit_id", "cert_date", name="uq_cert_user_habit_day"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "user_habit_id", "cert_date", name="uq_cert_user_habit_day"),
+        # 듀얼 대화방 keyset 페이지네이션 (duel_id, ts_utc, id)
+        Index("idx_cert_duel_ts", "duel_id", "ts_utc", "id"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -10,7 +10,10 @@ from .base import Base
 
 class Duel(Base):
     __tablename__ = "duels"
-    __table_args__ = (Index("idx_duels_pair", "owner_user_id", "challenger_user_id", "status"),)
+    __table_args__ = (
+        Index("idx_duels_pair", "owner_user_id", "challenger_user_id", "status"),
+        Index("idx_duels_status_end", "status", "end_date"),   # 스케줄러 정산 후보 조회
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     owner_user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -32,5 +35,8 @@ class Duel(Base):
     result: Mapped[Optional[str]] = mapped_column(Enum("owner_win", "challenger_win", "draw", "forfeit_owner", "forfeit_challenger", name="duel_result_enum"))
     owner_success_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     challenger_success_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # 듀얼 인증 실패 횟수 (인증/자동 실패 insert 때 같이 +1, app/reconcile_duels.py 로 재계산)
+    owner_fail_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    challenger_fail_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     grace_minutes: Mapped[int] = mapped_column(SmallInteger, default=5, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import BigInteger, String, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -13,3 +13,25 @@ class Habit(Base):
     title: Mapped[str] = mapped_column(String(50), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(255))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+class HabitStat(Base):
+    __tablename__ = "habit_stats"
+    __table_args__ = (
+        Index("idx_habit_stats_popularity", "popularity", "habit_id"),                                # 인기순 페이지네이션
+        Index("idx_habit_stats_title", "title"),                                                      # 템플릿 제목 접두 검색
+        Index("ft_habit_stats_title", "title", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),   # 템플릿 제목 검색
+    )
+
+    # Habit 템플릿별 집계 (UserHabit 상태가 바뀔 때마다 app/utils/habit_stats.py 에서 증감)
+    habit_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    title: Mapped[str] = mapped_column(String(50), nullable=False)        # Habit.title 복사본 (검색용)
+    active_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)      # 진행 중인 유저 수
+    completed_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)   # 성공으로 완료한 유저 수
+    popularity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)      # active_cnt + completed_cnt
+    # 난이도 분포 (진행 중 + 성공 완료 기준) → 중앙값 계산용
+    diff_1_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    diff_2_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    diff_3_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    diff_4_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    diff_5_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
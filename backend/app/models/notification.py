@@ -1,12 +1,19 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import BigInteger, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import BigInteger, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("idx_notifications_user_created", "user_id", "created_at", "id"),   # 알림함 keyset 페이지네이션
+        Index("idx_notifications_read_created", "is_read", "created_at"),         # 보관 기간 지난 읽은 알림 정리
+        Index("idx_notifications_type_created", "type", "created_at"),            # 오래된 리마인더 요약
+        # 같은 알림 중복 방지 (리마인더 INSERT IGNORE / 재시도된 요청)
+        UniqueConstraint("user_id", "dedup_key", name="uq_notifications_user_dedup"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -16,3 +23,31 @@ class Notification(Base):
     deeplink: Mapped[Optional[str]] = mapped_column(String(120))
     is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # "종류:대상[:KST 날짜]" (예: "reminder:habit:12:2025-01-31"). NULL 이면 중복 체크 안 함
+    dedup_key: Mapped[Optional[str]] = mapped_column(String(120))
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+
+    # 유저별 안 읽은 알림 수 (알림 생성 / 읽음 처리 때 같이 증감 → unread-count 는 이 행만 읽음)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_cnt: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+class NotificationArchive(Base):
+    __tablename__ = "notifications_archive"
+    __table_args__ = (
+        Index("idx_notifications_archive_user_created", "user_id", "created_at"),
+    )
+
+    # 보관 기간이 지나서 notifications 에서 옮겨 온 알림 (id 는 원래 알림 id 그대로)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type: Mapped[str] = mapped_column(Enum("challenge","challenge_accepted","challenge_rejected","cert_success","cert_fail","dispute","system", name="noti_type_enum"), nullable=False)
+    title: Mapped[Optional[str]] = mapped_column(String(80))
+    body: Mapped[Optional[str]] = mapped_column(String(255))
+    deeplink: Mapped[Optional[str]] = mapped_column(String(120))
+    is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    dedup_key: Mapped[Optional[str]] = mapped_column(String(120))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+
+    # 작업 이름 (예: "minute_tick")
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    # 리더 선출: holder 가 lease_until(UTC) 까지 리더, 만료되면 다른 프로세스가 가져감
+    holder: Mapped[Optional[str]] = mapped_column(String(100))
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # 마지막으로 끝까지 처리한 tick 시각(UTC) → 재시작/긴 멈춤 후 여기서부터 replay
+    last_tick_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
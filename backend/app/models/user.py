@@ -32,7 +32,10 @@ class Interest(Base):
 
 class UserInterest(Base):
     __tablename__ = "user_interests"
-    __table_args__ = (UniqueConstraint("user_id", "interest_id", name="uq_user_interest"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "interest_id", name="uq_user_interest"),
+        Index("idx_user_interest_interest", "interest_id", "user_id"),   # 감자캐기 match: 관심사가 겹치는 유저 찾기
+    )
 
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     interest_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("interests.id", ondelete="CASCADE"), primary_key=True)
@@ -13,6 +13,12 @@ class UserHabit(Base):
     __table_args__ = (
         Index("idx_user_habits_user", "user_id"),
         Index("idx_user_habits_dow", "days_of_week"),
+        Index("idx_user_habits_status_completed", "status", "completed_at"),   # 최근 완료 습관 집계
+        Index("idx_user_habits_user_status_completed", "user_id", "status", "completed_at"),   # 감자캐기 match: 후보별 최근 완료 수
+        Index("idx_user_habits_status_period_end", "status", "period_end"),    # 기간 끝난 습관 일괄 정산
+        Index("idx_user_habits_title", "title"),                                # 제목 접두 검색
+        Index("ft_user_habits_title", "title", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),   # 제목 전문 검색 (한글 ngram)
+        Index("idx_user_habits_updated", "updated_at"),                         # 스케줄러 타이밍 휠: 최근 바뀐 습관만 다시 읽음
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
@@ -26,6 +32,12 @@ class UserHabit(Base):
     period_end: Mapped[date] = mapped_column(Date, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # 마지막으로 행이 바뀐 시각 (UTC). ORM 수정 / update() 문 모두 onupdate 로 자동 갱신
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
     difficulty: Mapped[int] = mapped_column(SmallInteger, default=1, nullable=False)
     
     # 진행 상태: 진행중 / 완료 / 실패 / 취소 등
@@ -1,12 +1,16 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        Index("idx_wallet_tx_user_ts", "user_id", "created_at", "id"),   # 거래 내역 페이지네이션
+        Index("idx_wallet_tx_user_id", "user_id", "id"),                 # 스냅샷 이후 delta 합계
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -15,3 +19,13 @@ class WalletTransaction(Base):
     ref_table: Mapped[Optional[str]] = mapped_column(String(30))
     ref_id: Mapped[Optional[int]] = mapped_column(BigInteger)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+class WalletSnapshot(Base):
+    __tablename__ = "wallet_snapshots"
+
+    # 유저별 거래 내역 누적합 (wallet_transactions.id <= last_tx_id 까지 반영)
+    # → 잔액 검증은 balance + (last_tx_id 이후 거래 합계) 만 보면 됨
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    balance: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_tx_id: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,66 @@
+"""
+habit_stats(템플릿별 진행/완료 유저 수, 난이도 분포)를 user_habits 기록으로 다시 계산.
+- 테이블을 처음 만들었을 때, 또는 값이 어긋났다고 의심될 때 실행
+- python -m app.rebuild_habit_stats
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select
+
+from app.database import SessionLocal
+from app.models.habit import Habit, HabitStat
+from app.models.user_habit import UserHabit
+from app.utils.habit_stats import MAX_DIFFICULTY, MIN_DIFFICULTY
+
+
+def rebuild_habit_stats(db) -> int:
+    is_active = and_(UserHabit.status == "active", UserHabit.is_active == True)
+    is_completed = UserHabit.status == "completed_success"
+    counted = is_active | is_completed
+    # clamp_difficulty() 와 같은 구간으로 (범위 밖 난이도는 양 끝 칸에)
+    difficulty = case(
+        (func.coalesce(UserHabit.difficulty, MIN_DIFFICULTY) <= MIN_DIFFICULTY, MIN_DIFFICULTY),
+        (UserHabit.difficulty >= MAX_DIFFICULTY, MAX_DIFFICULTY),
+        else_=UserHabit.difficulty,
+    )
+
+    def _sum(cond):
+        return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+    diff_cols = {
+        f"diff_{d}_cnt": _sum(counted & (difficulty == d))
+        for d in range(MIN_DIFFICULTY, MAX_DIFFICULTY + 1)
+    }
+    agg = (
+        select(
+            Habit.id.label("habit_id"),
+            Habit.title.label("title"),
+            _sum(is_active).label("active_cnt"),
+            _sum(is_completed).label("completed_cnt"),
+            _sum(counted).label("popularity"),
+            *[col.label(name) for name, col in diff_cols.items()],
+            literal(datetime.now(timezone.utc)).label("updated_at"),
+        )
+        .join(UserHabit, UserHabit.source_habit_id == Habit.id)
+        .group_by(Habit.id, Habit.title)
+    )
+
+    db.execute(delete(HabitStat))
+    result = db.execute(
+        insert(HabitStat.__table__).from_select(
+            ["habit_id", "title", "active_cnt", "completed_cnt", "popularity", *diff_cols, "updated_at"],
+            agg,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    print(" Rebuilding habit stats...")
+    db = SessionLocal()
+    try:
+        n = rebuild_habit_stats(db)
+    finally:
+        db.close()
+    print(f"Done! ({n} templates)")
@@ -0,0 +1,51 @@
+"""
+Duel 의 성공/실패 카운터(owner_*_cnt / challenger_*_cnt)를 certifications 기록으로 다시 계산.
+- 카운터 컬럼을 처음 추가했을 때, 또는 값이 어긋났다고 의심될 때 실행
+- python -m app.reconcile_duels            → 전체 듀얼
+- python -m app.reconcile_duels 12 34      → 특정 듀얼만
+"""
+import sys
+
+from sqlalchemy import func, select, update
+
+from app.database import SessionLocal
+from app.models.certification import Certification
+from app.models.duel import Duel
+
+
+def _count(user_col, cert_status: str):
+    return (
+        select(func.count(Certification.id))  # pylint: disable=not-callable
+        .where(
+            Certification.duel_id == Duel.id,
+            Certification.user_id == user_col,
+            Certification.status == cert_status,
+        )
+        .scalar_subquery()
+    )
+
+
+def reconcile_duel_counters(db, duel_ids: list[int] | None = None) -> int:
+    stmt = update(Duel).values(
+        owner_success_cnt=_count(Duel.owner_user_id, "success"),
+        challenger_success_cnt=_count(Duel.challenger_user_id, "success"),
+        owner_fail_cnt=_count(Duel.owner_user_id, "fail"),
+        challenger_fail_cnt=_count(Duel.challenger_user_id, "fail"),
+    )
+    if duel_ids:
+        stmt = stmt.where(Duel.id.in_(duel_ids))
+
+    result = db.execute(stmt.execution_options(synchronize_session=False))
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    ids = [int(a) for a in sys.argv[1:]]
+    print(" Reconciling duel counters...")
+    db = SessionLocal()
+    try:
+        n = reconcile_duel_counters(db, ids or None)
+    finally:
+        db.close()
+    print(f"Done! ({n} duels)")
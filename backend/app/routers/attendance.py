@@ -9,6 +9,8 @@ from app.database import SessionLocal
 from app.models.user import User
 from app.models.attendance_log import AttendanceLog
 from app.routers.register import get_current_user  # 이미 쓰는 인증 의존성
+from app.utils.principal import Principal
+from app.utils.wallet import apply_hb_delta
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
@@ -30,7 +32,7 @@ def _today_local() -> date:
 @router.post("/check-in")
 def check_in_attendance(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     ):
     """
     출석 체크 API   
@@ -90,10 +92,7 @@ def check_in_attendance(
     bonus_reward = 5 if new_streak == 7 else 0
     today_reward = base_reward + bonus_reward
 
-    # 4) User 해시 재화 업데이트
-    db_user.hb_balance = (db_user.hb_balance or 0) + today_reward
-
-    # 5) AttendanceLog 저장
+    # 4) AttendanceLog 저장
     log = AttendanceLog(
         user_id=db_user.id,
         attend_date=today,
@@ -101,6 +100,10 @@ def check_in_attendance(
         reward=today_reward,
     )
     db.add(log)
+    db.flush()
+
+    # 5) User 해시 재화 지급 (+ 거래 내역)
+    apply_hb_delta(db, db_user.id, today_reward, "attendance_reward", "attendance_logs", log.id)
 
     db.commit()
     db.refresh(db_user)
@@ -1,202 +1,290 @@
 # app/routers/certifications.py
-from datetime import datetime, timezone, timedelta, date
+from datetime import datetime, timezone, timedelta, date, time as time_t
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Collection, List
 
 from app.database import SessionLocal
-from app.models.user import User
 from app.models.user_habit import UserHabit
 from app.models.certification import Certification
 from app.models.notification import Notification
+from app.models.media import MediaAsset
 
 from app.schemas.certification import CertificationCreateIn, CertificationOut
+from app.schemas.duel import DuelConversationMessage
 from app.routers.register import get_current_user
+from app.routers.duel import bump_duel_cert_counts
+from app.utils import pubsub
+from app.utils.calendar import weekday_bit
+from app.utils.home_summary import invalidate_home_summary
+from app.utils.notifications import bump_unread, notification_dedup_key
+from app.utils.principal import Principal
 
 router = APIRouter(prefix="/certifications", tags=["Certifications"])
 
 KST = timezone(timedelta(hours=9))
 
-def auto_fail_overdue_habits_for_today(
-    db: Session,
-    user: User,
-) -> list[Certification]:
-    """
-    - 오늘 요일에 해당되는 UserHabit 중에서
-    - 현재(KST)가 deadline_local 을 지난 경우
-    - 그리고 오늘 아직 Certification 이 없는 습관에 대해
-      status='fail' 인 Certification 을 생성한다.
-    """
-
-    now_kst = datetime.now(KST)
-    today: date = now_kst.date()
-    weekday = now_kst.isoweekday()  # 1=월 ... 7=일
-
-    created: list[Certification] = []
-
-    # 1) 오늘 이미 cert 있는 습관들 (success/fail 상관없이) 서브쿼리
-    existing_subq = (
-        db.query(Certification.user_habit_id)
-        .filter(
-            Certification.user_id == user.id,
+SWEEP_BATCH_SIZE = 500          # 스케줄러 sweep 한 번에 처리하는 습관 수
+REMINDER_WINDOW_MINUTES = 10    # 마감 몇 분 전부터 리마인더를 보낼지
+AUTO_FAIL_REASON = "정해진 인증시간이 지나서 인증 실패 했습니다."
+REMINDER_TITLE = "습관 인증 마감 10분 전이에요."
+
+# ==========================================
+#  스케줄러용: 전체 유저 대상 set-based sweep
+#   (유저별 루프 대신 몇 개의 쿼리로 한 번에 처리)
+# ==========================================
+def _due_habits_query(today: date):
+    """오늘 요일에 해당되고, 오늘이 기간 안이고, 오늘 아직 cert 가 없는 active 습관 (전체 유저)"""
+    today_bit = weekday_bit(today)  # 월=1 ... 일=64
+
+    has_cert_today = (
+        select(Certification.id)
+        .where(
+            Certification.user_id == UserHabit.user_id,
+            Certification.user_habit_id == UserHabit.id,
             Certification.cert_date == today,
         )
-        .subquery()
+        .exists()
     )
 
-    # 2) 오늘 요일에 해당되는, 내 active 습관들만 조회
-    # days_of_week 는 SmallInteger 비트마스크 (1<<weekday) 사용 :contentReference[oaicite:1]{index=1}
-    habits = (
-        db.query(UserHabit)
-        .filter(
-            UserHabit.user_id == user.id,
-            UserHabit.is_active == True,
-            (UserHabit.days_of_week.op("&")(1 << weekday) != 0),
-            ~UserHabit.id.in_(existing_subq),
+    return (
+        select(
+            UserHabit.id,
+            UserHabit.user_id,
+            UserHabit.duel_id,
+            UserHabit.method,
+            UserHabit.title,
+            UserHabit.deadline_local,
+            UserHabit.created_at,
         )
-        .all()
-    )
-
-    if not habits:
-        return []
-
-    now_utc = datetime.now(timezone.utc)
-
-    for h in habits:
-        # deadline_local: time 컬럼 :contentReference[oaicite:2]{index=2}
-        if h.deadline_local is None:
-            continue
-
-        # 오늘 날짜 + deadline_local → 오늘 마감 시각 (KST)
-        deadline_kst = datetime.combine(today, h.deadline_local, tzinfo=KST)
-
-        # 아직 마감 안 지났으면 fail 생성 X
-        if now_kst <= deadline_kst:
-            continue
-
-        # 마감 지났고, 아직 오늘 cert 없는 습관 → fail 생성
-        cert = Certification(
-            user_id=user.id,
-            user_habit_id=h.id,
-            duel_id=h.duel_id,
-            ts_utc=now_utc,
-            method=h.method,          # 습관의 인증 방식 재사용 
-            text_content=None,
-            photo_asset_id=None,
-            status="fail",
-            fail_reason="정해진 인증시간이 지나서 인증 실패 했습니다.",
-            cert_date=today,
+        .where(
+            UserHabit.is_active == True,                               # noqa: E712
+            (UserHabit.days_of_week.op("&")(today_bit) != 0),
+            UserHabit.period_start <= today,
+            UserHabit.period_end >= today,
+            UserHabit.deadline_local.isnot(None),
+            ~has_cert_today,
         )
-        db.add(cert)
-        created.append(cert)
+        .order_by(UserHabit.id)
+    )
 
-    db.commit()
 
-    # 필요하면 refresh
-    for c in created:
-        db.refresh(c)
+def _created_before_deadline(created_at: datetime | None, deadline_local: time_t, day: date) -> bool:
+    if created_at is None:
+        return True
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < datetime.combine(day, deadline_local, tzinfo=KST)
 
-    return created
 
-def create_deadline_reminders_10min_before(
+def sweep_overdue_habits(
     db: Session,
-    user: User,
-) -> list[Notification]:
+    now_kst: datetime | None = None,
+    batch_size: int = SWEEP_BATCH_SIZE,
+    habit_ids: Collection[int] | None = None,
+) -> int:
     """
-    - 오늘 요일에 해당되는 UserHabit 중에서
-    - deadline_local 이 있는 습관들 중
-    - '마감 10분 전 ~ 마감 전' 구간에 들어온 습관에 대해
-      하루에 한 번씩만 리마인더 알림(Notification.type='system') 생성.
+    스케줄러용 auto-fail: 전체 유저 대상.
+    - 마감시간이 지났는데 오늘 cert 가 없는 습관을 id 순으로 batch_size 개씩 찾아서
+    - fail Certification 을 bulk insert (배치마다 commit)
+    - habit_ids 를 주면 그 습관들만 후보로 본다 (타이밍 휠에서 꺼낸 버킷)
+    - 그날 마감시각 이후에 만든 습관은 제외 (재시작 후 지난 날짜를 replay 할 때 새 습관이 fail 되지 않도록)
+    - 듀얼 습관 fail 은 해시톡방 채널로도 발행
+    - fail 이 들어간 유저의 홈 요약 캐시는 commit 후 지움 (이 프로세스의 캐시만)
+    반환값: 생성된 fail Certification 수
     """
-    now_kst = datetime.now(KST)
+    if habit_ids is not None and not habit_ids:
+        return 0
+
+    now_kst = now_kst or datetime.now(KST)
     today: date = now_kst.date()
-    weekday = now_kst.isoweekday()  # 1=월 ... 7=일
+    now_utc = now_kst.astimezone(timezone.utc)
+
+    base = _due_habits_query(today).where(
+        UserHabit.deadline_local < now_kst.time(),
+        UserHabit.created_at < now_utc,
+    )
+    if habit_ids is not None:
+        base = base.where(UserHabit.id.in_(habit_ids))
+
+    created = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            base.where(UserHabit.id > last_id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # 그날 마감시각 전에 이미 있던 습관만 (마감 뒤에 만든 습관은 그날 인증 의무가 없음)
+        due_rows = [r for r in rows if _created_before_deadline(r.created_at, r.deadline_local, today)]
+        if due_rows:
+            def _fail_row(r) -> dict:
+                return {
+                    "user_id": r.user_id,
+                    "user_habit_id": r.id,
+                    "duel_id": r.duel_id,
+                    "ts_utc": now_utc,
+                    "method": r.method,
+                    "text_content": None,
+                    "photo_asset_id": None,
+                    "status": "fail",
+                    "fail_reason": AUTO_FAIL_REASON,
+                    "cert_date": today,
+                }
+
+            # 동시에 유저가 인증했거나 다른 sweep 이 먼저 넣은 경우 uq_cert_user_habit_day 충돌은 무시
+            fail_insert = insert(Certification.__table__).prefix_with("IGNORE", dialect="mysql")
+
+            solo_rows = [_fail_row(r) for r in due_rows if r.duel_id is None]
+            if solo_rows:
+                result = db.execute(fail_insert, solo_rows)
+                inserted = result.rowcount if result.rowcount >= 0 else len(solo_rows)
+                created += inserted
+                if inserted:
+                    # 어느 행이 무시됐는지는 모르므로 배치의 유저를 모두 지움 (다시 계산할 뿐이라 넉넉하게)
+                    invalidate_home_summary(db, *{row["user_id"] for row in solo_rows})
+
+            # 듀얼 습관은 한 행씩 넣어서 이 sweep 이 실제로 넣은 fail 만 듀얼 실패 카운터에 반영
+            # (INSERT IGNORE 로 건너뛴 행 / 다른 sweep 이 넣은 행을 다시 세면 카운터가 두 번 오름)
+            # 넣은 fail 은 해시톡방에 접속 중인 상대에게도 push (create_certification 과 같은 메시지, commit 후 발행)
+            for r in due_rows:
+                if r.duel_id is None:
+                    continue
+                result = db.execute(fail_insert.values(**_fail_row(r)))
+                if result.rowcount != 1:
+                    continue
+                bump_duel_cert_counts(db, r.duel_id, r.user_id, "fail")
+                invalidate_home_summary(db, r.user_id)
+                created += 1
+                message = DuelConversationMessage(
+                    id=result.inserted_primary_key[0],
+                    user_id=r.user_id,
+                    user_habit_id=r.id,
+                    duel_id=r.duel_id,
+                    habit_title=r.title,
+                    method=r.method,
+                    status="fail",
+                    fail_reason=AUTO_FAIL_REASON,
+                    text_content=None,
+                    photo_asset_id=None,
+                    ts_utc=now_utc,
+                )
+                pubsub.publish_after_commit(
+                    db,
+                    pubsub.duel_channel(r.duel_id),
+                    {"type": "message", "duel_id": r.duel_id, "message": message.model_dump(mode="json")},
+                )
+
+            db.commit()
+
+        if len(rows) < batch_size:
+            break
 
-    # 오늘 0시(KST) → UTC로 변환해서, "오늘 리마인더 이미 보냈는지" 체크에 사용
-    today_start_kst = datetime(today.year, today.month, today.day, tzinfo=KST)
-    today_start_utc = today_start_kst.astimezone(timezone.utc)
+    return created
 
-    created: list[Notification] = []
 
-    # 1) 오늘 이미 cert 있는 습관들 (success/fail 상관없이) 서브쿼리
-    existing_subq = (
-        db.query(Certification.user_habit_id)
-        .filter(
-            Certification.user_id == user.id,
-            Certification.cert_date == today,
-        )
-        .subquery()
-    )
+def reminder_dedup_key(user_habit_id: int, day: date) -> str:
+    """마감 리마인더는 습관당 하루(KST) 한 번"""
+    return notification_dedup_key("reminder", f"habit:{user_habit_id}", day)
 
-    # 2) 오늘 요일에 해당되는, 내 active 습관들만 조회
-    habits = (
-        db.query(UserHabit)
-        .filter(
-            UserHabit.user_id == user.id,
-            UserHabit.is_active == True,                               # noqa: E712
-            (UserHabit.days_of_week.op("&")(1 << weekday) != 0),
-            ~UserHabit.id.in_(existing_subq),                          # 오늘 이미 cert 있는 습관 제외
-            UserHabit.deadline_local.isnot(None),                      # 마감시간 있는 습관만
-        )
-        .all()
+
+def _inserted_reminders_per_user(db: Session, new_rows: list[dict], inserted: int, now_utc: datetime) -> dict[int, int]:
+    """
+    INSERT IGNORE 로 실제 들어간 리마인더 수 (유저별, 안 읽은 알림 카운터용).
+    - 다 들어갔으면 그대로 세고, 일부만 들어갔으면 이번 tick 에 만든 행만 다시 셈
+    """
+    per_user: dict[int, int] = {}
+    if inserted == len(new_rows):
+        for row in new_rows:
+            per_user[row["user_id"]] = per_user.get(row["user_id"], 0) + 1
+        return per_user
+
+    return dict(
+        db.execute(
+            select(Notification.user_id, func.count(Notification.id))  # pylint: disable=not-callable
+            .where(
+                Notification.user_id.in_({row["user_id"] for row in new_rows}),
+                Notification.dedup_key.in_([row["dedup_key"] for row in new_rows]),
+                Notification.created_at == now_utc,
+            )
+            .group_by(Notification.user_id)
+        ).all()
     )
 
-    if not habits:
-        return []
 
-    now_utc = now_kst.astimezone(timezone.utc)
+def sweep_deadline_reminders(
+    db: Session,
+    now_kst: datetime | None = None,
+    batch_size: int = SWEEP_BATCH_SIZE,
+    habit_ids: Collection[int] | None = None,
+) -> int:
+    """
+    스케줄러용 마감 10분 전 리마인더: 전체 유저 대상.
+    - '마감 10분 전 ~ 마감 전' 구간에 들어온 습관을 batch_size 개씩 찾고
+    - 리마인더 Notification 을 INSERT IGNORE 로 bulk insert (배치마다 commit)
+      오늘 이미 보낸 습관은 dedup_key (reminder:habit:<id>:<KST 날짜>) 가 겹쳐서 무시됨
+    - habit_ids 를 주면 그 습관들만 후보로 본다 (타이밍 휠에서 꺼낸 버킷)
+    - 리마인더를 받은 유저의 홈 요약 캐시도 commit 후 지움 (이 프로세스의 캐시만)
+    반환값: 생성된 Notification 수
+    """
+    if habit_ids is not None and not habit_ids:
+        return 0
 
-    for h in habits:
-        # deadline_local: time 컬럼
-        if h.deadline_local is None:
-            continue
-
-        # 오늘 날짜 + deadline_local → 오늘 마감 시각 (KST)
-        deadline_kst = datetime.combine(today, h.deadline_local, tzinfo=KST)
-
-        # 아직 오늘 마감시간이 아예 지나버린 경우 → 리마인더 의미 없음
-        if now_kst >= deadline_kst:
-            continue
-
-        # "마감 10분 전" 구간 계산
-        reminder_start_kst = deadline_kst - timedelta(minutes=10)
-
-        # 지금 시간이 [마감 10분 전, 마감) 구간에 없으면 스킵
-        if not (reminder_start_kst <= now_kst < deadline_kst):
-            continue
-
-        # 오늘 이미 이 습관에 대한 리마인더 알림을 보냈는지 체크
-        deeplink = f"/habits/{h.id}/deadline-reminder"
-        already = (
-            db.query(Notification)
-            .filter(
-                Notification.user_id == user.id,
-                Notification.type == "system",
-                Notification.deeplink == deeplink,
-                Notification.created_at >= today_start_utc,
-            )
-            .first()
-        )
-        if already:
-            continue
-
-        #리마인더 알림 생성
-        noti = Notification(
-            user_id=user.id,
-            type="system",                              # pushType: "etc"
-            title="습관 인증 마감 10분 전이에요.",
-            body=h.title or "",                         # 주황 강조 텍스트용
-            deeplink=deeplink,
-            is_read=False,
-            created_at=now_utc,
+    now_kst = now_kst or datetime.now(KST)
+    today: date = now_kst.date()
+    # DATETIME 은 초 단위까지만 저장되므로 맞춰 둠 (_inserted_reminders_per_user 에서 created_at 으로 다시 찾음)
+    now_utc = now_kst.astimezone(timezone.utc).replace(microsecond=0)
+
+    # now < deadline <= now + 10분 (자정을 넘어가면 오늘 남은 시간까지만)
+    window_end_kst = now_kst + timedelta(minutes=REMINDER_WINDOW_MINUTES)
+    conds = [UserHabit.deadline_local > now_kst.time()]
+    if window_end_kst.date() == today:
+        conds.append(UserHabit.deadline_local <= window_end_kst.time())
+    base = _due_habits_query(today).where(*conds)
+    if habit_ids is not None:
+        base = base.where(UserHabit.id.in_(habit_ids))
+
+    created = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            base.where(UserHabit.id > last_id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # 오늘 이미 보낸 리마인더는 (user_id, dedup_key) unique 에 걸려서 무시됨 → 미리 조회하지 않음
+        new_rows = [
+            {
+                "user_id": r.user_id,
+                "type": "system",                      # pushType: "etc"
+                "title": REMINDER_TITLE,
+                "body": r.title or "",                 # 주황 강조 텍스트용
+                "deeplink": f"/habits/{r.id}/deadline-reminder",
+                "is_read": False,
+                "created_at": now_utc,
+                "dedup_key": reminder_dedup_key(r.id, today),
+            }
+            for r in rows
+        ]
+        result = db.execute(
+            insert(Notification.__table__).prefix_with("IGNORE", dialect="mysql"),
+            new_rows,
         )
-        db.add(noti)
-        created.append(noti)
-
-    db.commit()
+        inserted = result.rowcount if result.rowcount >= 0 else len(new_rows)
+        if inserted:
+            per_user = _inserted_reminders_per_user(db, new_rows, inserted, now_utc)
+            bump_unread(db, per_user)
+            invalidate_home_summary(db, *per_user)
+        db.commit()
+        created += inserted
 
-    for n in created:
-        db.refresh(n)
+        if len(rows) < batch_size:
+            break
 
     return created
 
@@ -211,7 +299,7 @@ def get_db():
 def create_certification(
     body: CertificationCreateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     습관 인증 기록 하나 생성
@@ -274,7 +362,37 @@ def create_certification(
 
     db.add(cert)
 
+    if cert.duel_id is not None:
+        db.flush()
+        bump_duel_cert_counts(db, cert.duel_id, cert.user_id, cert.status)
+
+        # 해시톡방에 접속 중인 상대에게 새 메시지 push (commit 후 발행)
+        photo_url = None
+        if cert.photo_asset_id is not None:
+            asset = db.get(MediaAsset, cert.photo_asset_id)
+            photo_url = asset.storage_url if asset is not None else None
+        message = DuelConversationMessage(
+            id=cert.id,
+            user_id=cert.user_id,
+            user_habit_id=cert.user_habit_id,
+            duel_id=cert.duel_id,
+            habit_title=user_habit.title,
+            method=cert.method,
+            status=cert.status,
+            fail_reason=cert.fail_reason,
+            text_content=cert.text_content,
+            photo_asset_id=cert.photo_asset_id,
+            photo_url=photo_url,
+            ts_utc=cert.ts_utc,
+        )
+        pubsub.publish_after_commit(
+            db,
+            pubsub.duel_channel(cert.duel_id),
+            {"type": "message", "duel_id": cert.duel_id, "message": message.model_dump(mode="json")},
+        )
+
     # (여기서 나중에 "성공 습관으로 승급 체크" 하는 함수를 호출할 수도 있음)
+    invalidate_home_summary(db, cert.user_id)
     db.commit()
     db.refresh(cert)
 
@@ -283,7 +401,7 @@ def create_certification(
 @router.get("/today/habits", response_model=List[int])
 def get_today_certified_habits(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     오늘(한국 시간 기준)에 인증 성공한 user_habit_id 목록 반환
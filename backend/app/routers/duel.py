@@ -1,16 +1,27 @@
 # app/routers/duel.py
-from datetime import date, datetime, timezone
-from typing import List
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from jose import JWTError
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.database import async_session, get_async_db, get_db
+from app.routers.register import decode_access_token, get_current_user, get_current_user_async
+from app.utils import metrics, pubsub
+from app.utils.calendar import count_scheduled_days, encode_weekdays
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.deadline_wheel import deadline_wheel
+from app.utils.farmer_cards import invalidate_farmer_card
+from app.utils.habit_stats import apply_habit_stat_change, habit_stat_state
+from app.utils.home_summary import invalidate_home_summary
+from app.utils.notifications import create_notification, notification_dedup_key
+from app.utils.wallet import apply_hb_delta
+from app.utils.principal import Principal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_, select, func
-from sqlalchemy.orm import Session
-
-from app.database import get_db
-from app.routers.register import get_current_user
-from app.routers.certification import auto_fail_overdue_habits_for_today
-
-from app.models.notification import Notification
 from app.models.duel import Duel
 from app.models.user import User
 from app.models.exchange import ExchangeRequest
@@ -23,41 +34,52 @@ from app.schemas.duel import(
     ActiveDuelItem, DuelFromExchangeIn,
     DuelConversationOut,DuelConversationMessage)
 
+KST = timezone(timedelta(hours=9))
 FAIL_LIMIT = 3 
+CONVERSATION_PAGE_SIZE = 50   # 해시톡방 한 번에 내려주는 메시지 수
+SETTLE_BATCH_SIZE = 200       # 스케줄러 정산 한 번에 훑는 듀얼 수
 
 router = APIRouter(prefix="/duels", tags=["duels"])
 
-def _create_notification(
+def bump_duel_cert_counts(
     db: Session,
+    duel_id: int,
     user_id: int,
-    noti_type: str,
-    title: str,
-    body: str = "",
-    deeplink: str | None = None,
-):
+    cert_status: str,
+    amount: int = 1,
+) -> None:
     """
-    공통 알림 생성 헬퍼.
-    - noti_type: "challenge", "challenge_rejected", "challenge_accepted", "system" 등 문자열 정책은 자유.
+    듀얼 인증이 기록될 때 Duel 의 성공/실패 카운터를 같은 트랜잭션에서 증가.
+    - UPDATE ... SET cnt = cnt + n 이라 동시에 인증이 들어와도 값이 꼬이지 않음
+    - 세션에 이미 올라와 있는 Duel 객체는 갱신하지 않음 (필요하면 db.refresh)
     """
-    now = datetime.now(timezone.utc)
-    n = Notification(
-        user_id=user_id,
-        type=noti_type,
-        title=title,
-        body=body,
-        is_read=False,
-        deeplink=deeplink,
-        created_at = now,
+    if cert_status == "fail":
+        owner_col, challenger_col = Duel.owner_fail_cnt, Duel.challenger_fail_cnt
+    else:
+        owner_col, challenger_col = Duel.owner_success_cnt, Duel.challenger_success_cnt
+
+    db.execute(
+        update(Duel)
+        .where(Duel.id == duel_id)
+        .values({
+            owner_col: owner_col + case((Duel.owner_user_id == user_id, amount), else_=0),
+            challenger_col: challenger_col + case((Duel.challenger_user_id == user_id, amount), else_=0),
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+def _publish_duel_finished(db: Session, duel: Duel) -> None:
+    """해시톡방에 접속 중인 클라이언트에게 듀얼 종료 알림 (commit 후 발행)"""
+    pubsub.publish_after_commit(
+        db,
+        pubsub.duel_channel(duel.id),
+        {
+            "type": "duel_finished",
+            "duel_id": duel.id,
+            "status": duel.status,
+            "result": duel.result,
+        },
     )
-    db.add(n)
-    # commit 은 보통 기존 로직과 함께 한 번에
-    
-def _encode_days_of_week(weekdays: List[int]) -> int:
-    mask = 0
-    for d in weekdays:
-        if 1 <= d <= 7:
-            mask |= (1 << (d - 1))
-    return mask
 
 def _forfeit_duel(
     db: Session,
@@ -75,7 +97,6 @@ def _forfeit_duel(
 
     now_utc = datetime.now(timezone.utc)
 
-    stake = duel.difficulty
     owner_user = db.get(User, duel.owner_user_id)
     challenger_user = db.get(User, duel.challenger_user_id)
     
@@ -86,18 +107,16 @@ def _forfeit_duel(
         
         # 패배자/승자 결정
         if loser_user_id == duel.owner_user_id:
-            loser = owner_user
             winner = challenger_user
             winner_reward = challenger_stake * 2 + owner_stake
         else:
-            loser = challenger_user
             winner = owner_user
             winner_reward = owner_stake * 2 + challenger_stake
         
         # 이미 둘 다 스테이크만큼 차감된 상태에서,
         # 승자에게 양쪽 스테이크(2배)를 지급 → 순이익 +stake
         
-        winner.hb_balance += winner_reward
+        apply_hb_delta(db, winner.id, winner_reward, "duel_reward", "duels", duel.id)
         
     # duel에 연결된 user_habits 두 개 가져오기
     duel_habits: list[UserHabit] = (
@@ -109,11 +128,14 @@ def _forfeit_duel(
     for uh in duel_habits:
         if uh.user_id == loser_user_id:
             # 패배한 쪽: 실패로 종료
+            stat_before = habit_stat_state(uh)
             uh.status = "completed_fail"
             uh.is_active = False
             uh.completed_at = now_utc
+            apply_habit_stat_change(db, uh.source_habit_id, stat_before, habit_stat_state(uh))
             # duel_id는 굳이 지워도 되고 안 지워도 되지만, 깔끔하게 None
             uh.duel_id = None
+            deadline_wheel.untrack(uh.id)
         else:
             # 이긴 쪽: duel 관계만 끊고 개인 습관 도전으로 이어가기
             uh.duel_id = None
@@ -124,6 +146,8 @@ def _forfeit_duel(
         duel.result = "forfeit_owner"
     else:
         duel.result = "forfeit_challenger"
+    _publish_duel_finished(db, duel)
+    invalidate_home_summary(db, duel.owner_user_id, duel.challenger_user_id)
         
     owner_user = db.get(User, duel.owner_user_id)
     challenger_user = db.get(User, duel.challenger_user_id)
@@ -144,22 +168,24 @@ def _forfeit_duel(
     duel_title = duel.habit_title
 
     # 1) 패배한 사람 알림
-    _create_notification(
+    create_notification(
         db=db,
         user_id=loser.id,
         noti_type="cert_fail",   # → pushType "certification"
         title="내기가 패배로 종료되었어요.",
         body=duel_title,
         deeplink=f"/duels/{duel.id}",
+        dedup_key=notification_dedup_key("duel_result", duel.id),
     )
     # 2) 승리한 사람 알림
-    _create_notification(
+    create_notification(
         db=db,
         user_id=winner.id,
         noti_type="cert_success",  # → pushType "certification"
         title="상대 농부가 패배해서 내기가 종료되었어요.",
         body=duel_title,
         deeplink=f"/duels/{duel.id}",
+        dedup_key=notification_dedup_key("duel_result", duel.id),
     )
     
 def _finish_duel_both_end(
@@ -180,7 +206,6 @@ def _finish_duel_both_end(
 
     now_utc = datetime.now(timezone.utc)
     
-    stake = duel.difficulty
     owner_user = db.get(User, duel.owner_user_id)
     challenger_user = db.get(User, duel.challenger_user_id)
 
@@ -190,15 +215,15 @@ def _finish_duel_both_end(
         challenger_stake = duel.challenger_stake
         # 1) 둘 다 성공
         if owner_status == "completed_success" and challenger_status == "completed_success":
-            owner_user.hb_balance += owner_stake  * 2
-            challenger_user.hb_balance += challenger_stake  * 2
+            apply_hb_delta(db, owner_user.id, owner_stake * 2, "duel_reward", "duels", duel.id)
+            apply_hb_delta(db, challenger_user.id, challenger_stake * 2, "duel_reward", "duels", duel.id)
 
         # 2) 한쪽만 성공 (혹시 이 함수로 사용하는 경우 대비)
         elif owner_status == "completed_success" and challenger_status == "completed_fail":
-            owner_user.hb_balance += owner_stake * 2 + challenger_stake
+            apply_hb_delta(db, owner_user.id, owner_stake * 2 + challenger_stake, "duel_reward", "duels", duel.id)
        
         elif owner_status == "completed_fail" and challenger_status == "completed_success":
-            challenger_user.hb_balance += challenger_stake * 2 + owner_stake
+            apply_hb_delta(db, challenger_user.id, challenger_stake * 2 + owner_stake, "duel_reward", "duels", duel.id)
 
 
     duel_habits: list[UserHabit] = (
@@ -208,6 +233,7 @@ def _finish_duel_both_end(
     )
 
     for uh in duel_habits:
+        stat_before = habit_stat_state(uh)
         if uh.user_id == duel.owner_user_id:
             uh.status = owner_status
         elif uh.user_id == duel.challenger_user_id:
@@ -219,10 +245,16 @@ def _finish_duel_both_end(
         uh.is_active = False
         uh.completed_at = now_utc
         uh.duel_id = None  # duel 종료됐으니 관계 끊기
+        apply_habit_stat_change(db, uh.source_habit_id, stat_before, habit_stat_state(uh))
+        deadline_wheel.untrack(uh.id)
+        if uh.status == "completed_success":
+            invalidate_farmer_card(db, uh.user_id)
 
     duel.status = "finished"
     duel.result = result
     duel.end_date = now_utc
+    _publish_duel_finished(db, duel)
+    invalidate_home_summary(db, duel.owner_user_id, duel.challenger_user_id)
     
     if owner_status == "completed_success" and challenger_status == "completed_success":
         duel_title = duel.habit_title
@@ -238,30 +270,33 @@ def _finish_duel_both_end(
 
         # owner 쪽 알림
         if owner_user:
-            _create_notification(
+            create_notification(
                 db=db,
                 user_id=owner_user.id,
                 noti_type="cert_success",   # → pushType: "certification"
                 title=owner_title,
                 body=duel_title,            # 액션(주황 텍스트)에는 듀얼 제목
                 deeplink=deeplink,
+                dedup_key=notification_dedup_key("duel_result", duel.id),
             )
 
         # challenger 쪽 알림
         if challenger_user:
-            _create_notification(
+            create_notification(
                 db=db,
                 user_id=challenger_user.id,
                 noti_type="cert_success",
                 title=challenger_title,
                 body=duel_title,
                 deeplink=deeplink,
+                dedup_key=notification_dedup_key("duel_result", duel.id),
             )
         
 
 def _check_and_finish_duel_by_rules(
     db: Session,
     duel: Duel,
+    today: date | None = None,
 ) -> None:
     """
     규칙에 따라 듀얼 종료 여부를 판단하고 필요 시 종료 처리.
@@ -272,26 +307,11 @@ def _check_and_finish_duel_by_rules(
     if duel.status != "active":
         return
 
-    today = date.today()
+    today = today or date.today()
 
-    # --- 1) 유저별 실패 횟수 계산 ---
-    rows = (
-        db.query(
-            Certification.user_id,
-            func.count(Certification.id).label("fail_count") # pylint: disable=not-callable
-        )
-        .filter(
-            Certification.duel_id == duel.id,
-            Certification.status == "fail",
-        )
-        .group_by(Certification.user_id)
-        .all()
-    )
-
-    fail_counts = {user_id: cnt for (user_id, cnt) in rows}
-
-    owner_fail = fail_counts.get(duel.owner_user_id, 0)
-    challenger_fail = fail_counts.get(duel.challenger_user_id, 0)
+    # --- 1) 유저별 실패 횟수 (Duel 에 유지되는 카운터) ---
+    owner_fail = duel.owner_fail_cnt
+    challenger_fail = duel.challenger_fail_cnt
 
     # FAIL_LIMIT 초과한 사람 있는지
     owner_over = owner_fail > FAIL_LIMIT
@@ -328,11 +348,93 @@ def _check_and_finish_duel_by_rules(
         db.commit()
         return
 
+def _settlement_lag_seconds(db: Session, duel: Duel, now_utc: datetime) -> float:
+    """
+    종료됐어야 하는 시점부터 실제 정산까지 걸린 시간(초)
+    - 실패 초과: 마지막 fail 인증 시각부터
+    - 기간 만료: end_date 다음날 0시부터
+    """
+    if duel.owner_fail_cnt > FAIL_LIMIT or duel.challenger_fail_cnt > FAIL_LIMIT:
+        due_at = db.scalar(
+            select(Certification.ts_utc)
+            .where(Certification.duel_id == duel.id, Certification.status == "fail")
+            .order_by(Certification.ts_utc.desc())
+            .limit(1)
+        )
+    else:
+        due_at = datetime.combine(duel.end_date + timedelta(days=1), datetime.min.time(), tzinfo=KST)
+
+    if due_at is None:
+        return 0.0
+    if due_at.tzinfo is None:
+        due_at = due_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (now_utc - due_at).total_seconds())
+
+
+def settle_due_duels(
+    db: Session,
+    today: date | None = None,
+    batch_size: int = SETTLE_BATCH_SIZE,
+) -> int:
+    """
+    스케줄러용 듀얼 정산.
+    - active 이면서 (end_date 지남 / 실패 초과) 인 듀얼을 id 순으로 batch_size 개씩 찾고
+    - 듀얼마다 row lock 을 잡고 다시 확인한 뒤 _check_and_finish_duel_by_rules 로 종료 (듀얼 1개 = 트랜잭션 1개)
+    - 이미 종료된 듀얼은 상태 체크에서 걸러지므로 여러 번 돌아도 중복 정산 없음
+    반환값: 종료 처리한 듀얼 수
+    """
+    today = today or date.today()
+    now_utc = datetime.now(timezone.utc)
+
+    # (status, end_date) 인덱스로 후보 좁히기
+    base = (
+        select(Duel.id)
+        .where(
+            Duel.status == "active",
+            or_(
+                Duel.end_date < today,
+                Duel.owner_fail_cnt > FAIL_LIMIT,
+                Duel.challenger_fail_cnt > FAIL_LIMIT,
+            ),
+        )
+        .order_by(Duel.id)
+    )
+
+    settled = 0
+    last_id = 0
+    while True:
+        ids = db.scalars(base.where(Duel.id > last_id).limit(batch_size)).all()
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        for duel_id in ids:
+            duel = db.scalars(
+                select(Duel).where(Duel.id == duel_id).with_for_update()
+            ).first()
+            if duel is None or duel.status != "active":
+                db.rollback()
+                continue
+
+            lag = _settlement_lag_seconds(db, duel, now_utc)
+            _check_and_finish_duel_by_rules(db, duel, today=today)
+            if duel.status == "finished":
+                settled += 1
+                metrics.observe("duel.settlement_lag", lag)
+                metrics.set_gauge("duel.last_settlement_lag_seconds", lag)
+            else:
+                db.rollback()
+
+        if len(ids) < batch_size:
+            break
+
+    return settled
+
 @router.post("/{duel_id}/give-up", status_code=status.HTTP_200_OK)
 def give_up_duel(
     duel_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     1번 케이스:
@@ -358,62 +460,60 @@ def give_up_duel(
     return {"detail": "내기를 포기하였습니다."}
 
 @router.get("/active", response_model=List[ActiveDuelItem])
-def get_active_duels(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_active_duels(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
+    """
+    내가 참가 중인 active 듀얼 목록.
+    듀얼 + 내 습관 + 상대 습관 + 상대 프로필을 JOIN 한 번으로 가져온다 (듀얼 수와 상관없이 쿼리 1번).
+    """
     today = date.today()
 
-    duels = (
-        db.query(Duel)
-        .filter(
+    my_uh = aliased(UserHabit)
+    rival_uh = aliased(UserHabit)
+    rival = aliased(User)
+
+    rows = (await db.execute(
+        select(
+            Duel.id,
+            Duel.start_date,
+            my_uh.title.label("my_habit_title"),
+            rival_uh.title.label("rival_habit_title"),
+            rival.id.label("rival_id"),
+            rival.nickname.label("rival_nickname"),
+            rival.name.label("rival_name"),
+            rival.profile_picture.label("rival_profile_picture"),
+        )
+        # 데이터가 이상해서 습관/상대가 없는 듀얼은 INNER JOIN 으로 자연스럽게 빠짐
+        .join(my_uh, and_(my_uh.duel_id == Duel.id, my_uh.user_id == current_user.id))
+        .join(rival_uh, and_(rival_uh.duel_id == Duel.id, rival_uh.user_id != current_user.id))
+        .join(rival, rival.id == rival_uh.user_id)
+        .where(
             Duel.status == "active",
             or_(
                 Duel.owner_user_id == current_user.id,
                 Duel.challenger_user_id == current_user.id
-            )
+            ),
         )
-        .all()
-    )
+        .order_by(Duel.id)
+    )).all()
 
     items: list[ActiveDuelItem] = []
-
-    for d in duels:
-        # 이 듀얼에 연결된 UserHabit 두 개 가져오기
-        duel_habits: list[UserHabit] = (
-            db.query(UserHabit)
-            .filter(UserHabit.duel_id == d.id)
-            .all()
-        )
-
-        if len(duel_habits) < 2:
-            # 데이터가 이상하면 스킵
-            continue
-
-        # 현재 유저 / 상대 유저 습관 분리
-        my_uh = next((uh for uh in duel_habits if uh.user_id == current_user.id), None)
-        rival_uh = next((uh for uh in duel_habits if uh.user_id != current_user.id), None)
-
-        if not my_uh or not rival_uh:
-            continue
-
-        rival = db.get(User, rival_uh.user_id)
-        if not rival:
-            continue
-
-        days = (today - d.start_date).days + 1
+    for r in rows:
+        days = (today - r.start_date).days + 1
         if days < 1:
             days = 1
 
         items.append(
             ActiveDuelItem(
-                duel_id=d.id,
-                rival_id=rival.id,
-                rival_nickname=rival.nickname or rival.name,
-                rival_profile_picture=rival.profile_picture,
+                duel_id=r.id,
+                rival_id=r.rival_id,
+                rival_nickname=r.rival_nickname or r.rival_name,
+                rival_profile_picture=r.rival_profile_picture,
                 days=days,
-                my_habit_title=my_uh.title,         #  내 도전
-                rival_habit_title=rival_uh.title,   #  상대 도전
+                my_habit_title=r.my_habit_title,         #  내 도전
+                rival_habit_title=r.rival_habit_title,   #  상대 도전
             )
         )
 
@@ -423,7 +523,7 @@ def get_active_duels(
 def create_duel_from_exchange(
     payload: DuelFromExchangeIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # 1) 교환 요청 가져오기
     ex = db.get(ExchangeRequest, payload.exchange_request_id)
@@ -476,7 +576,9 @@ def create_duel_from_exchange(
     if payload.start_date > payload.end_date:
         raise HTTPException(status_code=400, detail="시작일이 종료일보다 늦을 수 없습니다.")
 
-    days_mask = _encode_days_of_week(payload.days_of_week)
+    days_mask = encode_weekdays(payload.days_of_week)
+    if count_scheduled_days(days_mask, payload.start_date, payload.end_date) == 0:
+        raise HTTPException(status_code=400, detail="기간 안에 인증하는 요일이 하루도 없습니다.")
 
     if payload.method not in ("photo", "text"):
         raise HTTPException(status_code=400, detail="잘못된 인증 방식입니다.")
@@ -542,23 +644,25 @@ def create_duel_from_exchange(
     deeplink = f"/duels/{duel.id}"
 
     # 1) 도전 받은 사람에게: "OOO 농부와 내기가 성립되었어요."
-    _create_notification(
+    create_notification(
         db=db,
         user_id=owner_user.id,
         noti_type="challenge_accepted",
         title=f"{challenger_user.nickname or challenger_user.name} 농부와 내기가 시작되었어요.",
         body=duel_title,
         deeplink=deeplink,
+        dedup_key=notification_dedup_key("duel_start", duel.id),
     )
 
     # 2) 도전 건 사람에게도 같은 취지 알림
-    _create_notification(
+    create_notification(
         db=db,
         user_id=challenger_user.id,
         noti_type="challenge_accepted",
         title=f"{owner_user.nickname or owner_user.name} 농부와 내기가 시작되었어요.",
         body=duel_title,
         deeplink=deeplink,
+        dedup_key=notification_dedup_key("duel_start", duel.id),
     )
     
     # ---------------------------------------------------
@@ -602,13 +706,13 @@ def create_duel_from_exchange(
     )
 
     db.add_all([owner_duel_habit, challenger_duel_habit])
+    for uh in (owner_duel_habit, challenger_duel_habit):
+        apply_habit_stat_change(db, uh.source_habit_id, habit_stat_state(None), habit_stat_state(uh))
 
-    # 6-3) 내기 시작 시점에 양쪽 해시 차감
-    owner_user.hb_balance -= owner_stake
-    
-    if owner_user.hb_balance < 0 or challenger_user.hb_balance < 0:
-        # 이론상 위에서 다 체크해서 여기 오면 음수가 될 일이 없지만
-        # 혹시 동시성 문제를 대비해 한 번 더 안전장치.
+    # 6-3) 내기 시작 시점에 내 해시 차감 (상대는 도전장 보낼 때 이미 선차감)
+    #      위에서 잔액을 확인했어도 동시에 다른 차감이 들어올 수 있으니 조건부 UPDATE 결과로 최종 판단
+    if not apply_hb_delta(db, owner_user.id, -owner_stake, "duel_stake", "duels", duel.id):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="해시 차감 중 오류가 발생했습니다.",
@@ -616,21 +720,36 @@ def create_duel_from_exchange(
         
     # 7) 교환 요청 정리 (삭제 or 상태 변경)
     db.delete(ex)
+    invalidate_home_summary(db, ex.to_user_id, ex.from_user_id)
     db.commit()
 
+    deadline_wheel.track(owner_duel_habit)
+    deadline_wheel.track(challenger_duel_habit)
+
     return {"duel_id": duel.id}
 
 @router.get("/{duel_id}/conversation", response_model=DuelConversationOut)
-def get_duel_conversation(
+async def get_duel_conversation(
     duel_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    before: Optional[str] = Query(None, description="이 cursor 보다 이전 메시지 (위로 스크롤)"),
+    after: Optional[str] = Query(None, description="이 cursor 보다 이후 메시지"),
+    since_id: Optional[int] = Query(None, description="이 id 이후에 생긴 메시지만 (폴링용)"),
+    limit: int = Query(CONVERSATION_PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
-    
-    auto_fail_overdue_habits_for_today(db, current_user)
-    
+    """
+    해시톡방 메시지 조회 (keyset 페이지네이션, ts_utc + id 기준).
+    - 아무 cursor 없으면 최신 limit 개
+    - before / after / since_id 중 하나로 이전·이후 페이지 조회
+    - 페이지 크기와 상관없이 쿼리 수는 고정 (habit/media/실패 횟수 모두 IN·집계로 한 번에)
+    - 마감 지난 습관 fail 처리 / 듀얼 종료 판정은 스케줄러가 하므로 여기서는 하지 않음
+    """
+    if sum(x is not None for x in (before, after, since_id)) > 1:
+        raise HTTPException(status_code=400, detail="before / after / since_id 는 하나만 사용할 수 있습니다.")
+
     # 1) duel 존재 & 내가 참가자인지 확인
-    duel = db.get(Duel, duel_id)
+    duel = await db.get(Duel, duel_id)
     if duel is None:
         raise HTTPException(status_code=404, detail="Duel not found")
 
@@ -638,8 +757,7 @@ def get_duel_conversation(
         # 내가 아닌 사람의 대화방은 볼 수 없음
         raise HTTPException(status_code=403, detail="Not a participant of this duel")
 
-    _check_and_finish_duel_by_rules(db, duel)
-    db.refresh(duel)
+    # 듀얼 종료(실패 초과 / 기간 만료) 처리는 스케줄러의 settle_due_duels 가 담당
     
     # 2) 상대방(파트너) 정보 결정
     if current_user.id == duel.owner_user_id:
@@ -647,71 +765,91 @@ def get_duel_conversation(
     else:
         partner_id = duel.owner_user_id
 
-    partner: User | None = db.get(User, partner_id)
+    partner: User | None = await db.get(User, partner_id)
     if partner is None:
         raise HTTPException(status_code=404, detail="Partner user not found")
 
-    # 3) 이 duel에 속한 user_habits 불러와서 {id: title} 맵 만들기
-    user_habits = db.scalars(
-        select(UserHabit).where(UserHabit.duel_id == duel.id)
-    ).all()
-    habit_title_map: dict[int, str] = {
-        uh.id: uh.title for uh in user_habits
-    }
-
-    # 4) 이 duel에 대한 모든 Certification 시간순으로 가져오기
-    certs = db.scalars(
-        select(Certification)
-        .where(Certification.duel_id == duel.id)
-        .order_by(Certification.ts_utc.asc())
-    ).all()
+    # 3) 이 duel 의 Certification 한 페이지 (limit+1 개 가져와서 다음 페이지 여부 판단)
+    stmt = select(Certification).where(Certification.duel_id == duel.id)
+    newest_first = False
 
+    if since_id is not None:
+        stmt = stmt.where(Certification.id > since_id).order_by(
+            Certification.ts_utc.asc(), Certification.id.asc()
+        )
+    elif after is not None:
+        ts, cid = decode_cursor(after, datetime, int)
+        stmt = stmt.where(
+            or_(
+                Certification.ts_utc > ts,
+                and_(Certification.ts_utc == ts, Certification.id > cid),
+            )
+        ).order_by(Certification.ts_utc.asc(), Certification.id.asc())
+    else:
+        if before is not None:
+            ts, cid = decode_cursor(before, datetime, int)
+            stmt = stmt.where(
+                or_(
+                    Certification.ts_utc < ts,
+                    and_(Certification.ts_utc == ts, Certification.id < cid),
+                )
+            )
+        stmt = stmt.order_by(Certification.ts_utc.desc(), Certification.id.desc())
+        newest_first = True
+
+    certs = list((await db.scalars(stmt.limit(limit + 1))).all())
+    has_more = len(certs) > limit
+    certs = certs[:limit]
+    if newest_first:
+        certs.reverse()
+
+    # 4) 이 페이지에 나온 습관 제목 / 사진 URL 을 IN 쿼리 한 번씩으로
+    #    (듀얼이 끝나면 user_habits.duel_id 가 끊기므로 cert 의 user_habit_id 기준으로 조회)
+    habit_ids = {c.user_habit_id for c in certs if c.user_habit_id is not None}
+    habit_title_map: dict[int, str] = {}
+    if habit_ids:
+        habit_title_map = {
+            hid: title
+            for hid, title in (await db.execute(
+                select(UserHabit.id, UserHabit.title).where(UserHabit.id.in_(habit_ids))
+            )).all()
+        }
+
+    asset_ids = {c.photo_asset_id for c in certs if c.photo_asset_id is not None}
     asset_map: dict[int, str] = {}
-    asset_ids = [c.photo_asset_id for c in certs if c.photo_asset_id is not None]
     if asset_ids:
-        media_rows = (
-            db.query(MediaAsset)
-            .filter(MediaAsset.id.in_(asset_ids))
-            .all()
-        )
-        asset_map = {m.id: m.storage_url for m in media_rows}
-    
-    # 5) 남은 실패 가능 횟수 계산 (정책에 맞게 수정 가능)
-    #    예: 한 사람당 최대 3번까지 실패 가능이라고 가정
-    my_fail_count = sum(
-        1
-        for c in certs
-        if c.user_id == current_user.id and c.status == "fail"
-    )
+        asset_map = {
+            aid: url
+            for aid, url in (await db.execute(
+                select(MediaAsset.id, MediaAsset.storage_url).where(MediaAsset.id.in_(asset_ids))
+            )).all()
+        }
+
+    # 5) 남은 실패 가능 횟수 (Duel 의 카운터 사용)
+    if current_user.id == duel.owner_user_id:
+        my_fail_count = duel.owner_fail_cnt
+    else:
+        my_fail_count = duel.challenger_fail_cnt
     remain_fail_count = max(0, FAIL_LIMIT - my_fail_count)
 
     # 6) Certification -> DuelConversationMessage 변환
-    messages: list[DuelConversationMessage] = []
-    for c in certs:
-        habit_title = habit_title_map.get(c.user_habit_id or 0, "")
-
-        photo_url: str | None = None
-        if c.photo_asset_id is not None:
-            asset = db.get(MediaAsset, c.photo_asset_id)
-            if asset is not None:
-                photo_url = asset.storage_url
-                
-        messages.append(
-            DuelConversationMessage(
-                id=c.id,
-                user_id=c.user_id,
-                user_habit_id=c.user_habit_id,
-                duel_id=c.duel_id,
-                habit_title=habit_title,
-                method=c.method,
-                status=c.status,
-                fail_reason=c.fail_reason,
-                text_content=c.text_content,
-                photo_asset_id=c.photo_asset_id,
-                photo_url=photo_url,
-                ts_utc=c.ts_utc,
-            )
+    messages: list[DuelConversationMessage] = [
+        DuelConversationMessage(
+            id=c.id,
+            user_id=c.user_id,
+            user_habit_id=c.user_habit_id,
+            duel_id=c.duel_id,
+            habit_title=habit_title_map.get(c.user_habit_id or 0, ""),
+            method=c.method,
+            status=c.status,
+            fail_reason=c.fail_reason,
+            text_content=c.text_content,
+            photo_asset_id=c.photo_asset_id,
+            photo_url=asset_map.get(c.photo_asset_id) if c.photo_asset_id is not None else None,
+            ts_utc=c.ts_utc,
         )
+        for c in certs
+    ]
 
     # 7) 최종 응답 조립
     return DuelConversationOut(
@@ -721,4 +859,57 @@ def get_duel_conversation(
         partner_profile_picture=partner.profile_picture,
         remain_fail_count=remain_fail_count,
         messages=messages,
-    )
\ No newline at end of file
+        before_cursor=encode_cursor(certs[0].ts_utc, certs[0].id) if certs else before,
+        after_cursor=encode_cursor(certs[-1].ts_utc, certs[-1].id) if certs else after,
+        has_more=has_more,
+    )
+
+
+async def _load_duel_participants(duel_id: int) -> tuple[int, int] | None:
+    async with async_session() as db:
+        duel = await db.get(Duel, duel_id)
+        if duel is None:
+            return None
+        return duel.owner_user_id, duel.challenger_user_id
+
+
+@router.websocket("/{duel_id}/ws")
+async def duel_events_ws(
+    websocket: WebSocket,
+    duel_id: int,
+    token: str = Query(..., description="access token (브라우저 WebSocket 은 헤더를 못 붙여서 쿼리로 받음)"),
+):
+    """
+    해시톡방 실시간 이벤트 (conversation 폴링 대신 사용)
+    - {"type": "message", "duel_id", "message": DuelConversationMessage}
+    - {"type": "duel_finished", "duel_id", "status", "result"}
+    연결이 끊겼다가 다시 붙을 때는 conversation?since_id= 로 빠진 메시지를 채운다.
+    """
+    try:
+        user_id = decode_access_token(token)
+    except (JWTError, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    participants = await _load_duel_participants(duel_id)
+    if participants is None or user_id not in participants:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    sub = pubsub.subscribe(pubsub.duel_channel(duel_id))
+
+    async def _forward():
+        while True:
+            await websocket.send_json(await sub.get())
+
+    sender = asyncio.create_task(_forward())
+    try:
+        # 클라이언트가 보내는 건(ping 등) 무시, 연결이 끊기면 WebSocketDisconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        pubsub.unsubscribe(sub)
@@ -13,7 +13,6 @@ from app.models.habit import Habit
 from app.models.duel import Duel
 from app.models.user_habit import UserHabit
 from app.models.exchange import ExchangeRequest
-from app.models.notification import Notification
 
 from app.schemas.exchange import (
     ExchangeRequestCreate, 
@@ -25,6 +24,14 @@ from app.schemas.exchange import (
     )
 
 from app.routers.register import get_current_user  # 실제 경로에 맞게 수정
+from app.utils.calendar import count_scheduled_days, encode_weekdays
+from app.utils.deadline_wheel import deadline_wheel
+from app.utils.farmer_cards import get_farmer_cards
+from app.utils.habit_stats import apply_habit_stat_change, habit_stat_state
+from app.utils.home_summary import invalidate_home_summary
+from app.utils.notifications import create_notification, notification_dedup_key
+from app.utils.wallet import apply_hb_delta
+from app.utils.principal import Principal
 
 router = APIRouter(
     prefix="/exchange-requests",
@@ -32,42 +39,6 @@ router = APIRouter(
 )
 
 
-def _encode_days_of_week(weekdays: List[int]) -> int:
-    """
-    [1,3,5] -> 비트마스크 정수.
-    1=월, ... , 7=일
-    """
-    mask = 0
-    for d in weekdays:
-        if 1 <= d <= 7:
-            mask |= (1 << (d - 1))
-    return mask
-
-def _create_notification(
-    db: Session,
-    user_id: int,
-    noti_type: str,
-    title: str,
-    body: str = "",
-    deeplink: str | None = None,
-):
-    """
-    공통 알림 생성 헬퍼.
-    - noti_type: "challenge", "challenge_rejected", "challenge_accepted", "system" 등 문자열 정책은 자유.
-    """
-    now = datetime.now(timezone.utc)
-    
-    n = Notification(
-        user_id=user_id,
-        type=noti_type,
-        title=title,
-        body=body,
-        is_read=False,
-        deeplink=deeplink,
-        created_at=now,
-    )
-    db.add(n)
-    
 @router.post(
     "",
     response_model=ExchangeRequestOut,
@@ -76,7 +47,7 @@ def _create_notification(
 def create_exchange_request(
     payload: ExchangeRequestCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
 
     """
@@ -115,7 +86,7 @@ def create_exchange_request(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="요일 값은 1(월)~7(일) 범위여야 합니다.",
         )
-    days_mask = _encode_days_of_week(weekdays)
+    days_mask = encode_weekdays(weekdays)
 
     # 3) 기간 검증 (프론트에서 계산해서 줌, 그래도 한 번 체크)
     if payload.start_date > payload.end_date:
@@ -123,6 +94,11 @@ def create_exchange_request(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="시작일이 종료일보다 늦을 수 없습니다.",
         )
+    if count_scheduled_days(days_mask, payload.start_date, payload.end_date) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="기간 안에 인증하는 요일이 하루도 없습니다.",
+        )
 
     # 4) 난이도 / 인증 방식 검증 (프론트 값 범위만 체크)
     if not (1 <= payload.difficulty <= 5):
@@ -137,21 +113,13 @@ def create_exchange_request(
         )
         
     sender = db.get(User, current_user.id)
-    # 4-1) 현재 가진 해시로 이 난이도를 감당 가능한지 체크
+    # 4-1) 보내는 사람 확인 (해시 잔액은 요청 생성 후 차감하면서 확인)
     if sender is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="사용자 정보를 찾을 수 없습니다.",
         )
 
-    if sender.hb_balance < payload.difficulty:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="해시가 부족해서 이 난이도로 내기를 걸 수 없습니다.",
-        )
-    
-    sender.hb_balance -= payload.difficulty
-    
     # 5) 같은 사람 → 같은 사람, 같은 습관, pending 중복 요청 방지
     exists = db.scalar(
         select(ExchangeRequest.id).where(
@@ -186,19 +154,30 @@ def create_exchange_request(
     )
 
     db.add(req)
+    db.flush()
+
+    # 6-1) 도전장 보낼 때 난이도만큼 해시 선차감 (잔액 부족이면 요청도 같이 취소)
+    if not apply_hb_delta(db, current_user.id, -payload.difficulty, "exchange_stake", "exchange_requests", req.id):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="해시가 부족해서 이 난이도로 내기를 걸 수 없습니다.",
+        )
+
     db.commit()
     db.refresh(req)
     
     sender = db.get(User, current_user.id)
     habit_title = habit.title
     
-    _create_notification(
+    create_notification(
         db=db,
         user_id=to_user_id,
         noti_type="challenge",
         title=f"{sender.nickname or sender.name} 농부가 도전장을 보냈어요.",
         body=habit_title,
         deeplink=f"/exchange-requests/received",
+        dedup_key=notification_dedup_key("exchange", req.id),
     )
     
     db.commit()
@@ -208,7 +187,7 @@ def create_exchange_request(
 @router.get("/received", response_model=List[ReceivedExchangeItem])
 def get_received_exchange_requests(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     stmt = (
         select(ExchangeRequest, User, Habit, UserHabit)
@@ -260,36 +239,28 @@ def get_received_exchange_requests(
 def get_completed_hashes_for_exchange(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    rows = (
-        db.query(UserHabit)
-        .filter(
-            UserHabit.user_id == user_id,
-            UserHabit.status == "completed_success",
-        )
-        .all()
-    )
-
-    result = []
-    for uh in rows:
-        if uh.source_habit_id is None:
-            continue
-
-        result.append({
-            "user_habit_id": uh.id,
-            "hash_id": uh.source_habit_id,   # Habit.id
-            "title": uh.title,
-            "difficulty": uh.difficulty
-        })
-
-    return result
+    # 완료 습관 목록은 농부 카드 캐시에서 (감자캐기 화면과 같은 데이터)
+    card = get_farmer_cards(db, [user_id]).get(user_id)
+    if card is None:
+        return []
+
+    return [
+        {
+            "user_habit_id": h.user_habit_id,
+            "hash_id": h.hash_id,   # Habit.id
+            "title": h.title,
+            "difficulty": h.difficulty
+        }
+        for h in card.hashes
+    ]
 
 @router.post("/{request_id}/reject", status_code=status.HTTP_204_NO_CONTENT)
 def reject_exchange_request(
     request_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # 1) 요청 조회
     ex = db.get(ExchangeRequest, request_id)
@@ -324,9 +295,8 @@ def reject_exchange_request(
 
     now = datetime.now()
     stake = ex.difficulty
-    sender = db.get(User, ex.from_user_id)
-    if sender is not None:
-        sender.hb_balance += stake
+    # 선차감했던 스테이크 돌려주기
+    apply_hb_delta(db, ex.from_user_id, stake, "exchange_refund", "exchange_requests", ex.id)
 
     # 4) 송강호(= from_user) 혼자 도전용 UserHabit 생성
     solo_habit = UserHabit(
@@ -345,6 +315,8 @@ def reject_exchange_request(
         duel_id=None,
     )
     db.add(solo_habit)
+    apply_habit_stat_change(db, habit.id, habit_stat_state(None), habit_stat_state(solo_habit))
+    invalidate_home_summary(db, ex.from_user_id)
 
     # 5) 교환 요청은 아예 삭제
     db.delete(ex)
@@ -352,16 +324,18 @@ def reject_exchange_request(
     rejector = db.get(User, current_user.id)
     habit_title = display_title
     
-    _create_notification(
+    create_notification(
         db=db,
         user_id=ex.from_user_id,               # 도전장을 보낸 사람
         noti_type="challenge_rejected",
         title=f"{rejector.nickname or rejector.name} 농부가 도전장을 거절했어요.",
         body=habit_title,
         deeplink="/exchange-requests/sent",    # 보낸 사람이 보는 화면 (원하면 바꿔)
+        dedup_key=notification_dedup_key("exchange_rejected", ex.id),
     )
 
     db.commit()
+    deadline_wheel.track(solo_habit)
     return
 
 # @router.post("/{request_id}/accept", status_code=status.HTTP_204_NO_CONTENT)
@@ -369,7 +343,7 @@ def reject_exchange_request(
 #     request_id: int,
 #     body: ExchangeAcceptIn,
 #     db: Session = Depends(get_db),
-#     current_user: User = Depends(get_current_user),
+#     current_user: Principal = Depends(get_current_user),
 # ):
 #     ex = db.get(ExchangeRequest, request_id)
 #     if not ex:
@@ -448,7 +422,7 @@ def reject_exchange_request(
 #     deeplink = f"/duels/{duel.id}"
 
 #     # 1) 도전 받은 사람에게: "OOO 농부와 내기가 성립되었어요."
-#     _create_notification(
+#     create_notification(
 #         db=db,
 #         user_id=owner_user.id,
 #         noti_type="challenge_accepted",
@@ -458,7 +432,7 @@ def reject_exchange_request(
 #     )
     
 #     # 2) 도전 건 사람에게도 같은 취지 알림
-#     _create_notification(
+#     create_notification(
 #         db=db,
 #         user_id=challenger_user.id,
 #         noti_type="challenge_accepted",
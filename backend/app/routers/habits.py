@@ -1,20 +1,45 @@
 # app/routers/habits.py
+import re
 from typing import List, Optional
 from datetime import datetime, date, timedelta, timezone
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from sqlalchemy import and_, func, literal, or_, select, union_all, update
+from sqlalchemy.dialects.mysql import match as mysql_match
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
 from app.models.user import User
 from app.models.user_habit import UserHabit
-from app.models.habit import Habit
+from app.models.habit import Habit, HabitStat
 from app.models.certification import Certification 
-from app.schemas.habit import HabitSearchItemOut, HabitCreateIn, CompletedHabitItemOut
+from app.schemas.habit import HabitSearchItemOut, HabitCreateIn, CompletedHabitItemOut, HabitTemplateOut
 from app.routers.register import get_current_user
+from app.utils.calendar import count_scheduled_days_many, count_scheduled_hits_many
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.deadline_wheel import deadline_wheel
+from app.utils.farmer_cards import invalidate_farmer_card
+from app.utils.habit_stats import (
+    apply_habit_stat_change,
+    apply_habit_stat_changes,
+    clamp_difficulty,
+    habit_stat_state,
+    median_difficulty,
+)
+from app.utils.home_summary import invalidate_home_summary
+from app.utils.principal import Principal
 
 router = APIRouter(prefix="/habits", tags=["Habits"])
 
+KST = timezone(timedelta(hours=9))
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_NGRAM_SIZE = 2          # MySQL ngram_token_size (기본 2) 보다 짧은 검색어는 접두 검색으로
+SEARCH_PREFIX_BONUS = 100.0    # 제목이 검색어로 시작하면 관련도에 더해서 위로 올림
+_FULLTEXT_OPERATORS = re.compile(r'[+\-<>()~*"@]')   # BOOLEAN MODE 연산자는 검색어에서 제거
+EVALUATE_BATCH_SIZE = 500
+SUCCESS_RATIO = 0.7            # 인증해야 하는 날 중 이 비율 이상 성공하면 completed_success
+
 
 def get_db():
     db = SessionLocal()
@@ -23,103 +48,141 @@ def get_db():
     finally:
         db.close()
 
-def _iter_scheduled_dates(user_habit: UserHabit):
-    """
-    이 UserHabit이 실제로 인증해야 하는 '날짜들'을 모두 생성해주는 제너레이터.
-    days_of_week는 1~7(월~일) 비트마스크라고 가정.
+def evaluate_due_habits(
+    db: Session,
+    now_utc: datetime,
+    user_id: int | None = None,
+    batch_size: int = EVALUATE_BATCH_SIZE,
+    success_ratio: float = SUCCESS_RATIO,
+) -> tuple[int, int]:
     """
-    if not user_habit.period_start or not user_habit.period_end:
-        return
-
-    mask = user_habit.days_of_week or 0
-    cur = user_habit.period_start
-    last = user_habit.period_end
-
-    # SQLAlchemy Date → Python date 라고 가정
-    while cur <= last:
-        # isoweekday(): 월=1, ..., 일=7
-        w = cur.isoweekday()
-        if mask & (1 << (w - 1)):
-            yield cur
-        cur += timedelta(days=1)
-
-def _evaluate_single_habit(db: Session, habit: UserHabit, now_utc: datetime, success_ratio: float = 0.7):
+    도전 기간(period_end, KST)이 끝난 active 습관들을 인증 성공률로 completed_success / completed_fail 정산.
+    - id 순으로 batch_size 개씩: 습관 조회 1번 + 성공 인증 날짜 조회 1번 + 상태별 UPDATE 1번씩 → 배치마다 commit
+    - 성공률 = 인증해야 하는 요일에 성공한 날 수 / 인증해야 하는 날 수 (success_ratio 이상이면 성공)
+    - 듀얼 습관은 듀얼 정산(settle_due_duels)에서 끝내므로 제외
+    - user_id 를 주면 그 유저 습관만 (POST /habits/evaluate)
+    - 스케줄러와 /habits/evaluate 가 같은 습관을 동시에 정산할 수 있으므로
+      habit_stats / 카드 캐시 / 반환 개수는 이 호출의 UPDATE 가 실제로 바꾼 습관만 반영
+    반환값: (성공 처리 수, 실패 처리 수)
     """
-    하나의 UserHabit에 대해, 도전 기간이 끝났다면
-    인증 성공률을 계산해서 completed_success / completed_fail 로 바꿔준다.
-    """
-
-    # 이미 끝난 습관은 건드리지 않음
-    if habit.status != "active":
-        return
-
-    if habit.period_end is None or habit.period_start is None:
-        return
-
-    # 한국 시간 기준 오늘 > period_end 일 때만 평가
-    KST = timezone(timedelta(hours=9))
-    now_kst = now_utc.astimezone(KST)
-
-    if now_kst.date() <= habit.period_end:
-        # 아직 도전 기간이 안 끝났음
-        return
-
-    # 1) 원래 인증해야 하는 날짜 목록
-    scheduled_dates = list(_iter_scheduled_dates(habit))
-
-    if not scheduled_dates:
-        # 인증해야 할 날이 없다면 실패로 처리 (혹은 그냥 무시도 가능)
-        habit.status = "completed_fail"
-        habit.completed_at = now_utc
-        return
-
-    # 2) 해당 기간 동안의 성공 인증 가져오기
-    #    (KST 기준 날짜 범위를 UTC로 변환해서 조회)
-    first_day = scheduled_dates[0]
-    last_day = scheduled_dates[-1]
-
-    start_kst = datetime(first_day.year, first_day.month, first_day.day, tzinfo=KST)
-    end_kst = datetime(last_day.year, last_day.month, last_day.day, tzinfo=KST) + timedelta(days=1)
-
-    start_utc = start_kst.astimezone(timezone.utc)
-    end_utc = end_kst.astimezone(timezone.utc)
-
-    certs = (
-        db.query(Certification)
-        .filter(
-            Certification.user_id == habit.user_id,
-            Certification.user_habit_id == habit.id,
-            Certification.status == "success",
-            Certification.ts_utc >= start_utc,
-            Certification.ts_utc < end_utc,
+    today_kst = now_utc.astimezone(KST).date()
+    # DATETIME 은 초 단위까지만 저장되므로 맞춰 둠 (바뀐 습관을 completed_at 으로 다시 찾음)
+    now_utc = now_utc.replace(microsecond=0)
+
+    success_total = 0
+    fail_total = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                UserHabit.id,
+                UserHabit.user_id,
+                UserHabit.source_habit_id,
+                UserHabit.days_of_week,
+                UserHabit.period_start,
+                UserHabit.period_end,
+                UserHabit.difficulty,
+                UserHabit.is_active,
+            )
+            .where(
+                UserHabit.status == "active",
+                UserHabit.period_end < today_kst,
+                UserHabit.duel_id.is_(None),
+                UserHabit.id > last_id,
+            )
+            .order_by(UserHabit.id)
+            .limit(batch_size)
         )
-        .all()
-    )
-
-    # 성공한 '날짜'만 추려서 집합으로 (중복 인증 방지)
-    success_dates = set()
-    for c in certs:
-        d = c.ts_utc.astimezone(KST).date()
-        success_dates.add(d)
-
-    # 3) 실제로 잘 지킨 날: 원래 인증해야 하는 날 중, success_dates에 포함된 날짜
-    total_slots = len(scheduled_dates)
-    done_slots = sum(1 for d in scheduled_dates if d in success_dates)
-
-    ratio = done_slots / total_slots if total_slots > 0 else 0.0
+        if user_id is not None:
+            stmt = stmt.where(UserHabit.user_id == user_id)
+        habits = db.execute(stmt).all()
+        if not habits:
+            break
+        last_id = habits[-1].id
+
+        # 배치 전체의 기간 내 성공 인증 날짜 (cert_date 는 KST 기준, 습관당 하루 1건)
+        success_dates: dict[int, list[date]] = {}
+        for habit_id, cert_date in db.execute(
+            select(Certification.user_habit_id, Certification.cert_date)
+            .join(UserHabit, UserHabit.id == Certification.user_habit_id)
+            .where(
+                Certification.user_habit_id.in_([h.id for h in habits]),
+                Certification.status == "success",
+                Certification.cert_date >= UserHabit.period_start,
+                Certification.cert_date <= UserHabit.period_end,
+            )
+        ).all():
+            success_dates.setdefault(habit_id, []).append(cert_date)
 
-    if ratio >= success_ratio and done_slots > 0:
-        habit.status = "completed_success"
-    else:
-        habit.status = "completed_fail"
+        # 인증해야 하는 날 수 / 그중 성공한 날 수 (요일 비트마스크로 계산)
+        total_slots = count_scheduled_days_many(
+            (h.days_of_week or 0, h.period_start, h.period_end) for h in habits
+        )
+        done_slots = count_scheduled_hits_many(
+            (h.days_of_week or 0, h.period_start, h.period_end, success_dates.get(h.id, ()))
+            for h in habits
+        )
 
-    habit.completed_at = now_utc
+        success_ids: list[int] = []
+        fail_ids: list[int] = []
+        for h, total, done in zip(habits, total_slots, done_slots):
+            # 인증해야 할 날이 없다면 실패로 처리
+            ok = total > 0 and done > 0 and done / total >= success_ratio
+            (success_ids if ok else fail_ids).append(h.id)
+
+        changed: dict[str, set[int]] = {}
+        for ids, new_status in ((success_ids, "completed_success"), (fail_ids, "completed_fail")):
+            if not ids:
+                continue
+            result = db.execute(
+                update(UserHabit)
+                .where(UserHabit.id.in_(ids), UserHabit.status == "active")
+                .values(status=new_status, completed_at=now_utc)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == len(ids):
+                changed[new_status] = set(ids)
+            else:
+                # 일부는 다른 정산이 먼저 바꿈 → 이 UPDATE 가 바꾼 것만 다시 찾음
+                changed[new_status] = set(
+                    db.scalars(
+                        select(UserHabit.id).where(
+                            UserHabit.id.in_(ids),
+                            UserHabit.status == new_status,
+                            UserHabit.completed_at == now_utc,
+                        )
+                    ).all()
+                )
+        succeeded = changed.get("completed_success", set())
+        failed = changed.get("completed_fail", set())
+
+        stat_changes = []
+        for h in habits:
+            if h.id not in succeeded and h.id not in failed:
+                continue
+            difficulty = clamp_difficulty(h.difficulty)
+            before = ("active" if h.is_active else None, difficulty)
+            after = ("completed" if h.id in succeeded else None, difficulty)
+            stat_changes.append((h.source_habit_id, before, after))
+        apply_habit_stat_changes(db, stat_changes)
+
+        # 완료 습관 목록이 바뀌므로 농부 카드 캐시 무효화 (commit 후)
+        for owner_id in {h.user_id for h in habits if h.id in succeeded}:
+            invalidate_farmer_card(db, owner_id)
+        db.commit()
+
+        success_total += len(succeeded)
+        fail_total += len(failed)
+        if len(habits) < batch_size:
+            break
+
+    return success_total, fail_total
 
 @router.post("", response_model=HabitSearchItemOut)
 def create_habit(
     body: HabitCreateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
  
     # 1) source_habit_id 처리
@@ -160,8 +223,12 @@ def create_habit(
     )
 
     db.add(new_user_habit)
+    db.flush()  # status / is_active 기본값 채움
+    apply_habit_stat_change(db, source_habit_id, habit_stat_state(None), habit_stat_state(new_user_habit))
+    invalidate_home_summary(db, current_user.id)
     db.commit()
     db.refresh(new_user_habit)
+    deadline_wheel.track(new_user_habit)
 
     # 3) 응답: 검색용 DTO 포맷 재사용
     return HabitSearchItemOut(
@@ -181,7 +248,7 @@ def update_habit(
     user_habit_id: int,
     body: HabitCreateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     내가 만든 습관(UserHabit) 수정하기
@@ -216,6 +283,7 @@ def update_habit(
         )
 
     # 3) 필드 수정 (생성과 동일한 필드들)
+    stat_before = habit_stat_state(user_habit)
     user_habit.title         = body.title
     user_habit.method        = body.method
     user_habit.days_of_week  = body.days_of_week
@@ -223,12 +291,15 @@ def update_habit(
     user_habit.period_end    = body.period_end
     user_habit.deadline_local = body.deadline_local
     user_habit.difficulty    = body.difficulty
+    apply_habit_stat_change(db, user_habit.source_habit_id, stat_before, habit_stat_state(user_habit))
+    invalidate_home_summary(db, current_user.id)
 
     # 필요하다면 updated_at 컬럼이 있다면 여기서 갱신
     # user_habit.updated_at = datetime.utcnow()
 
     db.commit()
     db.refresh(user_habit)
+    deadline_wheel.track(user_habit)   # 마감시간/요일이 바뀌었을 수 있으니 버킷 재배치
 
     # 4) 응답 DTO (생성 때와 동일한 포맷)
     return HabitSearchItemOut(
@@ -243,35 +314,90 @@ def update_habit(
         deadline_local=user_habit.deadline_local,
     )
 
+def _title_search(db: Session, q: str, title_col=UserHabit.title, id_col=UserHabit.id):
+    """
+    제목 검색 결과 서브쿼리 (id, score).
+    - MySQL 이고 검색어가 2글자 이상: ngram FULLTEXT (MATCH ... AGAINST) 결과와 접두 일치(LIKE 'q%') 결과를 UNION ALL
+      → 각각 FULLTEXT 인덱스 / 제목 인덱스를 타고, id 별로 합쳐서 score = 관련도 + 접두 일치 보너스
+      (OR 로 한 WHERE 에 묶으면 두 인덱스 모두 못 타고 풀 스캔이 됨)
+    - 1글자 또는 MySQL 이 아니면: 접두 일치만, 점수는 0
+    - title_col / id_col: user_habits.title / id (기본) 또는 habit_stats.title / habit_id
+    """
+    # LIKE 패턴은 파이썬에서 완성해서 넘김 (CONCAT(?, '%') 이면 인덱스 범위 검색이 안 될 수 있음)
+    pattern = q.replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+    prefix = select(id_col.label("id"), literal(0.0).label("score")).where(
+        title_col.like(pattern, escape="/")
+    )
+
+    terms = _FULLTEXT_OPERATORS.sub(" ", q).strip()
+    if db.get_bind().dialect.name != "mysql" or len(terms) < SEARCH_NGRAM_SIZE:
+        return prefix.subquery()
+
+    relevance = mysql_match(title_col, against=terms).in_boolean_mode()
+    hits = union_all(
+        select(id_col.label("id"), relevance.label("score")).where(relevance),
+        prefix.with_only_columns(id_col.label("id"), literal(SEARCH_PREFIX_BONUS).label("score")),
+    ).subquery()
+    return (
+        select(hits.c.id, func.sum(hits.c.score).label("score"))
+        .group_by(hits.c.id)
+        .subquery()
+    )
+
+
 @router.get("/search", response_model=List[HabitSearchItemOut])
 def search_habits(
+    response: Response,
     q: Optional[str] = Query(None, description="검색어(습관 제목)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     다른 사람들의 활성 습관 검색.
     - 내 습관은 기본적으로 제외
     - 난이도(difficulty) 포함해서 내려줌
+    - q 가 있으면 관련도 순 (제목이 q 로 시작하면 위로), 없으면 최신 등록 순
+    - keyset 페이지네이션: 다음 페이지 cursor 는 X-Next-Cursor 응답 헤더 (마지막 페이지면 없음)
     """
-
-    query = (
-        db.query(UserHabit, User)
-        .join(User, UserHabit.user_id == User.id)
-        .filter(
+    q = (q or "").strip()
+    if q:
+        hits = _title_search(db, q)
+        score = hits.c.score
+    else:
+        hits = None
+        score = literal(0.0)
+
+    stmt = select(UserHabit, User, score.label("score"))
+    if hits is not None:
+        stmt = stmt.join(hits, hits.c.id == UserHabit.id)
+    stmt = (
+        stmt.join(User, UserHabit.user_id == User.id)
+        .where(
             UserHabit.is_active == True,
             UserHabit.duel_id.is_(None),          # 기본적으로 '혼자 습관' 검색
-            UserHabit.user_id != current_user.id  # 내 습관 제외
+            UserHabit.user_id != current_user.id,  # 내 습관 제외
         )
     )
+    if cursor is not None:
+        last_score, last_id = decode_cursor(cursor, float, int)
+        stmt = stmt.where(
+            or_(
+                score < last_score,
+                and_(score == last_score, UserHabit.id < last_id),
+            )
+        )
 
-    if q:
-        query = query.filter(UserHabit.title.contains(q))
-
-    rows = query.all()
+    rows = db.execute(
+        stmt.order_by(score.desc(), UserHabit.id.desc()).limit(limit + 1)
+    ).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(float(rows[-1].score), rows[-1][0].id)
 
     results: List[HabitSearchItemOut] = []
-    for user_habit, owner in rows:
+    for user_habit, owner, _ in rows:
         results.append(
             HabitSearchItemOut(
                 user_habit_id=user_habit.id,
@@ -288,10 +414,60 @@ def search_habits(
 
     return results
 
+@router.get("/templates", response_model=List[HabitTemplateOut])
+def list_habit_templates(
+    response: Response,
+    q: Optional[str] = Query(None, description="검색어(템플릿 제목)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    습관 템플릿 둘러보기 / 검색.
+    - 같은 템플릿을 여러 명이 하고 있어도 한 번만 (habit_stats 한 테이블에서 조회)
+    - 인기순 (진행 중 + 성공 완료 유저 수), 아무도 안 하는 템플릿은 제외
+    - q 가 있으면 제목으로 거름 (/habits/search 와 같은 규칙)
+    - keyset 페이지네이션: 다음 페이지 cursor 는 X-Next-Cursor 응답 헤더 (마지막 페이지면 없음)
+    """
+    stmt = select(HabitStat).where(HabitStat.popularity > 0)
+
+    q = (q or "").strip()
+    if q:
+        hits = _title_search(db, q, HabitStat.title, HabitStat.habit_id)
+        stmt = stmt.join(hits, hits.c.id == HabitStat.habit_id)
+
+    if cursor is not None:
+        last_popularity, last_id = decode_cursor(cursor, int, int)
+        stmt = stmt.where(
+            or_(
+                HabitStat.popularity < last_popularity,
+                and_(HabitStat.popularity == last_popularity, HabitStat.habit_id < last_id),
+            )
+        )
+
+    stats = db.scalars(
+        stmt.order_by(HabitStat.popularity.desc(), HabitStat.habit_id.desc()).limit(limit + 1)
+    ).all()
+    if len(stats) > limit:
+        stats = stats[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(stats[-1].popularity, stats[-1].habit_id)
+
+    return [
+        HabitTemplateOut(
+            habit_id=stat.habit_id,
+            title=stat.title,
+            active_count=stat.active_cnt,
+            completed_count=stat.completed_cnt,
+            median_difficulty=median_difficulty(stat),
+        )
+        for stat in stats
+    ]
+
 @router.get("/me/completed", response_model=List[CompletedHabitItemOut])
 def get_my_completed_habits(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     마이페이지 - 완료된 습관 리스트 조회
@@ -332,44 +508,18 @@ def get_my_completed_habits(
 @router.post("/evaluate", summary="기간이 끝난 내 습관들을 성공/실패로 정산")
 def evaluate_my_habits(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
-    - status = 'active' 이고
-    - period_end 가 지난 습관들에 대해
-      성공/실패를 판정해서 status와 completed_at을 갱신한다.
+    정산은 스케줄러(evaluate_due_habits)가 주기적으로 하고,
+    여기서는 아직 정산 안 된 내 습관만 같은 방식으로 바로 정산한다 (습관 수와 상관없이 쿼리 몇 번).
+    - evaluated: 이번 호출에서 정산한 습관 수
     """
     now_utc = datetime.now(timezone.utc)
-
-    # 아직 active 상태인 내 습관들만
-    habits = (
-        db.query(UserHabit)
-        .filter(
-            UserHabit.user_id == current_user.id,
-            UserHabit.status == "active",
-            UserHabit.period_end != None,
-        )
-        .all()
-    )
-
-    success_count = 0
-    fail_count = 0
-
-    for h in habits:
-        before = h.status
-        _evaluate_single_habit(db, h, now_utc)
-        after = h.status
-
-        if before != after:
-            if after == "completed_success":
-                success_count += 1
-            elif after == "completed_fail":
-                fail_count += 1
-
-    db.commit()
+    success_count, fail_count = evaluate_due_habits(db, now_utc, user_id=current_user.id)
 
     return {
-        "evaluated": len(habits),
+        "evaluated": success_count + fail_count,
         "success_updated": success_count,
         "fail_updated": fail_count,
     }
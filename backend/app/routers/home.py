@@ -1,147 +1,166 @@
 # app/routers/home.py
+import time as time_mod
 from datetime import datetime, date, time, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 
-from app.database import SessionLocal
-from app.models.user import User
+from app.database import get_async_db
 from app.models.user_habit import UserHabit
 from app.models.duel import Duel
 from app.models.certification import Certification
 from app.schemas.home import HomeSummaryOut, HomeHabitItemOut
 
-from app.routers.register import get_current_user
+from app.routers.register import get_current_user_async
+from app.utils import metrics
+from app.utils.calendar import count_scheduled_days, weekday_bit
+from app.utils.home_summary import home_summary_cache
+from app.utils.principal import Principal
 
 router = APIRouter(prefix="/home", tags=["Home"])
 
 
-# DB 세션 의존성
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/summary", response_model=HomeSummaryOut)
-def get_home_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_home_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
- 
+    """
+    홈 요약. 유저별 캐시(home_summary_cache) → 없으면 쿼리 3번(카운트 / 활성 습관 / 습관별 성공 일수)으로 계산
+    - progress: 기간 전체의 인증해야 하는 날 중 인증 성공한 날의 비율
+    - 소요시간은 metrics 의 home.summary (p50/p95), 캐시 히트율은 cache.home_summary.hit_ratio
+    - async 엔진 사용 → DB 응답을 기다리는 동안 워커 스레드를 잡지 않음
+    """
+    started = time_mod.perf_counter()
+
     # 1) 오늘 날짜 (UTC 기준) - 나중에 타임존 로직 필요하면 교체
     today: date = (datetime.utcnow() + timedelta(hours=9)).date()
 
+    cached = home_summary_cache.get(current_user.id)
+    if cached is not None and cached[0] == today:
+        summary = cached[1]
+    else:
+        summary = await _build_home_summary(db, current_user.id, today)
+        home_summary_cache.set(current_user.id, (today, summary))
+
+    metrics.observe("home.summary", time_mod.perf_counter() - started)
+    return summary
+
+
+async def _build_home_summary(db: AsyncSession, user_id: int, today: date) -> HomeSummaryOut:
     # 하루 시작/끝 (UTC 기준)
     start_utc = datetime.combine(today, time(0, 0, 0))
     end_utc = datetime.combine(today, time(23, 59, 59))
 
-    # 2) 오늘 인증 수 (success)
-    today_cert_count = (
-        db.query(Certification)
-        .filter(
-            Certification.user_id == current_user.id,
+    # 오늘 요일 비트 (월=1 ... 일=64)
+    mask = weekday_bit(today)
+
+    # ==========================================
+    # 2) 오늘 인증 수 (success) + 현재 진행 중인 결투 수 → 한 번에
+    # ==========================================
+    today_cert_count_q = (
+        select(func.count(Certification.id))  # pylint: disable=not-callable
+        .where(
+            Certification.user_id == user_id,
             Certification.status == "success",
             Certification.ts_utc >= start_utc,
             Certification.ts_utc <= end_utc,
         )
-        .count()
+        .scalar_subquery()
     )
-
-    # 3) 현재 진행 중인 결투 수
-    current_duel_count = (
-        db.query(Duel)
-        .filter(
+    current_duel_count_q = (
+        select(func.count(Duel.id))  # pylint: disable=not-callable
+        .where(
             Duel.status == "active",
             Duel.start_date <= today,
             Duel.end_date >= today,
             or_(
-                Duel.owner_user_id == current_user.id,
-                Duel.challenger_user_id == current_user.id,
+                Duel.owner_user_id == user_id,
+                Duel.challenger_user_id == user_id,
             ),
         )
-        .count()
-    )
-
-    # 4) 혼자 습관 수 (듀얼에 속하지 않은, 활성 습관 전체 개수)
-    solo_q = (
-        db.query(UserHabit)
-        .filter(
-            UserHabit.user_id == current_user.id,
-            UserHabit.is_active == True,
-            UserHabit.duel_id.is_(None),
-        )
+        .scalar_subquery()
     )
-    solo_habit_count = solo_q.count()
+    today_cert_count, current_duel_count = (
+        await db.execute(select(today_cert_count_q, current_duel_count_q))
+    ).one()
 
     # ==========================================
-    # 5) 오늘 해야 하는 "혼자" 습관 목록 ( _seedToday 대응 )
+    # 3) 활성 습관 전체 (혼자 + 듀얼) 한 번에 읽어서 나눔
+    #    - 혼자 습관 수: 듀얼에 속하지 않은 활성 습관 전체 개수
+    #    - 오늘 해야 하는 "혼자" 습관 ( _seedToday 대응 )
+    #    - 오늘 기준 진행 중인 "듀얼" 습관 ( _seedFighting 대응 )
     # ==========================================
-
-    # 요일 비트마스크 계산: 월=0 ~ 일=6
-    dow = today.weekday()
-    
-    dow_for_bit = (dow) % 7
-    mask = 1 << dow_for_bit
-
-    solo_today = (
-        solo_q.filter(
-            UserHabit.period_start <= today,
-            UserHabit.period_end >= today,
-            # days_of_week 비트마스크에 오늘 요일이 포함된 것만
-            (UserHabit.days_of_week.op("&")(mask)) != 0,
+    rows = (await db.execute(
+        select(
+            UserHabit.id,
+            UserHabit.title,
+            UserHabit.method,
+            UserHabit.deadline_local,
+            UserHabit.days_of_week,
+            UserHabit.period_start,
+            UserHabit.period_end,
+            UserHabit.duel_id,
+            Duel.status.label("duel_status"),
+            Duel.start_date.label("duel_start"),
+            Duel.end_date.label("duel_end"),
+            Duel.days_of_week.label("duel_days"),
         )
-        .all()
-    )
-
-    today_habits: list[HomeHabitItemOut] = [
-        HomeHabitItemOut(
-            user_habit_id=h.id,
-            title=h.title,
-            method=h.method,           # "photo" / "text"
-            deadline_local=h.deadline_local,
-            progress=0.0,              # 나중에 인증 비율 계산해서 넣어도 됨
+        .outerjoin(Duel, UserHabit.duel_id == Duel.id)
+        .where(
+            UserHabit.user_id == user_id,
+            UserHabit.is_active == True,
         )
-        for h in solo_today
-    ]
+        .order_by(UserHabit.id)
+    )).all()
 
     # ==========================================
-    # 6) 오늘 기준 진행 중인 "듀얼" 습관 목록 ( _seedFighting 대응 )
+    # 4) 습관별 인증 성공한 날 수 (기간 안, 하루 1건 유니크) → 그룹 COUNT 한 번
     # ==========================================
-
-    duel_rows = (
-        db.query(UserHabit, Duel)
-        .join(Duel, UserHabit.duel_id == Duel.id)
-        .filter(
-            UserHabit.user_id == current_user.id,
-            UserHabit.is_active == True,
-            Duel.status == "active",
-            Duel.start_date <= today,
-            Duel.end_date >= today,
-            or_(
-                Duel.owner_user_id == current_user.id,
-                Duel.challenger_user_id == current_user.id,
-            ),
-            # 듀얼 요일 비트마스크로 오늘 포함 여부 체크
-            (Duel.days_of_week.op("&")(mask)) != 0,
-        )
-        .all()
-    )
-
-    fighting_habits: list[HomeHabitItemOut] = [
-        HomeHabitItemOut(
-            user_habit_id=uh.id,
-            # 타이틀은 유저 습관 제목을 기준으로 사용 (필요하면 duel.habit_title로 변경 가능)
-            title=uh.title,
-            method=uh.method,
-            deadline_local=uh.deadline_local,
-            progress=0.0,
+    success_days = dict(
+        (await db.execute(
+            select(Certification.user_habit_id, func.count(Certification.id))  # pylint: disable=not-callable
+            .join(UserHabit, UserHabit.id == Certification.user_habit_id)
+            .where(
+                Certification.user_id == user_id,
+                Certification.user_habit_id.in_([r.id for r in rows]),
+                Certification.status == "success",
+                Certification.cert_date >= UserHabit.period_start,
+                Certification.cert_date <= UserHabit.period_end,
+            )
+            .group_by(Certification.user_habit_id)
+        )).all()
+    ) if rows else {}
+
+    solo_habit_count = 0
+    today_habits: list[HomeHabitItemOut] = []
+    fighting_habits: list[HomeHabitItemOut] = []
+    for r in rows:
+        # 인증해야 하는 날 수는 하루씩 세지 않고 요일 비트마스크로 계산
+        scheduled = count_scheduled_days(r.days_of_week or 0, r.period_start, r.period_end)
+        progress = min(1.0, success_days.get(r.id, 0) / scheduled) if scheduled else 0.0
+
+        item = HomeHabitItemOut(
+            user_habit_id=r.id,
+            # 듀얼 습관도 타이틀은 유저 습관 제목을 기준으로 사용
+            title=r.title,
+            method=r.method,           # "photo" / "text"
+            deadline_local=r.deadline_local,
+            progress=round(progress, 4),
         )
-        for uh, duel in duel_rows
-    ]
+        if r.duel_id is None:
+            solo_habit_count += 1
+            # days_of_week 비트마스크에 오늘 요일이 포함된 것만
+            if r.period_start <= today <= r.period_end and (r.days_of_week or 0) & mask:
+                today_habits.append(item)
+        elif (
+            r.duel_status == "active"
+            and r.duel_start <= today <= r.duel_end
+            # 듀얼 요일 비트마스크로 오늘 포함 여부 체크
+            and (r.duel_days or 0) & mask
+        ):
+            fighting_habits.append(item)
 
     # 최종 응답
     return HomeSummaryOut(
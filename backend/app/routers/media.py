@@ -6,10 +6,10 @@ from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
-from app.models.user import User
 from app.models.media import MediaAsset
 from app.schemas.media import MediaAssetOut
 from app.routers.register import get_current_user
+from app.utils.principal import Principal
 
 from fastapi.staticfiles import StaticFiles
 
@@ -28,7 +28,7 @@ def get_db():
 async def upload_media(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # 1) 파일 저장 경로 만들기
     os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -2,34 +2,40 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
-from typing import List, Literal
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, update
 
-from app.database import SessionLocal
+from app.database import get_async_db
 from app.models.notification import Notification
-from app.models.user import User
-from app.routers.register import get_current_user  
+from app.routers.register import get_current_user_async
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.notifications import bump_unread, get_unread_count, recount_unread
+from app.utils.principal import Principal
 
 router = APIRouter(
     prefix="/notifications",
     tags=["Notifications"],
 )
 
+NOTIFICATION_PAGE_SIZE = 30
+SEOUL = ZoneInfo("Asia/Seoul")
 
-# ==========================
-# DB 세션 의존성
-# ==========================
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# 모델의 type 값 → 프론트 pushType
+#   "challenge","challenge_accepted","challenge_rejected",
+#   "cert_success","cert_fail","dispute","system"
+_PUSH_TYPES = {
+    "challenge": "challenge",
+    "challenge_accepted": "challenge",
+    "challenge_rejected": "challenge",
+    "dispute": "challenge",
+    "cert_success": "certification",
+    "cert_fail": "certification",
+}
 
 
 # ==========================
@@ -42,27 +48,18 @@ def _map_notification_to_alarm_payload(n: Notification) -> dict:
     기대하는 payload 형식으로 변환해주는 함수.
     """
 
-    # 1) type → pushType 매핑
-    # 모델의 type 값:
-    #   "challenge","challenge_accepted","challenge_rejected",
-    #   "cert_success","cert_fail","dispute","system"
-    if n.type in ("challenge", "challenge_accepted", "challenge_rejected", "dispute"):
-        push_type = "challenge"
-    elif n.type in ("cert_success", "cert_fail"):
-        push_type = "certification"
-    else:  # "system" 또는 혹시 다른 값
-        push_type = "etc"
+    # 1) type → pushType 매핑 ("system" 또는 혹시 다른 값은 "etc")
+    push_type = _PUSH_TYPES.get(n.type, "etc")
 
     # 2) 날짜 문자열 만들기 (Asia/Seoul 기준, "YYYY. MM. DD" 포맷)
     date_text: str | None = None
     if n.created_at:
-        # created_at 컬럼이 timezone=True 이므로 astimezone 사용
-        try:
-            seoul_dt = n.created_at.astimezone(ZoneInfo("Asia/Seoul"))
-        except Exception:
-            # 혹시 naive datetime 이 저장되어 있으면 그냥 그대로 씀
-            seoul_dt = n.created_at
-        date_text = seoul_dt.strftime("%Y. %m. %d")
+        created_at = n.created_at
+        if created_at.tzinfo is None:
+            # MySQL DATETIME 은 tz 없이 돌아옴 (UTC 로 저장)
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        seoul = created_at.astimezone(SEOUL)
+        date_text = f"{seoul.year}. {seoul.month:02d}. {seoul.day:02d}"
 
     # 3) senderName 은 현재 Notification 모델에 없어서 일단 None 처리
     #    (나중에 필요하면 알림 생성 시 title/body 에 이름을 포함시키거나,
@@ -86,26 +83,40 @@ def _map_notification_to_alarm_payload(n: Notification) -> dict:
 
 # ==========================
 #  GET /notifications
-#   - 내 알림 전체 조회
-#   - 최신순 정렬
+#   - 내 알림 최신순, keyset 페이지네이션 (created_at, id)
 # ==========================
 @router.get("")
-def list_notifications(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def list_notifications(
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    limit: int = Query(NOTIFICATION_PAGE_SIZE, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
     """
-    로그인한 유저의 알림 목록을 최신순으로 반환.
+    로그인한 유저의 알림 목록을 최신순으로 limit 개씩 반환.
     프론트에서는 각 항목을 AlarmItem.fromPush 에 그대로 넣어서 사용 가능.
+    - 다음 페이지: next_cursor 를 cursor 로 넘김 (마지막 페이지면 null)
+    - (user_id, created_at, id) 인덱스를 타고 필요한 만큼만 읽음
     """
 
-    stmt = (
-        select(Notification)
-        .where(Notification.user_id == current_user.id)
-        .order_by(Notification.created_at.desc())
-    )
+    stmt = select(Notification).where(Notification.user_id == current_user.id)
+    if cursor is not None:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        stmt = stmt.where(
+            or_(
+                Notification.created_at < last_created_at,
+                and_(Notification.created_at == last_created_at, Notification.id < last_id),
+            )
+        )
 
-    notifications: list[Notification] = db.execute(stmt).scalars().all()
+    notifications: list[Notification] = (await db.execute(
+        stmt.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+    )).scalars().all()
+
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_cursor = encode_cursor(notifications[-1].created_at, notifications[-1].id)
 
     # 프론트용 payload 형태로 변환
     items = [_map_notification_to_alarm_payload(n) for n in notifications]
@@ -113,18 +124,32 @@ def list_notifications(
     return {
         "items": items,
         "count": len(items),
+        "next_cursor": next_cursor,
     }
 
 
+# ==========================
+#  GET /notifications/unread-count
+#   - 안 읽은 알림 수 (카운터 행 하나만 읽음)
+# ==========================
+@router.get("/unread-count")
+async def get_notification_unread_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    count = await db.run_sync(get_unread_count, current_user.id)
+    return {"unread_count": count}
+
+
 # ==========================
 #  PATCH /notifications/{noti_id}/read
 #   - 단일 알림 읽음 처리
 # ==========================
 @router.patch("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
-def mark_notification_read(
+async def mark_notification_read(
     notification_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
     """
     특정 알림을 읽음 처리(is_read=True).
@@ -137,7 +162,7 @@ def mark_notification_read(
             Notification.user_id == current_user.id,
         )
     )
-    noti: Notification | None = db.execute(stmt).scalar_one_or_none()
+    noti: Notification | None = (await db.execute(stmt)).scalar_one_or_none()
 
     if noti is None:
         raise HTTPException(
@@ -149,9 +174,16 @@ def mark_notification_read(
         # 이미 읽음이면 그냥 204 반환
         return
 
-    noti.is_read = True
-    db.add(noti)
-    db.commit()
+    # 동시에 두 번 읽음 처리돼도 카운터는 한 번만 줄도록 조건부 UPDATE
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.id == noti.id, Notification.is_read == False)  # noqa: E712
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        await db.run_sync(bump_unread, {current_user.id: -1})
+    await db.commit()
 
 
 # ==========================
@@ -159,12 +191,13 @@ def mark_notification_read(
 #   - 내 알림 전체 읽음 처리
 # ==========================
 @router.patch("/read-all", status_code=status.HTTP_204_NO_CONTENT)
-def mark_all_notifications_read(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def mark_all_notifications_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
     """
     현재 유저의 모든 알림 is_read=True 로 변경.
+    - 읽음 처리와 카운터 재계산을 한 트랜잭션에서 (commit 은 마지막에 한 번)
     """
 
     stmt = (
@@ -175,5 +208,6 @@ def mark_all_notifications_read(
         )
         .values(is_read=True)
     )
-    db.execute(stmt)
-    db.commit()
+    await db.execute(stmt)
+    await db.run_sync(recount_unread, current_user.id)
+    await db.commit()
@@ -1,69 +1,255 @@
 # backend/app/routers/potato.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-
-from app.database import get_db
-from app.models.user import User,Follow
-from app.routers.register import get_current_user # 네 프로젝트 구조에 맞게
-from app.routers.select_user import UserInfo 
-from app.schemas.potato import FarmerSummary
+from typing import List, Literal, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, case, func, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta, timezone
+
+from app.database import get_async_db, get_db
+from app.models.user import User, Follow, UserInterest
+from app.models.user_habit import UserHabit
+from app.routers.register import get_current_user, get_current_user_async # 네 프로젝트 구조에 맞게
+from app.schemas.potato import FarmerSummary, HashSummary
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.farmer_cards import get_farmer_cards
+from app.utils.principal import Principal
 
 router = APIRouter(prefix="/potato",tags=["Potato"])
 
+FARMERS_PAGE_SIZE = 50
+# sort=match 점수 가중치
+MATCH_SHARED_WEIGHT = 10    # 겹치는 관심사 1개당
+MATCH_FOLLOW_WEIGHT = 5     # 내가 팔로우 중인 농부
+MATCH_RECENT_DAYS = 30      # 최근 완료 습관을 세는 기간
+MATCH_RECENT_CAP = 5        # 최근 완료 습관은 최대 5점까지만
+
+async def _load_farmer_summaries(
+    db: AsyncSession,
+    user_ids: Sequence[int],
+    followed_ids: set[int],
+) -> list[FarmerSummary]:
+    """
+    유저 id 목록(페이지 순서) → FarmerSummary 목록.
+    닉네임/관심사/완료 습관은 농부 카드 캐시에서 (없는 것만 IN 쿼리로 한 번에 채움, 동기 헬퍼라 run_sync)
+    완료된 습관(원본 Habit 이 있는 것)이 하나도 없는 유저는 빠진다.
+    """
+    if not user_ids:
+        return []
+    cards = await db.run_sync(get_farmer_cards, user_ids)
+
+    farmers: list[FarmerSummary] = []
+    for user_id in user_ids:
+        card = cards.get(user_id)
+        if card is None or not card.hashes:
+            continue
+        farmers.append(
+            FarmerSummary(
+                user_id=card.user_id,
+                name=card.nickname,
+                bio=card.bio or "",
+                tags=card.tags,
+                avatar_url=card.avatar_url,
+                hashes=[
+                    HashSummary(
+                        hash_id=h.hash_id,
+                        title=h.title,
+                        difficulty=h.difficulty,
+                        deadline=h.deadline,
+                        cert_type=h.cert_type,
+                    )
+                    for h in card.hashes
+                ],
+                is_following=user_id in followed_ids,
+            )
+        )
+    return farmers
+
+
 @router.get("/farmers", response_model=List[FarmerSummary])
-def get_farmers(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_farmers(
+    response: Response,
+    sort: Literal["default", "match"] = Query("default", description="default: 가입순 / match: 나와 잘 맞는 순"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(FARMERS_PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
 ):
     """
     감자캐기 화면용: 나(current_user)를 제외한 다른 유저들을
     nickname/bio/관심사/만든 습관 목록 형태로 반환.
+    - keyset 페이지네이션: 다음 페이지 cursor 는 X-Next-Cursor 응답 헤더 (마지막 페이지면 없음)
+    - sort=match: 겹치는 관심사 수 / 팔로우 여부 / 최근 완료한 습관 수로 점수를 SQL 에서 계산해 정렬
+      (점수는 후보(관심사가 겹치거나 내가 팔로우 중인 유저)만 계산, 후보가 끝나면 나머지 유저를 가입순으로 이어서)
+    페이지 id 조회 + 팔로우 조회 + (캐시에 없는 농부 카드만) 카드 조회
     """
+    if sort == "match":
+        user_ids, next_cursor = await _match_page(db, current_user.id, cursor, limit)
+    else:
+        stmt = select(User.id).where(User.id != current_user.id, _has_completed(User.id))
+        if cursor is not None:
+            (last_id,) = decode_cursor(cursor, int)
+            stmt = stmt.where(User.id > last_id)
+        rows = (await db.scalars(stmt.order_by(User.id).limit(limit + 1))).all()
+        user_ids = rows[:limit]
+        next_cursor = encode_cursor(user_ids[-1]) if len(rows) > limit else None
 
-    # 1) 나를 제외한 활성 유저들 가져오기 (조건은 프로젝트 정책에 맞게 수정 가능)
-    users = db.scalars(
-        select(User).where(User.id != current_user.id)
-    ).all()
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    # 2) 내가 팔로우한 사람들 followee_id 집합
-    followed_ids = {
-        f.followee_id
-        for f in db.scalars(
-            select(Follow).where(Follow.follower_id == current_user.id)
-        ).all()
-    }
+    # 내가 팔로우한 사람들 중 이 페이지에 있는 followee_id 집합
+    followed_ids = set(
+        (await db.scalars(
+            select(Follow.followee_id).where(
+                Follow.follower_id == current_user.id,
+                Follow.followee_id.in_(user_ids),
+            )
+        )).all()
+    ) if user_ids else set()
 
-    farmers: list[FarmerSummary] = []
+    return await _load_farmer_summaries(db, user_ids, followed_ids)
 
-    for u in users:
-        ui = UserInfo(phone=u.phone)
-        info = ui.select_user()
 
-        # info가 None이면(전화번호로 조회 실패) 스킵
-        if not info:
-            continue
-        
-        # 완료된 습관이 하나도 없는 유저는 스킵
-        hashes = info.get("hashes") or []
-        if not hashes:
-            continue
-        
-        info["is_following"] = u.id in followed_ids
+def _has_completed(user_id_col):
+    """완료한 습관(원본 Habit 이 있는 것)이 하나라도 있는 유저만 (감자캐기 노출 조건)"""
+    return (
+        select(UserHabit.id)
+        .where(
+            UserHabit.user_id == user_id_col,
+            UserHabit.status == "completed_success",
+            UserHabit.source_habit_id.isnot(None),
+        )
+        .exists()
+    )
 
-        # info(dict)의 키가 스키마(FarmerSummary) 필드랑 같다고 가정
-        farmers.append(FarmerSummary(**info))
 
-    return farmers
+async def _match_page(
+    db: AsyncSession,
+    me: int,
+    cursor: Optional[str],
+    limit: int,
+) -> tuple[list[int], Optional[str]]:
+    """
+    sort=match 한 페이지 → (유저 id 목록, 다음 cursor)
+    - "m" 단계: 후보를 (score desc, id) keyset 으로
+    - "r" 단계: 후보가 아닌 나머지 유저를 id keyset 으로 (점수 계산 없음, sort=default 와 같은 비용)
+    - cursor 에 첫 페이지의 기준 시각(as_of)을 넣어 두고 최근 완료 기간을 그 시각에 고정
+      → 페이지를 넘기는 사이에 기간이 밀리거나 새로 완료한 습관이 생겨도 점수가 바뀌지 않음
+    """
+    if cursor is None:
+        phase, last_score, last_id = "m", None, 0
+        as_of = datetime.now(timezone.utc).replace(microsecond=0)
+    else:
+        phase, last_score, last_id, as_of = decode_cursor(cursor, str, int, int, datetime)
+        if phase not in ("m", "r"):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="잘못된 cursor 입니다.")
+        as_of = as_of.replace(tzinfo=timezone.utc)
+
+    shared, followed, candidates = _match_candidates(me)
+    user_ids: list[int] = []
+
+    if phase == "m":
+        score = _match_score_subquery(me, shared, followed, candidates, as_of)
+        stmt = select(score.c.user_id, score.c.score)
+        if last_score is not None:
+            stmt = stmt.where(
+                or_(
+                    score.c.score < last_score,
+                    and_(score.c.score == last_score, score.c.user_id > last_id),
+                )
+            )
+        rows = (await db.execute(
+            stmt.order_by(score.c.score.desc(), score.c.user_id.asc()).limit(limit + 1)
+        )).all()
+        user_ids = [r.user_id for r in rows[:limit]]
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            return user_ids, encode_cursor("m", last.score, last.user_id, as_of)
+        # 후보를 다 봤으면 같은 페이지의 남은 자리를 나머지 유저로 채움
+        phase, last_id = "r", 0
+
+    # 남은 자리가 0 이어도 한 건은 읽어서 다음 페이지가 있는지 확인
+    remaining = limit - len(user_ids)
+    rest = (await db.scalars(
+        select(User.id)
+        .where(
+            User.id > last_id,
+            User.id != me,
+            User.id.notin_(select(candidates.c.user_id)),
+            _has_completed(User.id),
+        )
+        .order_by(User.id)
+        .limit(remaining + 1)
+    )).all()
+    user_ids += rest[:remaining]
+    next_cursor = None
+    if len(rest) > remaining:
+        next_cursor = encode_cursor("r", 0, rest[remaining - 1] if remaining else last_id, as_of)
+    return user_ids, next_cursor
+
+
+def _match_candidates(me: int):
+    """
+    sort=match 점수를 매길 후보 → (shared, followed, candidates) 서브쿼리
+    - shared: 내 관심사와 겹치는 유저별 겹치는 수 (user_interests 의 interest_id 인덱스로 내 관심사 행만 읽음)
+    - followed: 내가 팔로우 중인 유저
+    - candidates: 둘의 합집합 (이 밖의 유저는 관심사 / 팔로우 점수가 0 이라 점수 정렬에서 빠짐)
+    """
+    my_ui = aliased(UserInterest)
+    shared = (
+        select(UserInterest.user_id, func.count().label("cnt"))  # pylint: disable=not-callable
+        .where(UserInterest.interest_id.in_(select(my_ui.interest_id).where(my_ui.user_id == me)))
+        .group_by(UserInterest.user_id)
+        .subquery("shared")
+    )
+    followed = (
+        select(Follow.followee_id.label("user_id"))
+        .where(Follow.follower_id == me)
+        .subquery("followed")
+    )
+    candidates = union(select(shared.c.user_id), select(followed.c.user_id)).subquery("candidates")
+    return shared, followed, candidates
+
+
+def _match_score_subquery(me: int, shared, followed, candidates, as_of: datetime):
+    """
+    후보별 user_id, score 서브쿼리 (sort=match 용)
+    score = 겹치는 관심사 수 * 10 + 내가 팔로우 중이면 5 + as_of 전 30일 완료 습관 수(최대 5)
+    최근 완료도 후보의 행만 (user_id, status, completed_at) 인덱스로 세므로 전체 유저 수와 무관
+    """
+    recent = (
+        select(UserHabit.user_id, func.count().label("cnt"))  # pylint: disable=not-callable
+        .where(
+            UserHabit.user_id.in_(select(candidates.c.user_id)),
+            UserHabit.status == "completed_success",
+            UserHabit.completed_at >= as_of - timedelta(days=MATCH_RECENT_DAYS),
+            UserHabit.completed_at < as_of,
+        )
+        .group_by(UserHabit.user_id)
+        .subquery("recent")
+    )
+
+    recent_cnt = func.coalesce(recent.c.cnt, 0)
+    score = (
+        func.coalesce(shared.c.cnt, 0) * MATCH_SHARED_WEIGHT
+        + case((followed.c.user_id.isnot(None), MATCH_FOLLOW_WEIGHT), else_=0)
+        + case((recent_cnt > MATCH_RECENT_CAP, MATCH_RECENT_CAP), else_=recent_cnt)
+    )
+    return (
+        select(candidates.c.user_id, score.label("score"))
+        .outerjoin(shared, shared.c.user_id == candidates.c.user_id)
+        .outerjoin(followed, followed.c.user_id == candidates.c.user_id)
+        .outerjoin(recent, recent.c.user_id == candidates.c.user_id)
+        .where(candidates.c.user_id != me, _has_completed(candidates.c.user_id))
+        .subquery("match_score")
+    )
 
 @router.post("/farmers/{target_user_id}/follow")
 def follow_farmer(
     target_user_id: int,
     db: Session = Depends(get_db),              # 필요 없으면 제거해도 됨
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # 자기 자신 팔로우 방지
     if target_user_id == current_user.id:
@@ -113,7 +299,7 @@ def follow_farmer(
 def unfollow_farmer(
     target_user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     팔로우 취소.
@@ -13,6 +13,8 @@ from sqlalchemy import delete, select
 from app.database import get_db
 from app.models.user import User, UserInterest
 from app.schemas.profile import ProfileOut,ProfileUpdateIn
+from app.utils.farmer_cards import invalidate_farmer_card
+from app.utils.principal import invalidate_principal
 
 router = APIRouter(prefix="/users", tags=["Profile"])
 
@@ -111,6 +113,8 @@ def update_profile(user_id: int, payload: ProfileUpdateIn, db: Session = Depends
             db.add(UserInterest(user_id=user_id, interest_id=interest_id))
 
     db.add(user)
+    invalidate_farmer_card(db, user_id)
+    invalidate_principal(db, user_id)
     db.commit()
     db.refresh(user)
     return _build_profile_out(db, user)
@@ -127,6 +131,7 @@ async def upload_profile_picture(
     user.profile_picture = public_url
 
     db.add(user)
+    invalidate_farmer_card(db, user_id)
     db.commit()
     db.refresh(user)
     return _build_profile_out(db, user)
@@ -1,19 +1,23 @@
 import os
 import datetime
-import hashlib
 from typing import Optional, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from jose import jwt
 
-from app.database import SessionLocal
+from app.database import SessionLocal, get_async_db
 from app.models.user import User
 from app.schemas.auth import RegisterIn, LoginIn, UserOut, TokenOut, UpdateUserIn
+from app.utils import metrics
+from app.utils.farmer_cards import invalidate_farmer_card
+from app.utils.passwords import HashPoolBusy, hash_password, verify_password
+from app.utils.principal import Principal, get_principal, get_principal_async, invalidate_principal
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -27,14 +31,14 @@ class Register:
     def __init__(
         self,
         phone: str,
-        password: str,
+        password_hash: str,
         name: str,
         gender: Optional[str] = None,
         age: Optional[int] = None,
         timezone: Optional[str] = None,
     ):
         self._phone = phone
-        self._password = hashlib.sha256((password + phone).encode()).hexdigest()
+        self._password = password_hash  # app.utils.passwords.hash_password() 결과
         self._name = name
         self._nickname = None  #닉네임은 profile_setup 단계에서 등록
         self._gender = gender or "N"
@@ -104,55 +108,93 @@ def create_access_token(subject: str | int, extra: Optional[Dict[str, Any]] = No
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_legacy_password(plain_password: str, phone: str, stored_hash: str) -> bool:
-    """기존 해시 로직과 동일한 방식으로 검증"""
-    return hashlib.sha256((plain_password + phone).encode()).hexdigest() == stored_hash
+def decode_access_token(token: str) -> int:
+    """JWT 에서 sub(=user.id) 를 꺼낸다. 잘못된 토큰이면 JWTError / ValueError"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    sub = payload.get("sub")
+    if sub is None:
+        raise ValueError("missing sub")
+    return int(sub)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    """
-    Authorization: Bearer <token> 에서 JWT를 읽어서
-    sub(=user.id) 기준으로 현재 로그인 유저를 찾아 반환
-    """
-    credentials_exception = HTTPException(
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="인증 정보가 유효하지 않습니다.",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _token_user_id(token: str) -> int:
     try:
         # JWT 디코딩
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload.get("sub")
-        if sub is None:
-            raise credentials_exception
-        user_id = int(sub)
+        return decode_access_token(token)
     except (JWTError, ValueError):
         # 토큰 형식 오류 / 위조 / 만료 등
-        raise credentials_exception
+        raise _credentials_exception()
 
-    user = db.get(User, user_id)
-    if user is None:
-        raise credentials_exception
 
-    return user
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    Authorization: Bearer <token> 에서 JWT를 읽어서
+    sub(=user.id) 기준으로 현재 로그인 유저(Principal)를 반환
+    - principal 캐시에 있으면 DB 조회 없음 (app/utils/principal.py)
+    - User 의 다른 컬럼이 필요하면 라우터에서 db.get(User, current_user.id)
+    """
+    user_id = _token_user_id(token)
+
+    principal = get_principal(db, user_id)
+    if principal is None:
+        raise _credentials_exception()
+
+    return principal
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """
+    get_current_user 의 async 버전 (async 라우터용, 같은 principal 캐시)
+    - 캐시 미스일 때도 워커 스레드를 쓰지 않고 async 엔진으로 조회
+    """
+    user_id = _token_user_id(token)
+
+    principal = await get_principal_async(db, user_id)
+    if principal is None:
+        raise _credentials_exception()
+
+    return principal
 
 
 # -----------------------------
 # 엔드포인트
 # -----------------------------
+HASH_BUSY_DETAIL = "요청이 많아 잠시 후 다시 시도해 주세요."
+
+
 @router.post("/register", response_model=UserOut, response_model_exclude_none=True, status_code=201)
-def register_user_api(data: RegisterIn, db: Session = Depends(get_db)):
-    """회원가입 (이름 필수 / 닉네임은 기본값 'none')"""
+async def register_user_api(data: RegisterIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    회원가입 (이름 필수 / 닉네임은 기본값 'none')
+    - 비밀번호 해시는 해시 전용 스레드 풀에서 (app/utils/passwords.py)
+    - DB 는 async 세션 → 해시 / DB 를 기다리는 동안 이벤트 루프도 워커 스레드도 막지 않음
+    """
 
-    if db.scalar(select(User.id).where(User.phone == data.phone)):
+    if await db.scalar(select(User.id).where(User.phone == data.phone)):
         raise HTTPException(status_code=409, detail="이미 등록된 전화번호입니다.")
 
+    try:
+        password_hash = await hash_password(data.password)
+    except HashPoolBusy:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=HASH_BUSY_DETAIL)
+
     reg = Register(
         phone=data.phone,
-        password=data.password,
+        password_hash=password_hash,
         name=data.name,
         gender=data.gender,
         age=data.age,
@@ -160,7 +202,7 @@ def register_user_api(data: RegisterIn, db: Session = Depends(get_db)):
     )
 
     try:
-        user = reg.register_user(db=db)
+        user = await db.run_sync(lambda sync_db: reg.register_user(db=sync_db))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -168,15 +210,31 @@ def register_user_api(data: RegisterIn, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenOut)
-def login_api(data: LoginIn, db: Session = Depends(get_db)):
-    """로그인"""
-    user = db.scalar(select(User).where(User.phone == data.phone))
-    if not user or not verify_legacy_password(data.password, data.phone, user.password_hash):
+async def login_api(data: LoginIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    로그인
+    - 비밀번호 검증은 해시 전용 스레드 풀에서 (app/utils/passwords.py), DB 는 async 세션
+    - 예전 sha256 해시 유저는 로그인 성공 시 scrypt 해시로 바꿔 저장 (풀이 바쁘면 다음 로그인 때)
+    """
+    user = await db.scalar(select(User).where(User.phone == data.phone))
+    ok = False
+    new_hash = None
+    if user:
+        try:
+            ok, new_hash = await verify_password(data.password, data.phone, user.password_hash)
+        except HashPoolBusy:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=HASH_BUSY_DETAIL)
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="전화번호 또는 비밀번호가 올바르지 않습니다.",
         )
 
+    if new_hash is not None:
+        user.password_hash = new_hash
+        await db.commit()
+        metrics.incr("auth.password_rehashed")
+
     token = create_access_token(subject=user.id, extra={"nickname": user.nickname})
     return TokenOut(access_token=token, user=user)
 
@@ -213,6 +271,8 @@ def update_user_api(
         user.profile_picture = data.profile_picture
 
     db.add(user)
+    invalidate_farmer_card(db, user_id)
+    invalidate_principal(db, user_id)
     db.commit()
     db.refresh(user)
     return user
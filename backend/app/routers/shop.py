@@ -5,11 +5,11 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.database import get_db
-from app.models.user import User
 from app.models.shop import ShopItem, Order
-from app.models.wallet import WalletTransaction
 from app.schemas.shop import ShopItemBase, OrderCreate, OrderBase
 from app.routers.register import get_current_user
+from app.utils.principal import Principal
+from app.utils.wallet import apply_hb_delta
 
 router = APIRouter(prefix="/shop", tags=["Shop"])
 
@@ -22,32 +22,17 @@ def get_items(db: Session = Depends(get_db)):
 def create_order(
     payload: OrderCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
     item = db.query(ShopItem).filter(ShopItem.id == payload.item_id).first()
     if not item:
         raise HTTPException(404, "상품을 찾을 수 없어요.")
 
-    if user.hb_balance < item.price_hb:
+    # 1) 잔액 차감 + 트랜잭션 기록 (잔액 부족이면 차감되지 않음)
+    if not apply_hb_delta(db, user.id, -item.price_hb, "shop_purchase", "shop_items", item.id):
         raise HTTPException(400, "해시 브라운이 부족해요.")
 
-    # 1) 잔액 차감
-    db.query(User).filter(User.id == user.id).update(
-        {User.hb_balance: User.hb_balance - item.price_hb}
-    )
-
-    # 2) 트랜잭션 기록
-    tx = WalletTransaction(
-        user_id=user.id,
-        amount=-item.price_hb,
-        reason="shop_purchase",
-        ref_table="shop_items",
-        ref_id=item.id,
-        created_at=datetime.now()
-    )
-    db.add(tx)
-
-    # 3) 주문 생성
+    # 2) 주문 생성
     order = Order(
         user_id=user.id,
         item_id=item.id,
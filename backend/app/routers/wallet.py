@@ -1,10 +1,18 @@
 # app/routers/wallet.py
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.models.wallet import WalletTransaction
 from app.database import get_db
 from app.routers.register import get_current_user
+from app.schemas.wallet import WalletTransactionPage
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.principal import Principal
 
 router = APIRouter(prefix="/me", tags=["Wallet"])
 
@@ -12,6 +20,41 @@ router = APIRouter(prefix="/me", tags=["Wallet"])
 @router.get("/wallet")
 def get_wallet(
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
+):
+    # 잔액 화면은 다른 워커에서 바뀐 값도 바로 보여야 하므로 캐시(principal) 대신 DB 에서
+    return {"hb_balance": db.scalar(select(User.hb_balance).where(User.id == user.id)) or 0}
+
+
+@router.get("/wallet/transactions", response_model=WalletTransactionPage)
+def get_wallet_transactions(
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
 ):
-    return {"hb_balance": user.hb_balance}
+    """
+    해시 거래 내역 (최신순, keyset 페이지네이션: created_at + id)
+    - (user_id, created_at, id) 인덱스만 타고 내려가므로 페이지가 깊어져도 비용이 같음
+    """
+    stmt = select(WalletTransaction).where(WalletTransaction.user_id == user.id)
+    if cursor is not None:
+        ts, tx_id = decode_cursor(cursor, datetime, int)
+        stmt = stmt.where(
+            or_(
+                WalletTransaction.created_at < ts,
+                and_(WalletTransaction.created_at == ts, WalletTransaction.id < tx_id),
+            )
+        )
+
+    rows = db.scalars(
+        stmt.order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return WalletTransactionPage(items=rows, next_cursor=next_cursor)
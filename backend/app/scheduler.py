@@ -1,27 +1,245 @@
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
 from app.database import SessionLocal
-from app.models.user import User
+from app.models.scheduler_lease import SchedulerLease
 from app.routers.certification import (
-    auto_fail_overdue_habits_for_today,
-    create_deadline_reminders_10min_before,
+    KST,
+    REMINDER_WINDOW_MINUTES,
+    sweep_overdue_habits,
+    sweep_deadline_reminders,
 )
+from app.routers.duel import settle_due_duels
+from app.routers.habits import evaluate_due_habits
+from app.utils import metrics
+from app.utils.deadline_wheel import deadline_wheel
+from app.utils.notification_retention import run_notification_retention
+from app.utils.wallet import reconcile_wallets, refresh_wallet_snapshots
+
+logger = logging.getLogger(__name__)
+
+# 실행 모드
+# - "on"  : API 프로세스 안에서 스케줄러도 같이 실행 (기본값, 리더 1개만 실제로 tick 처리)
+# - "off" : API 만 실행 (스케줄러는 `python -m app.scheduler` 로 따로 띄움)
+SCHEDULER_MODE = os.getenv("HASHBROWN_SCHEDULER", "on")
+
+TICK_LEASE_NAME = "minute_tick"
+RECONCILE_LEASE_NAME = "wallet_reconcile"
+RETENTION_LEASE_NAME = "notification_retention"
+LEASE_SECONDS = 90                     # tick 간격(60초)보다 길게 → 리더가 살아 있으면 계속 유지
+MAX_CATCHUP_MINUTES = int(os.getenv("HASHBROWN_SCHEDULER_MAX_CATCHUP_MINUTES", "1440"))
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# 이 프로세스가 직전 tick 을 리더로 끝까지 처리했는지.
+# 아니면(처음 / 리더가 바뀜 / 중간에 lease 를 잃음) replay 전에 타이밍 휠을 DB 로 새로 구성
+_tick_completed_as_leader = False
 
 scheduler = BackgroundScheduler()
 
+
+def _try_acquire_lease(db, name: str, now_utc: datetime) -> bool:
+    """
+    lease row 를 조건부 UPDATE 로 가져온다.
+    - 내가 이미 holder 이거나, 아무도 없거나, 기존 lease 가 만료됐을 때만 성공
+    - 여러 워커/컨테이너가 동시에 시도해도 UPDATE 한 건만 성공
+    """
+    if db.get(SchedulerLease, name) is None:
+        try:
+            db.add(SchedulerLease(name=name))
+            db.commit()
+        except IntegrityError:
+            # 다른 프로세스가 먼저 만든 경우
+            db.rollback()
+
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(
+                SchedulerLease.holder == HOLDER_ID,
+                SchedulerLease.lease_until.is_(None),
+                SchedulerLease.lease_until < now_utc,
+            ),
+        )
+        .values(holder=HOLDER_ID, lease_until=now_utc + timedelta(seconds=LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _renew_lease(db, name: str) -> bool:
+    """오래 걸리는 tick 중간에 lease 연장. 이미 다른 프로세스가 가져갔으면 False (이번 tick 중단)"""
+    if _try_acquire_lease(db, name, datetime.now(timezone.utc).replace(tzinfo=None)):
+        return True
+    metrics.incr("scheduler.lease_lost")
+    logger.warning("scheduler lease %s lost mid-tick; stopping this tick", name)
+    return False
+
+
 def run_daily_tasks():
+    """
+    1분 tick. lease 를 가진 리더 프로세스만 실제로 처리한다.
+    - 마지막으로 완료한 tick 이후 마감이 지나간 분 버킷을 전부 replay 해서 fail 처리
+      (재시작/긴 GC 멈춤으로 놓친 분도 여기서 따라잡음, 최대 MAX_CATCHUP_MINUTES)
+    - 앞으로 10분 안에 마감인 버킷만 리마인더 (지나간 분의 리마인더는 의미 없으니 replay 안 함)
+    - 실패 초과 / 기간 만료 듀얼 정산
+    - 기간이 끝난 (혼자) 습관 성공/실패 정산
+    - 해시 거래 내역 → 잔액 스냅샷 반영
+    - 처리 건수 / 후보 수 / tick 소요시간은 metrics 로 기록
+    - replay 하는 날짜 버킷마다 / 정산 단계 전에 lease 를 연장하고, 뺏겼으면 last_tick_at 을 안 남기고 중단
+      (긴 catch-up 중에 lease 가 만료돼서 다른 프로세스가 같은 구간을 또 replay 하지 않도록)
+    - 리더가 된 직후(직전 tick 을 이 프로세스가 끝내지 않았으면)에는 타이밍 휠을 전체 재구성한 뒤 replay
+      → 리더가 아니던 동안(다운타임 포함) 바뀐 마감시간이 예전 슬롯으로 replay 되지 않음
+    """
+    global _tick_completed_as_leader
+    started = time.perf_counter()
+    now_kst = datetime.now(KST)
+    now_utc = now_kst.astimezone(timezone.utc).replace(tzinfo=None)
+
+    db = SessionLocal()
+    try:
+        if not _try_acquire_lease(db, TICK_LEASE_NAME, now_utc):
+            _tick_completed_as_leader = False
+            metrics.incr("scheduler.tick_skipped_not_leader")
+            return
+
+        lease = db.get(SchedulerLease, TICK_LEASE_NAME)
+        if lease.last_tick_at is not None:
+            since_kst = lease.last_tick_at.replace(tzinfo=timezone.utc).astimezone(KST)
+        else:
+            # 처음 실행이면 오늘 0시부터
+            since_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        oldest_kst = now_kst - timedelta(minutes=MAX_CATCHUP_MINUTES)
+        if since_kst < oldest_kst:
+            logger.warning("scheduler catch-up capped: last tick %s", since_kst.isoformat())
+            since_kst = oldest_kst
+        missed_minutes = max(0, int((now_kst - since_kst).total_seconds() // 60) - 1)
+
+        if _tick_completed_as_leader:
+            deadline_wheel.sync(db)
+        else:
+            deadline_wheel.rebuild(db)
+            metrics.incr("scheduler.wheel_rebuilt_on_lead")
+        _tick_completed_as_leader = False   # 이번 tick 을 끝까지 마치면 다시 True
+
+        due = 0
+        failed = 0
+        # 자정을 넘긴 구간이면 날짜별로 나눠서 (cert_date 가 마감 날짜가 되도록)
+        for cutoff_kst, habit_ids in deadline_wheel.passed_between(since_kst, now_kst):
+            if not _renew_lease(db, TICK_LEASE_NAME):
+                return
+            due += len(habit_ids)
+            failed += sweep_overdue_habits(db, cutoff_kst, habit_ids=habit_ids)
+
+        if not _renew_lease(db, TICK_LEASE_NAME):
+            return
+
+        upcoming_ids = deadline_wheel.upcoming(now_kst, REMINDER_WINDOW_MINUTES)
+        due += len(upcoming_ids)
+        reminded = sweep_deadline_reminders(db, now_kst, habit_ids=upcoming_ids)
+
+        # 방금 fail 이 쌓였거나 기간이 끝난 듀얼 정산 (대화방을 안 열어도 바로 종료/지급)
+        settled = settle_due_duels(db, today=now_kst.date())
+
+        # 기간이 끝난 습관 정산 (앱에서 /habits/evaluate 를 안 불러도)
+        habits_succeeded, habits_failed = evaluate_due_habits(db, now_kst.astimezone(timezone.utc))
+
+        # 새로 쌓인 해시 거래를 잔액 스냅샷에 반영
+        snapshotted = refresh_wallet_snapshots(db)
+
+        # 여기까지 끝났으면 이번 tick 완료로 기록
+        lease = db.get(SchedulerLease, TICK_LEASE_NAME)
+        lease.last_tick_at = now_utc
+        db.commit()
+        _tick_completed_as_leader = True
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    metrics.incr("scheduler.auto_fail_created", failed)
+    metrics.incr("scheduler.reminders_created", reminded)
+    metrics.incr("scheduler.duels_settled", settled)
+    metrics.incr("scheduler.habits_completed_success", habits_succeeded)
+    metrics.incr("scheduler.habits_completed_fail", habits_failed)
+    metrics.incr("scheduler.wallet_tx_snapshotted", snapshotted)
+    metrics.incr("scheduler.replayed_minutes", missed_minutes)
+    metrics.set_gauge("scheduler.wheel_size", len(deadline_wheel))
+    metrics.set_gauge("scheduler.last_tick_due", due)
+    metrics.set_gauge("scheduler.last_tick_rows", failed + reminded)
+    metrics.set_gauge("scheduler.last_tick_seconds", elapsed)
+    metrics.observe("scheduler.tick", elapsed)
+    logger.info(
+        "scheduler tick: due=%d auto_fail=%d reminders=%d settled=%d habits=%d/%d replayed=%dmin elapsed=%.3fs",
+        due, failed, reminded, settled, habits_succeeded, habits_failed, missed_minutes, elapsed,
+    )
+
+
+def run_wallet_reconcile():
+    """매일 새벽: users.hb_balance 와 (스냅샷 + 이후 거래) 비교. 리더 하나만 실행."""
+    started = time.perf_counter()
+    now_utc = datetime.now(timezone.utc).replace(tzinfo=None)
+
     db = SessionLocal()
     try:
-        users = db.query(User).all()
+        if not _try_acquire_lease(db, RECONCILE_LEASE_NAME, now_utc):
+            return
+        mismatched = reconcile_wallets(db)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("scheduler.wallet_reconcile", elapsed)
+    logger.info("wallet reconcile: mismatched=%d elapsed=%.3fs", mismatched, elapsed)
+
 
-        for user in users:
-            auto_fail_overdue_habits_for_today(db, user)
-            create_deadline_reminders_10min_before(db, user)
+def run_notification_retention_job():
+    """1시간마다: 오래된 리마인더 요약 + 보관 기간 지난 읽은 알림 정리. 리더 하나만 실행."""
+    started = time.perf_counter()
+    now_utc = datetime.now(timezone.utc).replace(tzinfo=None)
 
+    db = SessionLocal()
+    try:
+        if not _try_acquire_lease(db, RETENTION_LEASE_NAME, now_utc):
+            return
+        collapsed, summaries, moved = run_notification_retention(db)
     finally:
         db.close()
 
+    elapsed = time.perf_counter() - started
+    metrics.observe("scheduler.notification_retention", elapsed)
+    logger.info(
+        "notification retention: reminders_collapsed=%d summaries=%d moved=%d elapsed=%.3fs",
+        collapsed, summaries, moved, elapsed,
+    )
+
+
+def _add_jobs(sched):
+    # 1분마다 실행 (이전 tick 이 안 끝났으면 겹쳐 돌리지 않음)
+    sched.add_job(run_daily_tasks, 'interval', minutes=1, max_instances=1, coalesce=True)
+    # 매일 04:00 (KST) 해시 잔액 검증
+    sched.add_job(run_wallet_reconcile, 'cron', hour=4, minute=0, timezone=KST, max_instances=1, coalesce=True)
+    # 매시 30분 알림 보관 기간 정리
+    sched.add_job(run_notification_retention_job, 'cron', minute=30, timezone=KST, max_instances=1, coalesce=True)
+
 
 def start_scheduler():
-    # 1분마다 실행
-    scheduler.add_job(run_daily_tasks, 'interval', minutes=1)
+    _add_jobs(scheduler)
     scheduler.start()
+
+
+if __name__ == "__main__":
+    # 스케줄러 전용 프로세스: HASHBROWN_SCHEDULER=off 인 API 워커들과 같이 사용
+    logging.basicConfig(level=logging.INFO)
+    blocking = BlockingScheduler()
+    _add_jobs(blocking)
+    blocking.start()
@@ -63,4 +63,13 @@ class DuelConversationOut(BaseModel):
 
     remain_fail_count: int
 
-    messages: List[DuelConversationMessage]
\ No newline at end of file
+    # ts_utc, id 오름차순
+    messages: List[DuelConversationMessage]
+
+    # 페이지네이션 (keyset: ts_utc, id)
+    # - before_cursor: 이 페이지의 가장 오래된 메시지 → ?before= 로 넘기면 그 이전 메시지
+    # - after_cursor : 이 페이지의 가장 최신 메시지 → ?after= 로 넘기면 그 이후 메시지 (폴링용)
+    # - has_more     : 요청한 방향으로 메시지가 더 있는지
+    before_cursor: Optional[str] = None
+    after_cursor: Optional[str] = None
+    has_more: bool = False
\ No newline at end of file
@@ -42,4 +42,11 @@ class CompletedHabitItemOut(BaseModel):
     completed_at: Optional[datetime] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class HabitTemplateOut(BaseModel):
+    habit_id: int                          # Habit.id (create_habit 의 source_habit_id 로 그대로 사용)
+    title: str
+    active_count: int                      # 지금 진행 중인 유저 수
+    completed_count: int                   # 성공으로 완료한 유저 수
+    median_difficulty: Optional[int] = None
@@ -10,7 +10,7 @@ class HomeHabitItemOut(BaseModel):
     title: str
     method: str          # "photo" / "text"
     deadline_local: time # 로컬 기준 마감 시각
-    progress: float = 0  # 일단 0.0, 나중에 인증 성공률 넣을 수 있음
+    progress: float = 0  # 기간 전체 인증해야 하는 날 중 성공한 날 비율 (0.0 ~ 1.0)
 
     class Config:
         orm_mode = True
@@ -0,0 +1,23 @@
+# app/schemas/wallet.py
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class WalletTransactionOut(BaseModel):
+    id: int
+    amount: int                      # +획득 / -차감
+    reason: str                      # "duel_reward", "shop_purchase" 등
+    ref_table: Optional[str] = None
+    ref_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WalletTransactionPage(BaseModel):
+    items: List[WalletTransactionOut]
+    # 다음(더 오래된) 페이지 cursor, 마지막 페이지면 None
+    next_cursor: Optional[str] = None
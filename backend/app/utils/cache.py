@@ -0,0 +1,113 @@
+# app/utils/cache.py
+"""
+프로세스 내부 TTL + LRU 캐시.
+- 잘 안 바뀌고 자주 읽는 조합 데이터(농부 카드 등)용
+- 히트/미스는 metrics 의 cache.<name>.hit / cache.<name>.miss 카운터, 누적 히트율은 cache.<name>.hit_ratio 게이지로 노출
+- 워커끼리 공유되지 않으므로 다른 워커의 변경은 TTL 이 지나야 반영됨
+- DB 변경에 따른 무효화는 invalidate_after_commit() 으로 commit 이 끝난 뒤에
+  (commit 전에 지우면 그 사이 다른 요청이 옛 값을 다시 채울 수 있음)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils import metrics
+
+_PENDING_KEY = "cache_invalidate_pending"
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int = 10000, ttl_seconds: float = 300) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable, now: float) -> tuple[bool, Any]:
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at <= now:
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _record(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+            ratio = self._hits / (self._hits + self._misses) if self._hits + self._misses else 0.0
+        metrics.incr(f"cache.{self.name}.hit", hits)
+        metrics.incr(f"cache.{self.name}.miss", misses)
+        metrics.set_gauge(f"cache.{self.name}.hit_ratio", round(ratio, 4))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+        self._record(int(found), int(not found))
+        return value if found else default
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Any]:
+        """있는 것만 돌려줌 (없는 key 는 호출한 쪽에서 DB 로 채우고 set_many)"""
+        found: dict[Hashable, Any] = {}
+        misses = 0
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                hit, value = self._lookup(key, now)
+                if hit:
+                    found[key] = value
+                else:
+                    misses += 1
+        self._record(len(found), misses)
+        return found
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[Hashable, Any]) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        metrics.set_gauge(f"cache.{self.name}.size", len(self._data))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def invalidate_after_commit(self, db: Session, key: Hashable) -> None:
+        """이 세션이 commit 된 뒤에 key 를 지운다 (rollback 되면 그대로 둠)"""
+        db.info.setdefault(_PENDING_KEY, []).append((self, key))
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    for cache, key in session.info.pop(_PENDING_KEY, ()):
+        cache.invalidate(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
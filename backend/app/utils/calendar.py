@@ -0,0 +1,90 @@
+# app/utils/calendar.py
+"""
+days_of_week 비트마스크 기반 날짜 계산.
+- 비트: 1 << (isoweekday - 1)  → 1: 월, 2: 화, 4: 수, 8: 목, 16: 금, 32: 토, 64: 일
+- 기간 안의 날짜를 하루씩 돌지 않고 (주 단위 개수 + 남는 요일) 로 계산
+  · count_scheduled_days      : O(1) (표 조회)
+  · iter_scheduled_dates      : O(결과 개수) (해당 요일로 바로 건너뜀)
+  · *_many                    : 여러 습관을 한 번에 (스케줄러 일괄 정산 / 홈 진행률)
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Iterable, Iterator
+
+ALL_WEEKDAYS = 0x7F
+
+# _POPCOUNT[mask]            : mask 에 포함된 요일 수
+# _PARTIAL[mask][first][n]   : first 요일부터 n 일(0~6) 동안 mask 에 걸리는 날 수
+_POPCOUNT = [bin(m).count("1") for m in range(ALL_WEEKDAYS + 1)]
+_PARTIAL = [
+    [
+        [sum(1 for i in range(n) if m & (1 << ((first + i) % 7))) for n in range(7)]
+        for first in range(7)
+    ]
+    for m in range(ALL_WEEKDAYS + 1)
+]
+
+
+def weekday_bit(d: date) -> int:
+    """d 의 요일 비트 (월=1 ... 일=64)"""
+    return 1 << d.weekday()
+
+
+def encode_weekdays(weekdays: Iterable[int]) -> int:
+    """[1, 3, 5] (1=월 ... 7=일) → 비트마스크. 범위 밖 값은 무시 (검증은 호출한 쪽에서)"""
+    mask = 0
+    for d in weekdays:
+        if 1 <= d <= 7:
+            mask |= 1 << (d - 1)
+    return mask
+
+
+def is_scheduled(mask: int, start: date | None, end: date | None, d: date) -> bool:
+    """d 가 기간 안이고 인증해야 하는 요일인지"""
+    return start is not None and end is not None and start <= d <= end and bool(mask & weekday_bit(d))
+
+
+def count_scheduled_days(mask: int, start: date | None, end: date | None) -> int:
+    """start ~ end (양 끝 포함) 중 mask 에 포함된 요일 수"""
+    if not mask or start is None or end is None or end < start:
+        return 0
+    mask &= ALL_WEEKDAYS
+    full_weeks, rest = divmod((end - start).days + 1, 7)
+    return full_weeks * _POPCOUNT[mask] + _PARTIAL[mask][start.weekday()][rest]
+
+
+def iter_scheduled_dates(mask: int, start: date | None, end: date | None) -> Iterator[date]:
+    """start ~ end 중 mask 에 포함된 날짜들 (오름차순)"""
+    if not mask or start is None or end is None or end < start:
+        return
+    first = start.weekday()
+    # start 로부터 한 주 안에서 인증해야 하는 날까지의 거리 (오름차순)
+    offsets = sorted((wd - first) % 7 for wd in range(7) if mask & (1 << wd))
+    week = start
+    while week <= end:
+        for offset in offsets:
+            d = week + timedelta(days=offset)
+            if d > end:
+                return
+            yield d
+        week += timedelta(days=7)
+
+
+def count_scheduled_hits(mask: int, start: date | None, end: date | None, days: Iterable[date]) -> int:
+    """days 중 기간 안 + 인증 요일인 서로 다른 날짜 수 (인증 성공한 날 중 실제로 인증해야 했던 날)"""
+    return sum(1 for d in set(days) if is_scheduled(mask, start, end, d))
+
+
+def count_scheduled_days_many(
+    items: Iterable[tuple[int, date | None, date | None]],
+) -> list[int]:
+    """[(mask, start, end), ...] → 각각의 count_scheduled_days (같은 순서)"""
+    return [count_scheduled_days(mask, start, end) for mask, start, end in items]
+
+
+def count_scheduled_hits_many(
+    items: Iterable[tuple[int, date | None, date | None, Iterable[date]]],
+) -> list[int]:
+    """[(mask, start, end, 날짜들), ...] → 각각의 count_scheduled_hits (같은 순서)"""
+    return [count_scheduled_hits(mask, start, end, days) for mask, start, end, days in items]
@@ -0,0 +1,54 @@
+# app/utils/cursor.py
+"""
+keyset 페이지네이션용 cursor 인코딩/디코딩.
+- cursor 는 (정렬 키들...) 을 JSON → urlsafe base64 로 감싼 문자열 (프론트에서는 그대로 되돌려주기만 함)
+- datetime 은 UTC naive 로 맞춰서 저장 (DB 에 저장된 값과 그대로 비교할 수 있도록)
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+
+
+def _to_naive_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def encode_cursor(*values) -> str:
+    """encode_cursor(ts_utc, id) → "WyIyMDI1LTAx..." """
+    raw = [
+        _to_naive_utc(v).isoformat() if isinstance(v, datetime) else v
+        for v in values
+    ]
+    data = json.dumps(raw, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    decode_cursor(cursor, datetime, int) → (ts_utc, id)
+    형식이 맞지 않으면 400 에러.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor length mismatch")
+
+        values = []
+        for value, typ in zip(raw, types):
+            if typ is datetime:
+                values.append(datetime.fromisoformat(value))
+            else:
+                values.append(typ(value))
+        return tuple(values)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="잘못된 cursor 입니다.",
+        ) from e
@@ -0,0 +1,168 @@
+# app/utils/deadline_wheel.py
+"""
+deadline_local 기준 1분 단위 타이밍 휠.
+- 버킷: 하루 중 몇 번째 분(0~1439) → {user_habit_id: days_of_week}
+- 스케줄러 tick 은 이번에 지나간/다가오는 분 버킷만 꺼내서 처리
+  (전체 습관을 매분 다시 훑지 않음)
+- 시작 시 user_habits 로 구성하고, 습관 생성/수정/종료 시 라우터에서 갱신
+- 다른 프로세스(API 워커 / 따로 띄운 스케줄러)에서 생긴 변경은 sync() 가 매 tick 당겨옴
+  · 새 id + updated_at 이 최근인 행(마감시간 / 요일 수정, 종료)을 다시 읽음
+  · 그래도 주기적으로 전체 재구성 (updated_at 이 없는 예전 행, 직접 고친 행 대비)
+휠은 후보를 좁히는 용도이고, 실제 fail/리마인더 조건은 sweep 쿼리가 DB 에서 다시 확인한다.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time as _time
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user_habit import UserHabit
+from app.utils.calendar import weekday_bit
+
+MINUTES_PER_DAY = 24 * 60
+RESYNC_SECONDS = int(os.getenv("HASHBROWN_WHEEL_RESYNC_MINUTES", "10")) * 60
+# 수정 시각 기준으로 다시 읽을 때 이만큼 겹쳐서 읽음 (프로세스 간 시계 차이 / 늦게 commit 된 수정 대비, 다시 넣어도 결과는 같음)
+CHANGE_LOOKBACK = timedelta(seconds=int(os.getenv("HASHBROWN_WHEEL_CHANGE_LOOKBACK_SECONDS", "120")))
+
+
+def _minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class DeadlineWheel:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: dict[int, dict[int, int]] = defaultdict(dict)
+        self._slot_of: dict[int, int] = {}
+        self._max_id = 0
+        self._loaded_at: float | None = None
+        self._synced_at: datetime | None = None   # 이 시각(UTC) 이후 수정된 행은 아직 안 읽었을 수 있음
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # ---------- 갱신 ----------
+    def _put(self, habit_id: int, deadline_local: time | None, days_of_week: int) -> None:
+        self._drop(habit_id)
+        if deadline_local is None or not days_of_week:
+            return
+        slot = _minute_of_day(deadline_local)
+        self._buckets[slot][habit_id] = days_of_week
+        self._slot_of[habit_id] = slot
+
+    def _drop(self, habit_id: int) -> None:
+        slot = self._slot_of.pop(habit_id, None)
+        if slot is not None:
+            self._buckets[slot].pop(habit_id, None)
+
+    def track(self, user_habit: UserHabit) -> None:
+        """습관 생성/수정 후 호출. 비활성 습관이면 휠에서 뺀다."""
+        with self._lock:
+            if user_habit.is_active:
+                self._put(user_habit.id, user_habit.deadline_local, user_habit.days_of_week)
+            else:
+                self._drop(user_habit.id)
+
+    def untrack(self, habit_id: int) -> None:
+        with self._lock:
+            self._drop(habit_id)
+
+    def rebuild(self, db: Session) -> None:
+        """active 습관 전체로 휠을 새로 구성"""
+        started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        rows = db.execute(
+            select(UserHabit.id, UserHabit.deadline_local, UserHabit.days_of_week)
+            .where(UserHabit.is_active == True)                      # noqa: E712
+        ).all()
+        with self._lock:
+            self._buckets = defaultdict(dict)
+            self._slot_of = {}
+            for r in rows:
+                self._put(r.id, r.deadline_local, r.days_of_week)
+            # 라우터에서 track() 한 id 는 여기 반영하지 않음 (다른 워커가 만든 중간 id 를 놓치지 않도록)
+            self._max_id = max((r.id for r in rows), default=0)
+            self._loaded_at = _time.monotonic()
+            self._synced_at = started_at
+
+    def sync(self, db: Session) -> None:
+        """
+        tick 시작 시 호출.
+        - 처음이거나 RESYNC_SECONDS 가 지났으면 전체 재구성
+        - 아니면 (1) 마지막으로 본 id 이후에 생긴 습관 추가
+                 (2) 지난 sync 이후(CHANGE_LOOKBACK 만큼 겹쳐서) 수정된 습관을 다시 넣거나 (종료됐으면) 뺌
+          → 다른 프로세스에서 마감시간을 바꿔도 다음 tick 부터 새 슬롯으로 처리
+          각각 PK / idx_user_habits_updated 인덱스로 (OR 로 묶지 않음)
+        """
+        if (
+            self._loaded_at is None
+            or self._synced_at is None
+            or _time.monotonic() - self._loaded_at >= RESYNC_SECONDS
+        ):
+            self.rebuild(db)
+            return
+
+        started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        cols = (UserHabit.id, UserHabit.deadline_local, UserHabit.days_of_week, UserHabit.is_active)
+        new_rows = db.execute(
+            select(*cols).where(
+                UserHabit.is_active == True,                         # noqa: E712
+                UserHabit.id > self._max_id,
+            )
+        ).all()
+        changed_rows = db.execute(
+            select(*cols).where(UserHabit.updated_at >= self._synced_at - CHANGE_LOOKBACK)
+        ).all()
+        with self._lock:
+            for r in (*new_rows, *changed_rows):
+                if r.is_active:
+                    self._put(r.id, r.deadline_local, r.days_of_week)
+                else:
+                    self._drop(r.id)
+            self._max_id = max([self._max_id, *(r.id for r in new_rows)])
+            self._synced_at = started_at
+
+    # ---------- 조회 ----------
+    def _collect(self, day: date, first_minute: int, last_minute: int) -> list[int]:
+        bit = weekday_bit(day)
+        ids: list[int] = []
+        with self._lock:
+            for slot in range(max(first_minute, 0), min(last_minute, MINUTES_PER_DAY - 1) + 1):
+                bucket = self._buckets.get(slot)
+                if bucket:
+                    ids.extend(hid for hid, mask in bucket.items() if mask & bit)
+        return ids
+
+    def passed_between(self, since_kst: datetime, now_kst: datetime) -> Iterator[tuple[datetime, list[int]]]:
+        """
+        since ~ now 사이에 마감이 지나간 습관들을 날짜별로 돌려준다.
+        yield (그 날짜 기준 '현재' 시각, 습관 id 목록)
+        - 자정을 넘긴 경우 전날 분은 전날 23:59:59 기준으로 따로 처리해야 cert_date 가 맞음
+        """
+        day = since_kst.date()
+        while day <= now_kst.date():
+            first = _minute_of_day(since_kst.time()) if day == since_kst.date() else 0
+            if day == now_kst.date():
+                last = _minute_of_day(now_kst.time())
+                cutoff = now_kst
+            else:
+                last = MINUTES_PER_DAY - 1
+                cutoff = datetime.combine(day, time.max, tzinfo=now_kst.tzinfo)
+            yield cutoff, self._collect(day, first, last)
+            day += timedelta(days=1)
+
+    def upcoming(self, now_kst: datetime, minutes: int) -> list[int]:
+        """now ~ now+minutes 사이에 마감인 오늘 습관 (자정 넘어가는 부분은 제외)"""
+        first = _minute_of_day(now_kst.time())
+        end = now_kst + timedelta(minutes=minutes)
+        last = _minute_of_day(end.time()) if end.date() == now_kst.date() else MINUTES_PER_DAY - 1
+        return self._collect(now_kst.date(), first, last)
+
+
+# 프로세스 전역 휠 (스케줄러와 라우터가 같이 사용)
+deadline_wheel = DeadlineWheel()
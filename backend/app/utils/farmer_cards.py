@@ -0,0 +1,121 @@
+# app/utils/farmer_cards.py
+"""
+농부 카드 캐시: 닉네임 / 소개 / 관심사 / 프로필 사진 / 완료한 습관(해시) 목록.
+- /potato/farmers 와 /exchange-requests/{user_id}/completed-hashes 가 같이 사용
+- 없는 카드만 IN 쿼리로 한 번에 채움 (유저 / 관심사 / 완료 습관 각 1번)
+- 프로필 수정, 프로필 사진 변경, 습관 완료(completed_success) 시 invalidate_farmer_card()
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user import User, UserInterest, Interest
+from app.models.user_habit import UserHabit
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CompletedHash:
+    user_habit_id: int
+    hash_id: int                # 원본 Habit.id
+    title: str
+    difficulty: int
+    deadline: str               # "HH:MM"
+    cert_type: str              # "photo" / "text"
+
+
+@dataclass(frozen=True)
+class FarmerCard:
+    user_id: int
+    nickname: str | None
+    bio: str | None
+    avatar_url: str | None
+    tags: list[str] = field(default_factory=list)
+    hashes: list[CompletedHash] = field(default_factory=list)
+
+
+farmer_card_cache = TTLCache(
+    "farmer_card",
+    maxsize=int(os.getenv("HASHBROWN_FARMER_CARD_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("HASHBROWN_FARMER_CARD_TTL_SECONDS", "300")),
+)
+
+
+def _load_cards(db: Session, user_ids: list[int]) -> dict[int, FarmerCard]:
+    users = db.execute(
+        select(User.id, User.nickname, User.bio, User.profile_picture).where(User.id.in_(user_ids))
+    ).all()
+    if not users:
+        return {}
+
+    tags: dict[int, list[str]] = {}
+    for user_id, name in db.execute(
+        select(UserInterest.user_id, Interest.name)
+        .join(Interest, Interest.id == UserInterest.interest_id)
+        .where(UserInterest.user_id.in_(user_ids))
+        .order_by(UserInterest.user_id, Interest.id)
+    ).all():
+        tags.setdefault(user_id, []).append(name)
+
+    hashes: dict[int, list[CompletedHash]] = {}
+    for uh in db.execute(
+        select(
+            UserHabit.id,
+            UserHabit.user_id,
+            UserHabit.source_habit_id,
+            UserHabit.title,
+            UserHabit.difficulty,
+            UserHabit.deadline_local,
+            UserHabit.method,
+        )
+        .where(
+            UserHabit.user_id.in_(user_ids),
+            UserHabit.status == "completed_success",
+            UserHabit.source_habit_id.isnot(None),
+        )
+        .order_by(UserHabit.user_id, UserHabit.id)
+    ).all():
+        hashes.setdefault(uh.user_id, []).append(
+            CompletedHash(
+                user_habit_id=uh.id,
+                hash_id=uh.source_habit_id,
+                title=uh.title,
+                difficulty=uh.difficulty,
+                deadline=uh.deadline_local.strftime("%H:%M"),
+                cert_type=uh.method,
+            )
+        )
+
+    return {
+        u.id: FarmerCard(
+            user_id=u.id,
+            nickname=u.nickname,
+            bio=u.bio,
+            avatar_url=u.profile_picture,
+            tags=tags.get(u.id, []),
+            hashes=hashes.get(u.id, []),
+        )
+        for u in users
+    }
+
+
+def get_farmer_cards(db: Session, user_ids: Iterable[int]) -> dict[int, FarmerCard]:
+    """user_id → FarmerCard (없는 유저는 빠짐)"""
+    user_ids = list(user_ids)
+    cards = farmer_card_cache.get_many(user_ids)
+    missing = [uid for uid in user_ids if uid not in cards]
+    if missing:
+        loaded = _load_cards(db, missing)
+        farmer_card_cache.set_many(loaded)
+        cards.update(loaded)
+    return cards
+
+
+def invalidate_farmer_card(db: Session, user_id: int) -> None:
+    """카드 내용이 바뀌는 변경 후 호출 (이 세션 commit 이후에 캐시에서 지움)"""
+    farmer_card_cache.invalidate_after_commit(db, user_id)
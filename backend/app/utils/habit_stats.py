@@ -0,0 +1,148 @@
+# app/utils/habit_stats.py
+"""
+Habit 템플릿별 집계(habit_stats) 유지.
+- UserHabit 의 상태/난이도가 바뀌는 곳에서 바뀌기 전/후 habit_stat_state() 를 넘겨 apply_habit_stat_change() 호출
+  → 카운터 컬럼만 UPDATE 로 증감 (user_habits 를 다시 세지 않음)
+- 집계 대상: 진행 중(active) → active_cnt, 성공 완료(completed_success) → completed_cnt
+  실패/취소는 어느 쪽에도 세지 않음. 난이도 분포는 두 상태를 합쳐서
+- commit 은 호출한 쪽에서 (UserHabit 변경과 한 트랜잭션)
+- 값이 어긋났거나 처음 만들 때는 python -m app.rebuild_habit_stats
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit, HabitStat
+from app.models.user_habit import UserHabit
+
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 5
+
+# (집계 구분 "active" / "completed" / None, 난이도)
+HabitStatState = tuple[Optional[str], int]
+
+
+def clamp_difficulty(difficulty: int) -> int:
+    return max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, difficulty or MIN_DIFFICULTY))
+
+
+def habit_stat_state(uh: UserHabit | None) -> HabitStatState:
+    if uh is None:
+        return None, MIN_DIFFICULTY
+    if uh.status == "active" and uh.is_active:
+        bucket = "active"
+    elif uh.status == "completed_success":
+        bucket = "completed"
+    else:
+        bucket = None
+    return bucket, clamp_difficulty(uh.difficulty)
+
+
+def _diff_col(difficulty: int):
+    return getattr(HabitStat, f"diff_{difficulty}_cnt")
+
+
+def _stat_deltas(before: HabitStatState, after: HabitStatState) -> dict[str, int]:
+    deltas: dict[str, int] = {}
+    if before == after:
+        return deltas
+    for (bucket, difficulty), sign in ((before, -1), (after, +1)):
+        if bucket is None:
+            continue
+        for col in (f"{bucket}_cnt", "popularity", _diff_col(difficulty).key):
+            deltas[col] = deltas.get(col, 0) + sign
+    return {col: d for col, d in deltas.items() if d}
+
+
+def _apply_deltas(db: Session, habit_id: int, deltas: dict[str, int]) -> None:
+    now_utc = datetime.now(timezone.utc)
+    values = {col: getattr(HabitStat, col) + d for col, d in deltas.items()}
+    values["updated_at"] = now_utc
+    stmt = (
+        update(HabitStat)
+        .where(HabitStat.habit_id == habit_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount:
+        return
+
+    # 아직 집계 행이 없는 템플릿 → 새로 만듦 (동시에 다른 요청이 먼저 만들었으면 UPDATE 로 다시)
+    title = db.scalar(select(Habit.title).where(Habit.id == habit_id))
+    if title is None:
+        return
+    try:
+        with db.begin_nested():
+            db.add(
+                HabitStat(
+                    habit_id=habit_id,
+                    title=title,
+                    active_cnt=max(deltas.get("active_cnt", 0), 0),
+                    completed_cnt=max(deltas.get("completed_cnt", 0), 0),
+                    popularity=max(deltas.get("popularity", 0), 0),
+                    **{
+                        _diff_col(d).key: max(deltas.get(_diff_col(d).key, 0), 0)
+                        for d in range(MIN_DIFFICULTY, MAX_DIFFICULTY + 1)
+                    },
+                    updated_at=now_utc,
+                )
+            )
+    except IntegrityError:
+        db.execute(stmt)
+
+
+def apply_habit_stat_change(
+    db: Session,
+    habit_id: int | None,
+    before: HabitStatState,
+    after: HabitStatState,
+) -> None:
+    """
+    UserHabit 하나가 before → after 로 바뀐 만큼 habit_stats 를 증감.
+    - 새로 만든 UserHabit 은 before=habit_stat_state(None)
+    - 템플릿 없는 습관(habit_id None)이나 집계에 영향 없는 변경은 아무것도 안 함
+    """
+    if habit_id is None:
+        return
+    deltas = _stat_deltas(before, after)
+    if deltas:
+        _apply_deltas(db, habit_id, deltas)
+
+
+def apply_habit_stat_changes(
+    db: Session,
+    changes: Iterable[tuple[int | None, HabitStatState, HabitStatState]],
+) -> None:
+    """[(habit_id, before, after), ...] 를 템플릿별로 합쳐서 템플릿당 UPDATE 한 번 (일괄 정산용)"""
+    merged: dict[int, dict[str, int]] = {}
+    for habit_id, before, after in changes:
+        if habit_id is None:
+            continue
+        acc = merged.setdefault(habit_id, {})
+        for col, d in _stat_deltas(before, after).items():
+            acc[col] = acc.get(col, 0) + d
+
+    for habit_id in sorted(merged):
+        deltas = {col: d for col, d in merged[habit_id].items() if d}
+        if deltas:
+            _apply_deltas(db, habit_id, deltas)
+
+
+def median_difficulty(stat: HabitStat) -> int | None:
+    """난이도 분포에서 중앙값 (하위 중앙값). 집계된 유저가 없으면 None"""
+    counts = [getattr(stat, _diff_col(d).key) or 0 for d in range(MIN_DIFFICULTY, MAX_DIFFICULTY + 1)]
+    total = sum(counts)
+    if total <= 0:
+        return None
+    half = (total + 1) // 2
+    acc = 0
+    for difficulty, cnt in enumerate(counts, start=MIN_DIFFICULTY):
+        acc += cnt
+        if acc >= half:
+            return difficulty
+    return MAX_DIFFICULTY
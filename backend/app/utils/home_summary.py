@@ -0,0 +1,26 @@
+# app/utils/home_summary.py
+"""
+홈 요약(GET /home/summary) 유저별 캐시.
+- 앱을 열 때마다 제일 먼저 불리는 화면이라 짧은 TTL 로 캐시
+- 값은 (KST 날짜, HomeSummaryOut) → 날짜가 바뀌면 TTL 과 상관없이 다시 계산
+- 요약에 들어가는 값이 바뀌는 쓰기(인증 / 습관 생성·수정·정산 / 듀얼 시작·종료) 후 invalidate_home_summary()
+"""
+from __future__ import annotations
+
+import os
+
+from sqlalchemy.orm import Session
+
+from app.utils.cache import TTLCache
+
+home_summary_cache = TTLCache(
+    "home_summary",
+    maxsize=int(os.getenv("HASHBROWN_HOME_SUMMARY_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("HASHBROWN_HOME_SUMMARY_TTL_SECONDS", "30")),
+)
+
+
+def invalidate_home_summary(db: Session, *user_ids: int) -> None:
+    """이 세션 commit 이후에 해당 유저들의 홈 요약 캐시를 지움"""
+    for user_id in user_ids:
+        home_summary_cache.invalidate_after_commit(db, user_id)
@@ -0,0 +1,65 @@
+# app/utils/metrics.py
+"""
+프로세스 내부 지표 수집기.
+- counter : 누적 카운트 (처리 건수, 캐시 hit/miss 등)
+- gauge   : 마지막 값 (마지막 tick 소요시간 등)
+- timing  : 최근 N개 관측값으로 p50/p95 계산
+GET /metrics 에서 snapshot() 결과를 그대로 내려준다.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict, deque
+
+TIMING_WINDOW = 1024  # timing 별로 보관하는 최근 관측값 개수
+
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+_gauges: dict[str, float] = {}
+_timings: dict[str, deque] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, seconds: float) -> None:
+    with _lock:
+        window = _timings.get(name)
+        if window is None:
+            window = _timings[name] = deque(maxlen=TIMING_WINDOW)
+        window.append(seconds)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {name: sorted(window) for name, window in _timings.items()}
+
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "timings": {
+            name: {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+                "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+            }
+            for name, values in timings.items()
+        },
+    }
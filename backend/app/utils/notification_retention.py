@@ -0,0 +1,279 @@
+# app/utils/notification_retention.py
+"""
+notifications 보관 기간 관리 (스케줄러가 1시간마다 실행).
+- 오래된 마감 리마인더(습관당 하루 1건)를 (유저, 습관) 별 요약 알림 1건으로 합침 (실행마다 같은 요약에 누적)
+  · 원본 중 안 읽은 게 있으면 요약도 안 읽음 → 안 읽은 알림 카운터는 (없어진 안 읽은 수 - 새로 안 읽음이 된 요약 수) 만큼 감소
+- 보관 기간이 지난 읽은 알림은 notifications_archive 로 옮김 (HASHBROWN_NOTIFICATION_RETENTION_MODE=delete 면 그냥 삭제)
+- 전부 batch_size 개씩 짧은 트랜잭션으로 (배치마다 commit) → 알림함 쿼리가 오래 막히지 않음
+- 한 번에 max_batches 배치까지만, 남은 건 다음 실행에
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification, NotificationArchive
+from app.utils import metrics
+from app.utils.notifications import bump_unread, notification_dedup_key
+
+logger = logging.getLogger(__name__)
+
+KST = timezone(timedelta(hours=9))
+
+RETENTION_DAYS = int(os.getenv("HASHBROWN_NOTIFICATION_RETENTION_DAYS", "30"))
+REMINDER_COMPACT_DAYS = int(os.getenv("HASHBROWN_NOTIFICATION_REMINDER_COMPACT_DAYS", "7"))
+# "archive": notifications_archive 로 옮김 / "delete": 옮기지 않고 삭제
+RETENTION_MODE = os.getenv("HASHBROWN_NOTIFICATION_RETENTION_MODE", "archive")
+RETENTION_BATCH_SIZE = 500
+RETENTION_MAX_BATCHES = 50
+
+REMINDER_DEEPLINK_PREFIX = "/habits/"
+REMINDER_DEEPLINK_SUFFIX = "/deadline-reminder"
+REMINDER_SUMMARY_TITLE = "지난 마감 리마인더 {count}건"
+REMINDER_SUMMARY_BODY = "{habit} ({first}~{last})"
+# 다음 실행 때 기존 요약에 합치려고 제목 / 본문에서 개수와 첫 날짜를 다시 읽음
+_SUMMARY_COUNT_RE = re.compile(r"(\d+)건$")
+_SUMMARY_RANGE_RE = re.compile(r"\((\d{4}\.\d{2}\.\d{2})~\d{4}\.\d{2}\.\d{2}\)$")
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _reminder_habit_id(deeplink: str | None) -> int | None:
+    """"/habits/12/deadline-reminder" → 12"""
+    if not deeplink or not deeplink.startswith(REMINDER_DEEPLINK_PREFIX) or not deeplink.endswith(REMINDER_DEEPLINK_SUFFIX):
+        return None
+    habit_id = deeplink[len(REMINDER_DEEPLINK_PREFIX):-len(REMINDER_DEEPLINK_SUFFIX)]
+    return int(habit_id) if habit_id.isdigit() else None
+
+
+def _move_notifications(db: Session, ids: list[int], now_utc: datetime) -> None:
+    """ids 알림을 notifications_archive 로 복사한 뒤 삭제 (delete 모드면 삭제만). commit 은 호출한 쪽에서"""
+    if RETENTION_MODE != "delete":
+        cols = ("id", "user_id", "type", "title", "body", "deeplink", "is_read", "created_at", "dedup_key")
+        db.execute(
+            insert(NotificationArchive.__table__)
+            .prefix_with("IGNORE", dialect="mysql")
+            .from_select(
+                [*cols, "archived_at"],
+                select(*(getattr(Notification, c) for c in cols), literal(now_utc, NotificationArchive.archived_at.type))
+                .where(Notification.id.in_(ids)),
+            )
+        )
+    db.execute(
+        delete(Notification)
+        .where(Notification.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _summary_dedup_key(habit_id: int) -> str:
+    """(유저, 습관) 당 요약은 하나 → 날짜 없는 키. 다음 실행 때 이 키로 찾아서 합침"""
+    return notification_dedup_key("reminder_summary", f"habit:{habit_id}")
+
+
+def _parse_summary(title: str | None, body: str | None) -> tuple[int, date | None]:
+    """기존 요약의 제목 / 본문에서 (합친 개수, 첫 날짜) 를 읽음. 형식이 다르면 (0, None)"""
+    count_match = _SUMMARY_COUNT_RE.search(title or "")
+    range_match = _SUMMARY_RANGE_RE.search(body or "")
+    count = int(count_match.group(1)) if count_match else 0
+    first_day = datetime.strptime(range_match.group(1), "%Y.%m.%d").date() if range_match else None
+    return count, first_day
+
+
+def compact_old_reminders(
+    db: Session,
+    cutoff_utc: datetime,
+    now_utc: datetime,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    max_batches: int = RETENTION_MAX_BATCHES,
+) -> tuple[int, int]:
+    """
+    cutoff_utc 이전의 마감 리마인더를 (유저, 습관) 별 요약 알림 1건으로 합친다.
+    - 요약은 (유저, 습관) 당 하나 (dedup_key = reminder_summary:habit:<id>)
+      · 이미 있으면 그 요약에 개수 / 기간을 더해서 갱신
+      · 없으면 리마인더가 2건 이상일 때만 새로 만듦 (1건짜리 요약은 줄어드는 행이 없으므로 그대로 둠)
+    - 요약 INSERT 가 dedup_key 충돌로 무시되면 그 그룹은 원본도 안 지우고 카운터도 안 건드림 (다음 실행에 다시)
+    - 원본은 _move_notifications 로 보관 / 삭제
+    반환값: (합쳐서 없앤 리마인더 수, 새로 만든 요약 수)
+    """
+    collapsed = 0
+    summaries = 0
+    last_id = 0
+    for _ in range(max_batches):
+        rows = db.execute(
+            select(
+                Notification.id,
+                Notification.user_id,
+                Notification.body,
+                Notification.deeplink,
+                Notification.is_read,
+                Notification.created_at,
+            )
+            .where(
+                Notification.type == "system",
+                Notification.created_at < cutoff_utc,
+                Notification.deeplink.like(f"{REMINDER_DEEPLINK_PREFIX}%{REMINDER_DEEPLINK_SUFFIX}"),
+                Notification.id > last_id,
+            )
+            .order_by(Notification.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # (user_id, habit_id) → 원본 리마인더들
+        groups: dict[tuple[int, int], list] = {}
+        for r in rows:
+            habit_id = _reminder_habit_id(r.deeplink)
+            if habit_id is not None:
+                groups.setdefault((r.user_id, habit_id), []).append(r)
+
+        # 이미 있는 요약: (user_id, dedup_key) → 요약 행
+        existing = {}
+        if groups:
+            existing = {
+                (s.user_id, s.dedup_key): s
+                for s in db.execute(
+                    select(
+                        Notification.id,
+                        Notification.user_id,
+                        Notification.dedup_key,
+                        Notification.title,
+                        Notification.body,
+                        Notification.is_read,
+                        Notification.created_at,
+                    ).where(
+                        Notification.user_id.in_({user_id for user_id, _ in groups}),
+                        Notification.dedup_key.in_({_summary_dedup_key(habit_id) for _, habit_id in groups}),
+                    )
+                ).all()
+            }
+
+        moved_ids: list[int] = []
+        unread_deltas: dict[int, int] = {}
+        for (user_id, habit_id), reminders in groups.items():
+            summary = existing.get((user_id, _summary_dedup_key(habit_id)))
+            if summary is None and len(reminders) < 2:
+                continue
+
+            unread = sum(1 for r in reminders if not r.is_read)
+            first_at = min(_as_utc(r.created_at) for r in reminders)
+            last_at = max(_as_utc(r.created_at) for r in reminders)
+            first_day = first_at.astimezone(KST).date()
+            count = len(reminders)
+            habit_title = reminders[-1].body or ""
+
+            if summary is not None:
+                prev_count, prev_first_day = _parse_summary(summary.title, summary.body)
+                count += prev_count
+                if prev_first_day is not None:
+                    first_day = min(first_day, prev_first_day)
+                last_at = max(last_at, _as_utc(summary.created_at))
+                # 읽은 요약에 안 읽은 리마인더가 합쳐지면 요약이 다시 안 읽음이 됨
+                summary_delta = 1 if summary.is_read and unread else 0
+            else:
+                summary_delta = 1 if unread else 0
+
+            values = {
+                "title": REMINDER_SUMMARY_TITLE.format(count=count),
+                "body": REMINDER_SUMMARY_BODY.format(
+                    habit=habit_title[:200],
+                    first=f"{first_day:%Y.%m.%d}",
+                    last=f"{last_at.astimezone(KST).date():%Y.%m.%d}",
+                ),
+                "is_read": unread == 0 and (summary is None or summary.is_read),
+                "created_at": last_at,
+            }
+            if summary is not None:
+                db.execute(update(Notification).where(Notification.id == summary.id).values(**values))
+            else:
+                inserted = db.execute(
+                    insert(Notification.__table__)
+                    .prefix_with("IGNORE", dialect="mysql")
+                    .values(
+                        user_id=user_id,
+                        type="system",
+                        deeplink=f"{REMINDER_DEEPLINK_PREFIX}{habit_id}",
+                        dedup_key=_summary_dedup_key(habit_id),
+                        **values,
+                    )
+                ).rowcount
+                if inserted != 1:
+                    # 다른 곳에서 같은 요약을 먼저 만듦 → 이번엔 원본 / 카운터 그대로
+                    continue
+                summaries += 1
+
+            moved_ids.extend(r.id for r in reminders)
+            # 안 읽은 원본 unread 개 → 안 읽은 요약 (summary_delta 개)
+            if unread or summary_delta:
+                unread_deltas[user_id] = unread_deltas.get(user_id, 0) - unread + summary_delta
+
+        if moved_ids:
+            _move_notifications(db, moved_ids, now_utc)
+            db.flush()
+            bump_unread(db, unread_deltas)
+        db.commit()
+
+        collapsed += len(moved_ids)
+        if len(rows) < batch_size:
+            break
+
+    return collapsed, summaries
+
+
+def archive_read_notifications(
+    db: Session,
+    cutoff_utc: datetime,
+    now_utc: datetime,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    max_batches: int = RETENTION_MAX_BATCHES,
+) -> int:
+    """
+    cutoff_utc 이전에 만들어진 읽은 알림을 batch_size 개씩 보관 / 삭제.
+    - 읽은 알림만 옮기므로 안 읽은 알림 카운터는 그대로
+    반환값: 옮긴(삭제한) 알림 수
+    """
+    moved = 0
+    for _ in range(max_batches):
+        ids = db.scalars(
+            select(Notification.id)
+            .where(
+                Notification.is_read == True,  # noqa: E712
+                Notification.created_at < cutoff_utc,
+            )
+            .order_by(Notification.created_at, Notification.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        _move_notifications(db, list(ids), now_utc)
+        db.commit()
+
+        moved += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    return moved
+
+
+def run_notification_retention(db: Session, now_utc: datetime | None = None) -> tuple[int, int, int]:
+    """
+    리마인더 요약 → 읽은 알림 보관 순서로 한 번 실행.
+    반환값: (합친 리마인더 수, 만든 요약 수, 보관/삭제한 알림 수)
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+    collapsed, summaries = compact_old_reminders(db, now_utc - timedelta(days=REMINDER_COMPACT_DAYS), now_utc)
+    moved = archive_read_notifications(db, now_utc - timedelta(days=RETENTION_DAYS), now_utc)
+
+    metrics.incr("notifications.reminders_collapsed", collapsed)
+    metrics.incr("notifications.reminder_summaries_created", summaries)
+    metrics.incr("notifications.retention_moved", moved)
+    return collapsed, summaries, moved
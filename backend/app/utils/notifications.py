@@ -0,0 +1,163 @@
+# app/utils/notifications.py
+"""
+알림 생성 / 안 읽은 알림 수(notification_counters) 유지.
+- 알림은 전부 create_notification() (또는 bulk insert 후 bump_unread()) 로 만든다
+  → notifications 를 세지 않고 카운터 행 하나로 unread-count 응답
+- dedup_key (종류:대상[:KST 날짜]) 가 같은 알림은 유저당 한 번만 생김 (unique (user_id, dedup_key))
+  → 재시도 / 매분 도는 리마인더가 미리 조회하지 않고 그냥 넣어도 됨
+- 카운터 행이 없는 유저(카운터 도입 전 알림만 있는 유저 등)는 카운터가 처음 바뀔 때(bump_unread) 실제 개수로 채움
+  → 조회(get_unread_count)는 쓰지 않음, 행이 없으면 0
+- commit 은 호출한 쪽에서 (알림 / 다른 변경과 한 트랜잭션)
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification, NotificationCounter
+
+
+def notification_dedup_key(kind: str, subject: str | int, local_date: date | None = None) -> str:
+    """
+    ("reminder", "habit:12", 2025-01-31) → "reminder:habit:12:2025-01-31"
+    - 하루 한 번씩 생기는 알림은 local_date(KST) 를 넣고, 한 번만 생기는 이벤트(듀얼 종료 등)는 생략
+    """
+    key = f"{kind}:{subject}"
+    if local_date is not None:
+        key += f":{local_date.isoformat()}"
+    return key
+
+
+def create_notification(
+    db: Session,
+    user_id: int,
+    noti_type: str,
+    title: str,
+    body: str = "",
+    deeplink: str | None = None,
+    dedup_key: str | None = None,
+) -> Notification | None:
+    """
+    공통 알림 생성 헬퍼.
+    - noti_type: "challenge", "challenge_rejected", "challenge_accepted", "cert_success", "system" 등
+    - dedup_key 가 이미 있는 알림이면 만들지 않고 None
+    """
+    n = Notification(
+        user_id=user_id,
+        type=noti_type,
+        title=title,
+        body=body,
+        is_read=False,
+        deeplink=deeplink,
+        created_at=datetime.now(timezone.utc),
+        dedup_key=dedup_key,
+    )
+    if dedup_key is None:
+        db.add(n)
+        db.flush()
+    else:
+        try:
+            with db.begin_nested():
+                db.add(n)
+        except IntegrityError:
+            return None
+    bump_unread(db, {user_id: 1})
+    return n
+
+
+def _count_unread(db: Session, user_ids: list[int]) -> dict[int, int]:
+    return dict(
+        db.execute(
+            select(Notification.user_id, func.count(Notification.id))  # pylint: disable=not-callable
+            .where(
+                Notification.user_id.in_(user_ids),
+                Notification.is_read == False,  # noqa: E712
+            )
+            .group_by(Notification.user_id)
+        ).all()
+    )
+
+
+def bump_unread(db: Session, deltas: dict[int, int]) -> None:
+    """
+    user_id → 증감량 만큼 안 읽은 알림 수 조정 (0 아래로는 안 내려감).
+    - 같은 증감량끼리 묶어서 UPDATE ... WHERE user_id IN (...) 한 번씩
+    - 알림 행 변경(insert / is_read)은 flush 된 상태에서 호출 (카운터가 없으면 실제 개수로 채우므로)
+    """
+    deltas = {uid: d for uid, d in deltas.items() if d}
+    if not deltas:
+        return
+    now_utc = datetime.now(timezone.utc)
+
+    by_delta: dict[int, list[int]] = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+
+    def _update(delta: int, user_ids: list[int]):
+        new_cnt = NotificationCounter.unread_cnt + delta
+        return db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(user_ids))
+            .values(unread_cnt=case((new_cnt < 0, 0), else_=new_cnt), updated_at=now_utc)
+            .execution_options(synchronize_session=False)
+        )
+
+    missing: list[int] = []
+    for delta, user_ids in by_delta.items():
+        if _update(delta, user_ids).rowcount != len(user_ids):
+            existing = set(
+                db.scalars(
+                    select(NotificationCounter.user_id).where(NotificationCounter.user_id.in_(user_ids))
+                ).all()
+            )
+            missing.extend(uid for uid in user_ids if uid not in existing)
+    if not missing:
+        return
+
+    # 카운터가 없던 유저: 이번 변경까지 반영된 실제 개수로 새로 만듦
+    actual = _count_unread(db, missing)
+    for user_id in missing:
+        try:
+            with db.begin_nested():
+                db.add(
+                    NotificationCounter(
+                        user_id=user_id,
+                        unread_cnt=actual.get(user_id, 0),
+                        updated_at=now_utc,
+                    )
+                )
+        except IntegrityError:
+            # 다른 트랜잭션이 먼저 만든 경우 → 그 값에 이번 증감만 더함
+            _update(deltas[user_id], [user_id])
+
+
+def recount_unread(db: Session, user_id: int) -> None:
+    """
+    전체 읽음 처리와 같은 트랜잭션에서 카운터를 실제 안 읽은 개수로 다시 맞춤.
+    - 0 으로 덮어쓰면 읽음 처리와 reset 사이에 생긴 알림의 +1 이 사라지므로, UPDATE 안의 서브쿼리로 다시 셈
+    - 카운터가 없으면 그대로 둠 (나중에 bump_unread 가 실제 개수로 채움)
+    """
+    db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(
+            unread_cnt=select(func.count(Notification.id))  # pylint: disable=not-callable
+            .where(
+                Notification.user_id == user_id,
+                Notification.is_read == False,  # noqa: E712
+            )
+            .scalar_subquery(),
+            updated_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """카운터 행 하나만 읽음 (쓰기 없음). 아직 카운터가 없으면 0"""
+    cnt = db.scalar(select(NotificationCounter.unread_cnt).where(NotificationCounter.user_id == user_id))
+    return cnt or 0
@@ -0,0 +1,108 @@
+# app/utils/passwords.py
+"""
+비밀번호 해시 / 검증.
+- 새 해시: scrypt (passlib, 표준 라이브러리 hashlib.scrypt 백엔드) → 메모리를 많이 쓰는 해시라 무차별 대입에 강함
+- 기존 유저의 sha256(password + phone) 해시는 로그인 성공 시 scrypt 로 다시 해시해서 바꿔 줌
+- scrypt 는 요청당 수십~수백 ms 를 쓰므로 전용 스레드 풀(크기 고정)에서만 실행
+  → 로그인이 몰려도 FastAPI 요청 스레드풀 / 이벤트 루프를 잡고 있지 않음
+  → 풀 대기열이 MAX_QUEUE 를 넘으면 HashPoolBusy (라우터에서 503)
+- 지표: password_hash.queue_depth(게이지), password_hash.wait / password_hash.run(p50/p95),
+  password_hash.rejected, auth.password_rehashed, auth.password_rehash_skipped
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+
+from app.utils import metrics
+
+HASH_WORKERS = int(os.getenv("HASHBROWN_PASSWORD_HASH_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("HASHBROWN_PASSWORD_HASH_MAX_QUEUE", "32"))
+# scrypt N = 2^SCRYPT_LN, r=8 → 해시 하나에 128 * 8 * 2^LN 바이트 (15 → 32MB)
+SCRYPT_LN = int(os.getenv("HASHBROWN_PASSWORD_SCRYPT_LN", "15"))
+
+pwd_context = CryptContext(
+    schemes=["scrypt"],
+    deprecated="auto",
+    scrypt__rounds=SCRYPT_LN,
+    scrypt__block_size=8,
+    scrypt__parallelism=1,
+)
+
+_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_lock = threading.Lock()
+_queued = 0   # 풀에 넣었지만 아직 끝나지 않은 작업 수
+
+
+class HashPoolBusy(RuntimeError):
+    """해시 풀 대기열이 가득 참 (잠시 후 재시도)"""
+
+
+def _legacy_hash(password: str, phone: str) -> str:
+    return hashlib.sha256((password + phone).encode()).hexdigest()
+
+
+def is_legacy_hash(stored_hash: str) -> bool:
+    """예전 방식 sha256 hex (64자, passlib 형식 아님)"""
+    return not stored_hash.startswith("$")
+
+
+async def _run(fn: Callable[..., Any], *args: Any) -> Any:
+    """fn(*args) 를 해시 전용 풀에서 실행하고 결과를 기다림 (이벤트 루프는 막지 않음)"""
+    global _queued
+    with _lock:
+        if _queued >= MAX_QUEUE:
+            metrics.incr("password_hash.rejected")
+            raise HashPoolBusy()
+        _queued += 1
+        metrics.set_gauge("password_hash.queue_depth", _queued)
+
+    submitted = time.perf_counter()
+
+    def _job():
+        started = time.perf_counter()
+        metrics.observe("password_hash.wait", started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe("password_hash.run", time.perf_counter() - started)
+
+    def _done(_):
+        global _queued
+        with _lock:
+            _queued -= 1
+            metrics.set_gauge("password_hash.queue_depth", _queued)
+
+    future = _pool.submit(_job)
+    future.add_done_callback(_done)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, phone: str, stored_hash: str) -> tuple[bool, str | None]:
+    """
+    반환값: (일치 여부, 새 해시)
+    - 새 해시는 예전 sha256 이거나 cost 설정이 바뀌어서 다시 저장해야 할 때만 (아니면 None)
+    - 예전 sha256 은 검증 자체가 가벼우므로 풀을 안 씀. 다시 해시하는 건 부가 작업이라
+      풀이 가득 찼으면 건너뜀 (로그인은 성공, 다음 로그인 때 다시 시도)
+    """
+    if is_legacy_hash(stored_hash):
+        if not hmac.compare_digest(_legacy_hash(password, phone), stored_hash):
+            return False, None
+        try:
+            return True, await hash_password(password)
+        except HashPoolBusy:
+            metrics.incr("auth.password_rehash_skipped")
+            return True, None
+    return await _run(pwd_context.verify_and_update, password, stored_hash)
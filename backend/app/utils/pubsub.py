@@ -0,0 +1,154 @@
+# app/utils/pubsub.py
+"""
+실시간 이벤트용 pub/sub (해시톡방 WebSocket 등).
+- publish() 는 동기 코드(라우터/스케줄러 스레드)에서 호출, subscribe() 는 이벤트 루프 안에서 호출
+- 기본 backend 는 프로세스 내부 메모리 (워커 1개 기준)
+  워커가 여러 개면 HASHBROWN_PUBSUB_BACKEND 로 register_backend() 한 다른 backend(redis 등)를 선택
+- DB 변경과 같이 나가는 이벤트는 publish_after_commit() 으로 commit 이 끝난 뒤에만 발행
+  (rollback 되면 버림)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100   # 구독자 1명당 밀려 있을 수 있는 최대 이벤트 수 (넘으면 버림)
+_PENDING_KEY = "pubsub_pending"
+
+
+def duel_channel(duel_id: int) -> str:
+    return f"duel:{duel_id}"
+
+
+class Subscription:
+    def __init__(self, channel: str) -> None:
+        self.channel = channel
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def _offer(self, message: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 느린 클라이언트 때문에 메모리가 쌓이지 않도록 버림 (클라이언트는 재접속 시 since_id 로 따라잡음)
+            metrics.incr("pubsub.dropped")
+
+    def deliver(self, message: dict[str, Any]) -> None:
+        """다른 스레드에서 호출해도 안전하게 이 구독자의 루프로 넘긴다."""
+        self._loop.call_soon_threadsafe(self._offer, message)
+
+    async def get(self) -> dict[str, Any]:
+        return await self._queue.get()
+
+
+class MemoryBackend:
+    """프로세스 내부 backend: 채널별 구독자 목록만 들고 있음"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: dict[str, set[Subscription]] = {}
+
+    def publish(self, channel: str, message: dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.deliver(message)
+            except RuntimeError:
+                # 구독자 루프가 이미 닫힌 경우
+                self.unsubscribe(sub)
+
+    def subscribe(self, channel: str) -> Subscription:
+        sub = Subscription(channel)
+        with self._lock:
+            self._subs.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.channel]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+_BACKENDS: dict[str, Callable[[], Any]] = {"memory": MemoryBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], Any]) -> None:
+    """
+    backend 추가. factory() 가 돌려주는 객체는 MemoryBackend 와 같은
+    publish / subscribe / unsubscribe / subscriber_count 를 가져야 한다.
+    """
+    _BACKENDS[name] = factory
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = os.getenv("HASHBROWN_PUBSUB_BACKEND", "memory")
+                if name not in _BACKENDS:
+                    raise RuntimeError(f"unknown pubsub backend: {name}")
+                _backend = _BACKENDS[name]()
+    return _backend
+
+
+# ---------- 외부에서 쓰는 함수 ----------
+def publish(channel: str, message: dict[str, Any]) -> None:
+    metrics.incr("pubsub.published")
+    get_backend().publish(channel, message)
+
+
+def subscribe(channel: str) -> Subscription:
+    backend = get_backend()
+    sub = backend.subscribe(channel)
+    metrics.set_gauge("pubsub.subscribers", backend.subscriber_count())
+    return sub
+
+
+def unsubscribe(sub: Subscription) -> None:
+    backend = get_backend()
+    backend.unsubscribe(sub)
+    metrics.set_gauge("pubsub.subscribers", backend.subscriber_count())
+
+
+def publish_after_commit(db: Session, channel: str, message: dict[str, Any]) -> None:
+    """이 세션이 commit 된 뒤에 발행 (rollback 되면 발행하지 않음)"""
+    db.info.setdefault(_PENDING_KEY, []).append((channel, message))
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for channel, message in pending:
+        try:
+            publish(channel, message)
+        except Exception:  # pylint: disable=broad-except
+            # 이벤트 발행 실패가 이미 commit 된 요청을 깨면 안 됨
+            logger.exception("pubsub publish failed: %s", channel)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,209 @@
+# app/utils/wallet.py
+"""
+해시(hb_balance) 변경은 전부 여기를 거친다.
+- 잔액은 조건부 UPDATE 한 번으로 증감 (hb_balance = hb_balance + :d WHERE hb_balance + :d >= 0)
+  → 읽고-계산하고-쓰는 사이에 다른 요청이 끼어들어 값이 사라지는 문제가 없음
+- 같은 트랜잭션에 WalletTransaction 을 남겨서 잔액 == 거래 내역 합계 가 유지되도록
+- commit 은 호출한 쪽에서 (다른 변경과 한 번에). 잔액이 바뀐 유저의 principal 캐시는 commit 후 지움
+스케줄러용:
+- refresh_wallet_snapshots: 유저별 last_tx_id 이후 거래만 읽어서 스냅샷(누적합)에 더함
+- reconcile_wallets: users.hb_balance == 스냅샷 + 스냅샷 이후 거래 합계 인지 확인 (원장 전체를 다시 더하지 않음)
+"""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.wallet import WalletSnapshot, WalletTransaction
+from app.utils import metrics
+from app.utils.principal import invalidate_principal
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BATCH_SIZE = 1000
+SNAPSHOT_MAX_BATCHES = 20          # tick 한 번에 처리할 최대 배치 수 (밀린 건 다음 tick 에)
+# 다른 트랜잭션이 더 작은 id 로 늦게 commit 될 수 있으니, 매번 반영 위치보다 이만큼 뒤의 id 부터 다시 훑음
+SNAPSHOT_RESCAN_IDS = int(os.getenv("HASHBROWN_WALLET_SNAPSHOT_RESCAN_IDS", "5000"))
+RECONCILE_BATCH_SIZE = 500
+
+
+def apply_hb_delta(
+    db: Session,
+    user_id: int,
+    amount: int,
+    reason: str,
+    ref_table: str | None = None,
+    ref_id: int | None = None,
+) -> bool:
+    """
+    user_id 의 해시를 amount 만큼 증감하고 거래 내역을 기록.
+    - amount: +획득 / -차감
+    - reason: "duel_reward", "shop_purchase" 등 (wallet_transactions.reason)
+    반환값: 잔액이 부족해서(또는 유저가 없어서) 적용하지 못했으면 False
+    """
+    if amount == 0:
+        return True
+
+    result = db.execute(
+        update(User)
+        .where(
+            User.id == user_id,
+            User.hb_balance + amount >= 0,
+        )
+        .values(hb_balance=User.hb_balance + amount)
+    )
+    if result.rowcount != 1:
+        return False
+    invalidate_principal(db, user_id)
+
+    db.add(
+        WalletTransaction(
+            user_id=user_id,
+            amount=amount,
+            reason=reason,
+            ref_table=ref_table,
+            ref_id=ref_id,
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+    return True
+
+
+def refresh_wallet_snapshots(
+    db: Session,
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+    max_batches: int = SNAPSHOT_MAX_BATCHES,
+) -> int:
+    """
+    wallet_transactions 를 id 순으로 읽어서 거래가 생긴 유저를 찾고,
+    그 유저의 스냅샷(last_tx_id) 이후 거래 합계를 wallet_snapshots 에 더한다 (배치마다 commit).
+    - 진행 위치는 유저별 last_tx_id. 한 유저의 거래는 users 행 잠금(apply_hb_delta 의 조건부 UPDATE) 때문에
+      id 순서대로 commit 되므로, 유저별로 (last_tx_id, 본 id] 를 (user_id, id) 인덱스로 더하면 빠지는 거래가 없음
+    - 다른 유저의 거래는 더 작은 id 로 늦게 commit 될 수 있으므로
+      스캔은 전체 최댓값 last_tx_id 보다 SNAPSHOT_RESCAN_IDS 만큼 뒤에서부터 다시 시작
+      (그보다 더 늦은 거래는 그 유저의 다음 거래 때 같이 반영되고, 그 전까지도 reconcile 은 last_tx_id 기준이라 맞음)
+    반환값: 반영한 거래 수
+    """
+    now_utc = datetime.now(timezone.utc)
+    watermark = db.scalar(select(func.max(WalletSnapshot.last_tx_id))) or 0
+    last_id = max(0, watermark - SNAPSHOT_RESCAN_IDS)
+
+    applied = 0
+    for _ in range(max_batches):
+        txs = db.execute(
+            select(WalletTransaction.id, WalletTransaction.user_id)
+            .where(WalletTransaction.id > last_id)
+            .order_by(WalletTransaction.id)
+            .limit(batch_size)
+        ).all()
+        if not txs:
+            break
+        last_id = txs[-1].id
+
+        # 유저별 (스냅샷 이후 ~ 이번 배치 끝) 거래 합계. 이미 반영한 유저는 행이 안 나옴
+        sums = db.execute(
+            select(
+                WalletTransaction.user_id,
+                func.sum(WalletTransaction.amount),
+                func.count(),
+                func.max(WalletTransaction.id),
+            )
+            .outerjoin(WalletSnapshot, WalletSnapshot.user_id == WalletTransaction.user_id)
+            .where(
+                WalletTransaction.user_id.in_({tx.user_id for tx in txs}),
+                WalletTransaction.id > func.coalesce(WalletSnapshot.last_tx_id, 0),
+                WalletTransaction.id <= last_id,
+            )
+            .group_by(WalletTransaction.user_id)
+        ).all()
+
+        if sums:
+            snapshots = {
+                s.user_id: s
+                for s in db.scalars(
+                    select(WalletSnapshot).where(WalletSnapshot.user_id.in_([user_id for user_id, *_ in sums]))
+                ).all()
+            }
+            for user_id, delta, count, max_tx_id in sums:
+                snap = snapshots.get(user_id)
+                if snap is None:
+                    snap = WalletSnapshot(user_id=user_id, balance=0, last_tx_id=0)
+                    db.add(snap)
+                snap.balance += int(delta or 0)
+                snap.last_tx_id = max_tx_id
+                snap.updated_at = now_utc
+                applied += count
+        db.commit()
+
+        if len(txs) < batch_size:
+            break
+
+    metrics.incr("wallet.snapshot_applied", applied)
+    return applied
+
+
+def reconcile_wallets(db: Session, batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """
+    스냅샷이 있는 유저마다 users.hb_balance 와 (스냅샷 + 이후 거래 합계) 를 비교.
+    - 유저 id 순으로 batch_size 명씩, 배치당 쿼리 3번 (스냅샷 / 잔액 / delta 합계)
+    - delta 는 (user_id, id) 인덱스로 스냅샷 이후 거래만 읽음
+    - 값은 고치지 않고 로그 + metrics 로만 남김 (원장 도입 전 잔액이 있는 유저도 여기서 드러남)
+    반환값: 불일치 유저 수
+    """
+    mismatched = 0
+    checked = 0
+    last_user_id = 0
+    while True:
+        snaps = db.scalars(
+            select(WalletSnapshot)
+            .where(WalletSnapshot.user_id > last_user_id)
+            .order_by(WalletSnapshot.user_id)
+            .limit(batch_size)
+        ).all()
+        if not snaps:
+            break
+        last_user_id = snaps[-1].user_id
+        user_ids = [s.user_id for s in snaps]
+
+        balances = dict(
+            db.execute(select(User.id, User.hb_balance).where(User.id.in_(user_ids))).all()
+        )
+        # (user_id, id > last_tx_id) 조건은 유저마다 달라서 스냅샷과 JOIN 해서 한 번에
+        deltas = dict(
+            db.execute(
+                select(WalletTransaction.user_id, func.sum(WalletTransaction.amount))
+                .join(
+                    WalletSnapshot,
+                    (WalletSnapshot.user_id == WalletTransaction.user_id)
+                    & (WalletTransaction.id > WalletSnapshot.last_tx_id),
+                )
+                .where(WalletTransaction.user_id.in_(user_ids))
+                .group_by(WalletTransaction.user_id)
+            ).all()
+        )
+
+        for snap in snaps:
+            if snap.user_id not in balances:
+                continue
+            expected = snap.balance + int(deltas.get(snap.user_id) or 0)
+            actual = balances[snap.user_id] or 0
+            if expected != actual:
+                mismatched += 1
+                logger.warning(
+                    "wallet mismatch: user=%d hb_balance=%d ledger=%d (snapshot=%d@%d)",
+                    snap.user_id, actual, expected, snap.balance, snap.last_tx_id,
+                )
+        checked += len(snaps)
+        db.rollback()   # 읽기만 했으니 스냅샷 트랜잭션 정리
+
+        if len(snaps) < batch_size:
+            break
+
+    metrics.set_gauge("wallet.reconcile_checked", checked)
+    metrics.set_gauge("wallet.reconcile_mismatched", mismatched)
+    return mismatched
@@ -0,0 +1,130 @@
+# benchmarks/bench_async_routes.py
+"""
+async 로 옮긴 핫 경로(홈 / 알림 / 진행 중 듀얼 / 해시톡방 / 감자캐기)의 처리량 벤치마크.
+- 동시 클라이언트 수(기본 50 / 200 / 1000)별로 요청/초, p50, p99, 실패 수
+- 비교용: 같은 unread-count 조회를 sync Session + def 라우트로 만든 /_bench/sync/unread-count
+  (def 라우트는 요청마다 AnyIO 워커 스레드를 잡으므로 스레드풀 크기에서 막힘)
+- --base-url 을 주면 떠 있는 서버(uvicorn)로, 없으면 같은 프로세스에서 ASGI 로 바로 호출
+  (ASGI 모드에서는 비교용 sync 라우트가 추가됨. 서버 모드에선 그 라우트는 건너뜀)
+- DB 는 HASHBROWN_DB_URL / HASHBROWN_ASYNC_DB_URL (로컬 MySQL), 토큰은 --user-id 유저로 만듦
+- 해시톡방(/duels/{id}/conversation)은 --duel-id 를 줄 때만 (--user-id 유저가 참가한 듀얼이어야 함)
+- httpx 가 필요함: pip install -r requirements-dev.txt
+
+실행 (backend 에서):
+    HASHBROWN_SCHEDULER=off python -m benchmarks.bench_async_routes --user-id 1 --duel-id 1 --requests 2000 --concurrency 50 200 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_async_engine, get_db
+from app.routers.register import create_access_token, get_current_user
+from app.utils.notifications import get_unread_count
+from app.utils.principal import Principal
+
+ROUTES = [
+    "/notifications/unread-count",
+    "/notifications?limit=20",
+    "/duels/active",
+    "/home/summary",
+    "/potato/farmers",
+]
+CONVERSATION_ROUTE = "/duels/{duel_id}/conversation"
+SYNC_BASELINE = "/_bench/sync/unread-count"
+
+baseline_router = APIRouter()
+
+
+@baseline_router.get(SYNC_BASELINE)
+def sync_unread_count(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    return {"unread_count": get_unread_count(db, current_user.id)}
+
+
+async def _run(client: httpx.AsyncClient, path: str, headers: dict, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                r = await client.get(path, headers=headers)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return {
+        "per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": p99 * 1000,
+        "errors": errors,
+    }
+
+
+async def _main(args) -> None:
+    headers = {"Authorization": f"Bearer {create_access_token(args.user_id)}"}
+    routes = list(args.routes)
+    if args.duel_id is not None:
+        routes.append(CONVERSATION_ROUTE.format(duel_id=args.duel_id))
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60)
+    else:
+        from app.main import app
+
+        app.include_router(baseline_router)
+        routes.append(SYNC_BASELINE)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    try:
+        async with client:
+            for path in routes:
+                await client.get(path, headers=headers)   # 커넥션 풀 / 캐시 예열
+                for concurrency in args.concurrency:
+                    r = await _run(client, path, headers, args.requests, concurrency)
+                    print(
+                        f"{path:32} clients={concurrency:5d}  {r['per_sec']:8.1f} req/s  "
+                        f"p50={r['p50_ms']:8.1f}ms  p99={r['p99_ms']:8.1f}ms  errors={r['errors']}"
+                    )
+    finally:
+        # 풀에 남은 async 커넥션을 닫아야 프로세스가 끝남
+        await get_async_engine().dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--duel-id", type=int, default=None, help="해시톡방 조회를 잴 듀얼 (--user-id 가 참가자)")
+    parser.add_argument("--requests", type=int, default=2000, help="경로 / 동시 접속 수 조합마다 보낼 요청 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--routes", nargs="+", default=ROUTES)
+    parser.add_argument("--base-url", default=None, help="예: http://127.0.0.1:8000 (없으면 프로세스 안에서 ASGI 로 호출)")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_habit_search.py
+"""
+습관 제목 검색 쿼리 벤치마크 (MySQL 전용, HASHBROWN_DB_URL 의 DB 를 그대로 씀).
+- old: 한 WHERE 에 MATCH(...) > 0 OR title LIKE 'q%' (예전 방식 → 두 인덱스 모두 못 타고 풀 스캔)
+- new: habits._title_search (FULLTEXT 결과 UNION ALL 접두 일치 결과)
+- 검색어별로 EXPLAIN 의 접근 방식(type / key / rows) 과 p50 / p99 를 출력
+- --seed N 을 주면 먼저 벤치마크용 유저 1명 + user_habits N 개를 넣음 (끝나도 지우지 않음)
+
+실행 (backend 에서):
+    HASHBROWN_DB_URL=mysql+pymysql://... python -m benchmarks.bench_habit_search --seed 1000000 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, time as time_t, timezone
+
+from sqlalchemy import func, insert, or_, select, text
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.user_habit import UserHabit
+from app.routers import habits
+
+_WORDS = ["물", "마시기", "아침", "운동", "독서", "영어", "단어", "산책", "명상", "일기", "스트레칭", "공부", "코딩", "요가", "달리기"]
+SEED_BATCH = 10_000
+
+
+def _seed(db, rows: int) -> None:
+    user = User(phone=f"bench-{time.time_ns()}", password_hash="x", name="bench", created_at=datetime.now(timezone.utc))
+    db.add(user)
+    db.flush()
+    rng = random.Random(0)
+    for start in range(0, rows, SEED_BATCH):
+        db.execute(
+            insert(UserHabit.__table__),
+            [
+                {
+                    "user_id": user.id,
+                    "title": " ".join(rng.sample(_WORDS, rng.randint(1, 3)))[:50],
+                    "method": "text",
+                    "deadline_local": time_t(21),
+                    "days_of_week": 127,
+                    "period_start": date(2026, 1, 1),
+                    "period_end": date(2026, 12, 31),
+                    "is_active": True,
+                    "status": "active",
+                    "difficulty": 1,
+                }
+                for _ in range(min(SEED_BATCH, rows - start))
+            ],
+        )
+        db.commit()
+    print(f"seeded {rows:,} user_habits")
+
+
+def _old_query(q: str):
+    """예전 _title_search: OR 조건 하나 + 점수 식"""
+    prefix = UserHabit.title.startswith(q, autoescape=True)
+    relevance = mysql_match(UserHabit.title, against=q).in_boolean_mode()
+    return (
+        select(UserHabit.id, relevance.label("score"))
+        .where(or_(relevance > 0, prefix))
+        .order_by(relevance.desc(), UserHabit.id.desc())
+        .limit(habits.SEARCH_PAGE_SIZE + 1)
+    )
+
+
+def _new_query(db, q: str):
+    hits = habits._title_search(db, q)
+    return (
+        select(UserHabit.id, hits.c.score)
+        .join(hits, hits.c.id == UserHabit.id)
+        .order_by(hits.c.score.desc(), UserHabit.id.desc())
+        .limit(habits.SEARCH_PAGE_SIZE + 1)
+    )
+
+
+def _explain(db, stmt) -> str:
+    compiled = stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    rows = db.execute(text(f"EXPLAIN {compiled}")).mappings().all()
+    return "; ".join(f"{r['table']}:{r['type']}/{r['key']}/{r['rows']}" for r in rows)
+
+
+def _time(db, stmt, repeat: int) -> tuple[float, float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(stmt).all()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--queries", nargs="+", default=["물", "운동", "마시기", "스트레칭", "없는검색어"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "mysql":
+            raise SystemExit("MySQL 전용 벤치마크입니다 (FULLTEXT 인덱스 필요)")
+        if args.seed:
+            _seed(db, args.seed)
+        print(f"user_habits: {db.scalar(select(func.count()).select_from(UserHabit)):,} rows")
+
+        for q in args.queries:
+            for name, stmt in (("old", _old_query(q)), ("new", _new_query(db, q))):
+                p50, p99 = _time(db, stmt, args.repeat)
+                print(f"{q!r:14} {name}  p50={p50:8.2f}ms  p99={p99:8.2f}ms  {_explain(db, stmt)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_password_hash.py
+"""
+로그인 비밀번호 검증 처리량 벤치마크 (DB 없이 해시 풀만).
+- 고정 cost(HASHBROWN_PASSWORD_SCRYPT_LN) 로 만든 해시를 동시 접속 수별로 verify_password
+- 풀 크기 / 대기열은 HASHBROWN_PASSWORD_HASH_WORKERS / HASHBROWN_PASSWORD_HASH_MAX_QUEUE
+- 대기열을 넘은 요청(HashPoolBusy = 실제로는 503)은 rejected 로 따로 셈
+
+실행 (backend 에서):
+    HASHBROWN_PASSWORD_SCRYPT_LN=15 python -m benchmarks.bench_password_hash --requests 200 --concurrency 1 8 32
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import time
+
+from app.utils import passwords
+
+
+async def _login(password: str, phone: str, stored_hash: str, latencies: list[float]) -> bool:
+    started = time.perf_counter()
+    try:
+        ok, _ = await passwords.verify_password(password, phone, stored_hash)
+    except passwords.HashPoolBusy:
+        return False
+    latencies.append(time.perf_counter() - started)
+    return ok
+
+
+async def _run(stored_hash: str, requests: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    rejected = 0
+
+    async def one():
+        nonlocal rejected
+        async with sem:
+            if not await _login("secret1", "01012345678", stored_hash, latencies):
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return {
+        "ok": len(latencies),
+        "rejected": rejected,
+        "per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": p99 * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print(
+        f"scrypt ln={passwords.SCRYPT_LN} workers={passwords.HASH_WORKERS} max_queue={passwords.MAX_QUEUE}"
+    )
+
+    # 비교용: 예전 sha256 검증 (풀 안 씀, 재해시 없는 순수 비교 비용)
+    legacy = hashlib.sha256(b"secret101012345678").hexdigest()
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        passwords.is_legacy_hash(legacy) and passwords._legacy_hash("secret1", "01012345678") == legacy
+    print(f"legacy sha256 verify: {args.requests / (time.perf_counter() - started):,.0f}/s")
+
+    stored_hash = passwords.pwd_context.hash("secret1")
+    for concurrency in args.concurrency:
+        r = asyncio.run(_run(stored_hash, args.requests, concurrency))
+        print(
+            f"concurrency={concurrency:4d}  ok={r['ok']:5d}  rejected={r['rejected']:5d}  "
+            f"{r['per_sec']:8.1f} logins/s  p50={r['p50_ms']:8.1f}ms  p99={r['p99_ms']:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# tests/conftest.py
+"""
+테스트 공통 설정.
+- DB 는 임시 sqlite 파일 (app 을 import 하기 전에 HASHBROWN_DB_URL 을 바꿔 둠, 실제 MySQL 은 건드리지 않음)
+  async 라우터는 sqlite+aiosqlite 로 같은 파일을 씀
+- 테스트 의존성(pytest / httpx / aiosqlite)은 requirements-dev.txt: pip install -r requirements-dev.txt
+- 스케줄러는 끔 (HASHBROWN_SCHEDULER=off)
+- 테스트마다 테이블을 새로 만들고 프로세스 캐시(principal / 홈 요약 / 농부 카드)를 비움
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="hashbrown-tests-")
+DB_PATH = os.path.join(_DB_DIR, "test.db")
+os.environ["HASHBROWN_DB_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("HASHBROWN_ASYNC_DB_URL", None)
+os.environ["HASHBROWN_SCHEDULER"] = "off"
+
+from sqlalchemy import BigInteger  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # sqlite 는 INTEGER PRIMARY KEY 만 자동 증가 → BIGINT PK 도 INTEGER 로
+    return "INTEGER"
+
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.base import Base, create_all  # noqa: E402
+from app.utils.farmer_cards import farmer_card_cache  # noqa: E402
+from app.utils.home_summary import home_summary_cache  # noqa: E402
+from app.utils.principal import principal_cache  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    create_all()
+    for cache in (principal_cache, home_summary_cache, farmer_card_cache):
+        cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """make_user(nickname=...) → commit 된 User"""
+    from app.models.user import User
+
+    counter = {"n": 0}
+
+    def _make(**fields) -> User:
+        counter["n"] += 1
+        user = User(
+            phone=f"010{counter['n']:08d}",
+            password_hash="x",
+            name=fields.pop("name", f"user{counter['n']}"),
+            created_at=datetime.now(timezone.utc),
+            **fields,
+        )
+        db.add(user)
+        db.commit()
+        return user
+
+    return _make
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(user_id) → Authorization 헤더"""
+    from app.routers.register import create_access_token
+
+    def _headers(user_id: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    return _headers
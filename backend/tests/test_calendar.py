@@ -0,0 +1,82 @@
+# tests/test_calendar.py
+"""
+app/utils/calendar.py 를 하루씩 도는 단순 구현과 비교 (무작위 마스크 / 기간, 시드 고정).
+
+실행 (backend 에서):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.utils import calendar
+
+CASES = 1000
+
+
+def _naive_dates(mask: int, start: date, end: date) -> list[date]:
+    days = []
+    d = start
+    while d <= end:
+        if mask & (1 << d.weekday()):
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _random_cases(seed: int):
+    rng = random.Random(seed)
+    base = date(2024, 1, 1)
+    for _ in range(CASES):
+        mask = rng.randint(0, calendar.ALL_WEEKDAYS)
+        start = base + timedelta(days=rng.randint(0, 800))
+        # 끝이 시작보다 앞선 기간(빈 기간)도 섞음
+        end = start + timedelta(days=rng.randint(-3, 400))
+        yield mask, start, end
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_and_iter_match_naive(seed):
+    for mask, start, end in _random_cases(seed):
+        expected = _naive_dates(mask, start, end)
+        assert list(calendar.iter_scheduled_dates(mask, start, end)) == expected, (mask, start, end)
+        assert calendar.count_scheduled_days(mask, start, end) == len(expected), (mask, start, end)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_hits_matches_naive(seed):
+    rng = random.Random(1000 + seed)
+    for mask, start, end in _random_cases(seed):
+        # 기간 앞뒤로 벗어난 날짜와 중복 날짜도 섞음
+        days = [start + timedelta(days=rng.randint(-10, 410)) for _ in range(rng.randint(0, 30))]
+        days += days[: len(days) // 3]
+        scheduled = set(_naive_dates(mask, start, end))
+        expected = len({d for d in days if d in scheduled})
+        assert calendar.count_scheduled_hits(mask, start, end, days) == expected, (mask, start, end, days)
+
+
+def test_many_versions_match_single():
+    cases = list(_random_cases(99))[:300]
+    assert calendar.count_scheduled_days_many(cases) == [calendar.count_scheduled_days(*c) for c in cases]
+
+    with_days = [(m, s, e, [s, e, s + timedelta(days=3)]) for m, s, e in cases]
+    assert calendar.count_scheduled_hits_many(with_days) == [
+        calendar.count_scheduled_hits(m, s, e, ds) for m, s, e, ds in with_days
+    ]
+
+
+def test_missing_period_or_mask_is_empty():
+    d = date(2025, 5, 5)
+    for mask, start, end in ((0, d, d), (calendar.ALL_WEEKDAYS, None, d), (calendar.ALL_WEEKDAYS, d, None)):
+        assert calendar.count_scheduled_days(mask, start, end) == 0
+        assert list(calendar.iter_scheduled_dates(mask, start, end)) == []
+        assert calendar.count_scheduled_hits(mask, start, end, [d]) == 0
+
+
+def test_weekday_bits():
+    monday = date(2025, 5, 5)
+    assert [calendar.weekday_bit(monday + timedelta(days=i)) for i in range(7)] == [1, 2, 4, 8, 16, 32, 64]
+    assert calendar.encode_weekdays([1, 3, 7, 0, 8]) == 1 | 4 | 64
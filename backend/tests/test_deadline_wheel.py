@@ -0,0 +1,60 @@
+# tests/test_deadline_wheel.py
+"""
+DeadlineWheel.sync 가 다른 프로세스에서 생긴 변경(track() 없이 DB 만 바뀐 경우)을 다음 tick 에 반영하는지.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import update
+
+from app.models.user_habit import UserHabit
+from app.routers.certification import KST
+from app.utils.deadline_wheel import DeadlineWheel
+
+
+def _habit(db, user_id: int, deadline: time) -> UserHabit:
+    habit = UserHabit(
+        user_id=user_id,
+        title="물 마시기",
+        method="text",
+        deadline_local=deadline,
+        days_of_week=127,
+        period_start=date(2026, 1, 1),
+        period_end=date(2027, 1, 1),
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(habit)
+    db.commit()
+    return habit
+
+
+def _due(wheel: DeadlineWheel, since: time, until: time) -> list[int]:
+    day = date(2026, 10, 19)
+    return [
+        habit_id
+        for _, ids in wheel.passed_between(
+            datetime.combine(day, since, tzinfo=KST), datetime.combine(day, until, tzinfo=KST)
+        )
+        for habit_id in ids
+    ]
+
+
+def test_sync_picks_up_changes_from_other_processes(db, make_user):
+    user = make_user()
+    moved = _habit(db, user.id, time(21, 0))
+    ended = _habit(db, user.id, time(9, 0))
+
+    wheel = DeadlineWheel()
+    wheel.sync(db)   # 처음엔 전체 구성
+    assert _due(wheel, time(8, 0), time(22, 0)) == [ended.id, moved.id]
+
+    # 다른 프로세스: 마감시간을 앞당기고, 습관 하나는 종료, 새 습관 추가 (이 프로세스의 wheel.track() 없음)
+    db.execute(update(UserHabit).where(UserHabit.id == moved.id).values(deadline_local=time(12, 30)))
+    db.execute(update(UserHabit).where(UserHabit.id == ended.id).values(is_active=False))
+    db.commit()
+    added = _habit(db, user.id, time(13, 0))
+
+    wheel.sync(db)   # 전체 재구성 주기 전: 새 id + 수정된 행만 다시 읽음
+    assert _due(wheel, time(12, 0), time(12, 45)) == [moved.id]
+    assert _due(wheel, time(8, 0), time(22, 0)) == [moved.id, added.id]
@@ -0,0 +1,174 @@
+# tests/test_duel_conversation.py
+"""
+GET /duels/{id}/conversation
+- 쿼리 수 고정 확인 (메시지 1 / 10 / 100 개, 사진 포함): 듀얼 / 상대 / 메시지 / 습관 제목 / 사진 URL
+- 최신 / before / after / since_id 페이지 내용과 각 모드의 쿼리 수
+- 잘못된 cursor / 모드 중복은 400
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import event
+
+from app.database import get_async_engine
+from app.models.certification import Certification
+from app.models.duel import Duel
+from app.models.media import MediaAsset
+from app.models.user_habit import UserHabit
+
+QUERIES_PER_PAGE = 5
+BASE_TS = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _setup_duel(db, make_user):
+    me, rival = make_user(nickname="me"), make_user(nickname="rival")
+    now = datetime.now(timezone.utc)
+    duel = Duel(
+        owner_user_id=me.id,
+        challenger_user_id=rival.id,
+        habit_title="물 마시기 vs 책 읽기",
+        method="photo",
+        deadline_local=time(23, 0),
+        days_of_week=127,
+        start_date=date(2026, 1, 1),
+        end_date=date(2027, 1, 1),
+        owner_stake=1,
+        challenger_stake=1,
+        status="active",
+        created_at=now,
+    )
+    db.add(duel)
+    db.flush()
+    habits = {}
+    for user, title in ((me, "물 마시기"), (rival, "책 읽기")):
+        uh = UserHabit(
+            user_id=user.id,
+            title=title,
+            method="photo",
+            deadline_local=time(23, 0),
+            days_of_week=127,
+            period_start=date(2026, 1, 1),
+            period_end=date(2027, 1, 1),
+            duel_id=duel.id,
+            created_at=now,
+        )
+        db.add(uh)
+        habits[user.id] = uh
+    db.commit()
+    return me, rival, duel, habits
+
+
+def _add_messages(db, duel, habits, start: int, stop: int) -> None:
+    """메시지 i: 두 사람이 번갈아, 짝수 번째는 사진 인증 (i 분 뒤, 습관마다 날짜가 겹치지 않게)"""
+    user_ids = [duel.owner_user_id, duel.challenger_user_id]
+    for i in range(start, stop):
+        user_id = user_ids[i % 2]
+        asset_id = None
+        if i % 2 == 0:
+            asset = MediaAsset(uploader_id=user_id, storage_url=f"/uploads/{i}.jpg", created_at=BASE_TS)
+            db.add(asset)
+            db.flush()
+            asset_id = asset.id
+        db.add(
+            Certification(
+                user_id=user_id,
+                user_habit_id=habits[user_id].id,
+                duel_id=duel.id,
+                ts_utc=BASE_TS + timedelta(minutes=i),
+                method="photo" if asset_id else "text",
+                text_content=None if asset_id else f"인증 {i}",
+                photo_asset_id=asset_id,
+                status="success",
+                cert_date=date(2026, 3, 1) + timedelta(days=i),
+            )
+        )
+    db.commit()
+
+
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self._engine = get_async_engine().sync_engine
+
+    def _count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self._engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self._engine, "before_cursor_execute", self._count)
+
+
+def _texts(body) -> list[str]:
+    return [m["text_content"] or m["photo_url"] for m in body["messages"]]
+
+
+def _expected(indexes) -> list[str]:
+    return [f"/uploads/{i}.jpg" if i % 2 == 0 else f"인증 {i}" for i in indexes]
+
+
+def test_conversation_query_count_is_constant(db, make_user, client, auth_headers):
+    me, _, duel, habits = _setup_duel(db, make_user)
+    headers = auth_headers(me.id)
+    url = f"/duels/{duel.id}/conversation"
+    client.get(url, headers=headers)   # principal 캐시 채우기
+
+    counts = {}
+    total = 0
+    with _QueryCounter() as counter:
+        for target in (1, 10, 100):
+            _add_messages(db, duel, habits, total, target)
+            total = target
+
+            counter.statements.clear()
+            body = client.get(url, params={"limit": 200}, headers=headers).json()
+            counts[target] = len(counter.statements)
+
+            assert _texts(body) == _expected(range(target))
+            assert [m["habit_title"] for m in body["messages"]] == [("물 마시기", "책 읽기")[i % 2] for i in range(target)]
+            assert body["has_more"] is False
+
+    assert counts[1] == counts[10] == counts[100] == QUERIES_PER_PAGE, counts
+
+
+def test_conversation_paging_modes(db, make_user, client, auth_headers):
+    me, _, duel, habits = _setup_duel(db, make_user)
+    _add_messages(db, duel, habits, 0, 100)
+    headers = auth_headers(me.id)
+    url = f"/duels/{duel.id}/conversation"
+    client.get(url, headers=headers)   # principal 캐시 채우기
+
+    with _QueryCounter() as counter:
+        latest = client.get(url, params={"limit": 30}, headers=headers).json()
+        assert _texts(latest) == _expected(range(70, 100))
+        assert latest["has_more"] is True
+
+        older = client.get(url, params={"limit": 30, "before": latest["before_cursor"]}, headers=headers).json()
+        assert _texts(older) == _expected(range(40, 70))
+        assert older["has_more"] is True
+
+        newer = client.get(url, params={"limit": 20, "after": older["after_cursor"]}, headers=headers).json()
+        assert _texts(newer) == _expected(range(70, 90))
+        assert newer["has_more"] is True
+
+        since_id = latest["messages"][-6]["id"]   # 메시지 94
+        polled = client.get(url, params={"since_id": since_id}, headers=headers).json()
+        assert _texts(polled) == _expected(range(95, 100))
+        assert polled["has_more"] is False
+
+    # 네 번 모두 페이지당 같은 쿼리 수
+    assert len(counter.statements) == 4 * QUERIES_PER_PAGE, counter.statements
+
+
+def test_conversation_bad_cursor(db, make_user, client, auth_headers):
+    me, _, duel, habits = _setup_duel(db, make_user)
+    _add_messages(db, duel, habits, 0, 3)
+    headers = auth_headers(me.id)
+    url = f"/duels/{duel.id}/conversation"
+
+    for params in ({"before": "nope"}, {"after": "bm9wZQ"}, {"before": "x", "since_id": 1}):
+        r = client.get(url, params=params, headers=headers)
+        assert r.status_code == 400, (params, r.text)
@@ -0,0 +1,81 @@
+# tests/test_duels_active.py
+"""
+GET /duels/active 쿼리 수 고정 확인 (듀얼 1 / 10 / 100 개).
+- 인증(principal) 캐시를 채운 뒤 재므로 나오는 쿼리는 목록 조회뿐이어야 함
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import event
+
+from app.database import get_async_engine
+from app.models.duel import Duel
+from app.models.user_habit import UserHabit
+
+
+def _add_duels(db, make_user, me, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    for _ in range(count):
+        rival = make_user()
+        duel = Duel(
+            owner_user_id=me.id,
+            challenger_user_id=rival.id,
+            habit_title="물 마시기",
+            method="text",
+            deadline_local=time(23, 0),
+            days_of_week=127,
+            start_date=date(2026, 1, 1),
+            end_date=date(2027, 1, 1),
+            owner_stake=1,
+            challenger_stake=1,
+            status="active",
+            created_at=now,
+        )
+        db.add(duel)
+        db.flush()
+        for user, title in ((me, "내 습관"), (rival, "상대 습관")):
+            db.add(
+                UserHabit(
+                    user_id=user.id,
+                    title=title,
+                    method="text",
+                    deadline_local=time(23, 0),
+                    days_of_week=127,
+                    period_start=date(2026, 1, 1),
+                    period_end=date(2027, 1, 1),
+                    duel_id=duel.id,
+                    created_at=now,
+                )
+            )
+    db.commit()
+
+
+def test_active_duels_query_count_is_constant(db, make_user, client, auth_headers):
+    me = make_user(nickname="me")
+    headers = auth_headers(me.id)
+    client.get("/duels/active", headers=headers)   # principal 캐시 채우기
+
+    statements: list[str] = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sync_engine = get_async_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _count)
+    try:
+        counts = {}
+        total = 0
+        for target in (1, 10, 100):
+            _add_duels(db, make_user, me, target - total)
+            total = target
+
+            statements.clear()
+            items = client.get("/duels/active", headers=headers).json()
+            assert len(items) == target
+            assert {(i["my_habit_title"], i["rival_habit_title"]) for i in items} == {("내 습관", "상대 습관")}
+            counts[target] = len(statements)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _count)
+
+    assert counts[1] == counts[10] == counts[100] == 1, counts
@@ -0,0 +1,73 @@
+# tests/test_overdue_sweep.py
+"""
+sweep_overdue_habits
+- 듀얼 습관 auto-fail 을 해시톡방 채널로 발행하는지 (commit 뒤, 넣은 행만)
+- fail 이 들어간 유저의 홈 요약 캐시를 지우는지
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+
+from app.models.duel import Duel
+from app.models.user_habit import UserHabit
+from app.routers.certification import AUTO_FAIL_REASON, KST, sweep_overdue_habits
+from app.utils import pubsub
+from app.utils.home_summary import home_summary_cache
+
+
+def test_duel_auto_fail_is_published(db, make_user, monkeypatch):
+    published: list[tuple[str, dict]] = []
+    monkeypatch.setattr(pubsub, "publish", lambda channel, message: published.append((channel, message)))
+
+    me, rival = make_user(), make_user()
+    created_at = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    duel = Duel(
+        owner_user_id=me.id,
+        challenger_user_id=rival.id,
+        habit_title="물 마시기",
+        method="text",
+        deadline_local=time(9, 0),
+        days_of_week=127,
+        start_date=date(2026, 10, 1),
+        end_date=date(2026, 11, 1),
+        owner_stake=1,
+        challenger_stake=1,
+        status="active",
+        created_at=created_at,
+    )
+    db.add(duel)
+    db.flush()
+    for user_id, duel_id in ((me.id, duel.id), (rival.id, None)):
+        db.add(
+            UserHabit(
+                user_id=user_id,
+                title="물 마시기",
+                method="text",
+                deadline_local=time(9, 0),
+                days_of_week=127,
+                period_start=date(2026, 10, 1),
+                period_end=date(2026, 11, 1),
+                duel_id=duel_id,
+                created_at=created_at,
+            )
+        )
+    db.commit()
+
+    for user_id in (me.id, rival.id):
+        home_summary_cache.set(user_id, "cached")
+
+    now_kst = datetime(2026, 10, 19, 9, 30, tzinfo=KST)
+    assert sweep_overdue_habits(db, now_kst=now_kst) == 2
+    assert home_summary_cache.get(me.id) is None and home_summary_cache.get(rival.id) is None
+
+    # 듀얼이 아닌 습관의 fail 은 발행하지 않음
+    assert [channel for channel, _ in published] == [pubsub.duel_channel(duel.id)]
+    event = published[0][1]
+    assert event["type"] == "message" and event["duel_id"] == duel.id
+    assert event["message"]["user_id"] == me.id
+    assert event["message"]["status"] == "fail"
+    assert event["message"]["fail_reason"] == AUTO_FAIL_REASON
+
+    # 이미 fail 이 있는 날 다시 돌아도 새로 발행하지 않음
+    assert sweep_overdue_habits(db, now_kst=now_kst) == 0
+    assert len(published) == 1
@@ -0,0 +1,100 @@
+# tests/test_potato_match.py
+"""
+GET /potato/farmers?sort=match
+- 관심사가 겹치거나 팔로우 중인 후보가 점수순으로 먼저, 나머지는 가입순으로 이어짐
+- 페이지를 넘기는 사이에 새로 완료한 습관은 순서를 바꾸지 않음 (cursor 의 기준 시각에 고정)
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.models.habit import Habit
+from app.models.user import Follow, Interest, UserInterest
+from app.models.user_habit import UserHabit
+
+
+def _complete(db, user_id: int, completed_at: datetime, count: int = 1) -> None:
+    habit = Habit(owner_user_id=user_id, title="물 마시기", created_at=completed_at)
+    db.add(habit)
+    db.flush()
+    for _ in range(count):
+        db.add(
+            UserHabit(
+                user_id=user_id,
+                source_habit_id=habit.id,
+                title="물 마시기",
+                method="text",
+                deadline_local=time(23, 0),
+                days_of_week=127,
+                period_start=date(2026, 1, 1),
+                period_end=date(2026, 2, 1),
+                status="completed_success",
+                is_active=False,
+                completed_at=completed_at,
+                created_at=completed_at,
+            )
+        )
+    db.commit()
+
+
+def _pages(client, headers, limit: int, between_pages=None) -> list[int]:
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"sort": "match", "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/potato/farmers", params=params, headers=headers)
+        assert r.status_code == 200, r.text
+        seen += [f["user_id"] for f in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen
+        if between_pages is not None:
+            between_pages()
+
+
+def test_match_ranks_candidates_then_rest(db, make_user, client, auth_headers):
+    me = make_user()
+    run, read = Interest(name="운동"), Interest(name="독서")
+    db.add_all([run, read])
+    db.commit()
+
+    # followed 가 one 보다 먼저 가입 → 점수가 같아지면 followed 가 앞섬
+    both, followed, one, other, busy = (make_user(nickname=f"farmer{i}") for i in range(5))
+    long_ago = datetime.now(timezone.utc) - timedelta(days=90)
+    for user in (both, one, followed, other, busy):
+        _complete(db, user.id, long_ago)
+    _complete(db, busy.id, datetime.now(timezone.utc) - timedelta(days=1), count=3)   # 후보가 아니면 점수 없음
+    db.add_all(
+        [
+            UserInterest(user_id=me.id, interest_id=run.id),
+            UserInterest(user_id=me.id, interest_id=read.id),
+            UserInterest(user_id=both.id, interest_id=run.id),
+            UserInterest(user_id=both.id, interest_id=read.id),
+            UserInterest(user_id=one.id, interest_id=read.id),
+            Follow(follower_id=me.id, followee_id=followed.id, created_at=long_ago),
+        ]
+    )
+    db.commit()
+
+    expected = [both.id, one.id, followed.id, other.id, busy.id]
+    headers = auth_headers(me.id)
+    for limit in (1, 2, 3, 5, 10):
+        assert _pages(client, headers, limit) == expected, limit
+
+    # 첫 페이지 뒤에 followed 가 습관을 잔뜩 완료해도 (점수 +5 → one 과 동점) 이번 페이징 순서는 그대로
+    added = []
+
+    def _complete_once():
+        if not added:
+            _complete(db, followed.id, datetime.now(timezone.utc), count=5)
+            added.append(True)
+
+    assert _pages(client, headers, 1, between_pages=_complete_once) == expected
+
+
+def test_match_bad_cursor(db, make_user, client, auth_headers):
+    me = make_user()
+    r = client.get("/potato/farmers", params={"sort": "match", "cursor": "nope"}, headers=auth_headers(me.id))
+    assert r.status_code == 400
@@ -0,0 +1,185 @@
+# tests/test_wallet_ledger.py
+"""
+해시 잔액 부하 테스트: 여러 스레드가 실제 API 로 동시에
+- 도전장 스테이크 (POST /exchange-requests) → 내기 수락 스테이크 (POST /duels/from-exchange)
+  → 포기 정산 보상 (POST /duels/{id}/give-up)
+- 상점 구매 (POST /shop/orders)
+를 섞어서 보낸 뒤
+- 유저마다 users.hb_balance == wallet_transactions 합계, 잔액이 음수가 된 적 없음
+- 거래 수가 도메인 행과 맞음 (스테이크 = 교환 요청 + 내기, 보상 = 끝난 내기, 구매 = 주문)
+- 스냅샷 + reconcile 도 불일치 0
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.main import app
+from app.models.duel import Duel
+from app.models.exchange import ExchangeRequest
+from app.models.habit import Habit
+from app.models.shop import Order, ShopItem
+from app.models.user import User
+from app.models.user_habit import UserHabit
+from app.models.wallet import WalletTransaction
+from app.utils.wallet import apply_hb_delta, reconcile_wallets, refresh_wallet_snapshots
+
+USERS = 6
+JOBS = 120
+WORKERS = 8
+START_BALANCE = 30
+ITEM_PRICE = 7
+
+_local = threading.local()
+
+
+def _call(method: str, path: str, user_id: int, auth_headers, json: dict | None = None):
+    # 스레드마다 TestClient 하나
+    # sqlite 는 쓰기 잠금이 파일 단위라 잠기면 잠깐 기다렸다가 같은 요청을 다시 보냄 (MySQL 에서는 행 잠금)
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = TestClient(app)
+    for _ in range(50):
+        try:
+            return client.request(method, path, json=json, headers=auth_headers(user_id))
+        except OperationalError:
+            time.sleep(0.01)
+    raise AssertionError("database stayed locked")
+
+
+def _duel_chain(auth_headers, rng: random.Random, challenger, owner) -> None:
+    """도전장 → 수락 → 한 쪽 포기 (중간에 잔액 부족 등으로 거절되면 거기서 멈춤)"""
+    r = _call(
+        "POST", "/exchange-requests", challenger["user_id"], auth_headers,
+        {
+            "target_habit_id": owner["habit_id"],
+            "weekdays": [1, 2, 3, 4, 5, 6, 7],
+            "start_date": "2026-01-01",
+            "end_date": "2026-12-31",
+            "deadline": "23:00:00",
+            "difficulty": rng.randint(1, 5),
+            "method": "text",
+        },
+    )
+    if r.status_code != 201:
+        assert r.status_code in (400, 409), r.text
+        return
+
+    r = _call(
+        "POST", "/duels/from-exchange", owner["user_id"], auth_headers,
+        {
+            "exchange_request_id": r.json()["id"],
+            "opponent_user_habit_id": challenger["user_habit_id"],
+            "start_date": "2026-01-01",
+            "end_date": "2026-12-31",
+            "days_of_week": [1, 2, 3, 4, 5, 6, 7],
+            "deadline_local": "23:00:00",
+            "difficulty": 1,
+            "method": "text",
+        },
+    )
+    if r.status_code != 201:
+        assert r.status_code == 400, r.text
+        return
+
+    loser = rng.choice((challenger, owner))
+    r = _call("POST", f"/duels/{r.json()['duel_id']}/give-up", loser["user_id"], auth_headers)
+    assert r.status_code == 200, r.text
+
+
+def _buy(auth_headers, buyer, item_id: int) -> bool:
+    r = _call("POST", "/shop/orders", buyer["user_id"], auth_headers, {"item_id": item_id})
+    assert r.status_code in (200, 400), r.text
+    return r.status_code == 200
+
+
+def _farmer(db, make_user, n: int) -> dict:
+    """완료한 습관(원본 Habit 포함)이 있는 유저 → 도전장 대상 / 내기 상대로 쓸 수 있음"""
+    now = datetime.now(timezone.utc)
+    user = make_user(nickname=f"farmer{n}", hb_balance=0)
+    habit = Habit(owner_user_id=user.id, title=f"습관{n}", created_at=now)
+    db.add(habit)
+    db.flush()
+    done = UserHabit(
+        user_id=user.id,
+        source_habit_id=habit.id,
+        title=habit.title,
+        method="text",
+        deadline_local=datetime.min.time(),
+        days_of_week=127,
+        period_start=date(2025, 1, 1),
+        period_end=date(2025, 2, 1),
+        status="completed_success",
+        is_active=False,
+        completed_at=now,
+        created_at=now,
+        difficulty=n % 5 + 1,
+    )
+    db.add(done)
+    db.flush()
+    # 시작 잔액도 원장에 남김
+    assert apply_hb_delta(db, user.id, START_BALANCE, "attendance_reward")
+    db.commit()
+    return {"user_id": user.id, "habit_id": habit.id, "user_habit_id": done.id}
+
+
+def test_concurrent_balance_changes_match_ledger(db, make_user, auth_headers):
+    farmers = [_farmer(db, make_user, n) for n in range(USERS)]
+    item = ShopItem(name="물뿌리개", price_hb=ITEM_PRICE)
+    db.add(item)
+    db.commit()
+    item_id = item.id
+
+    rng = random.Random(0)
+    jobs = []
+    for _ in range(JOBS):
+        if rng.random() < 0.6:
+            challenger, owner = rng.sample(farmers, 2)
+            seed = rng.random()
+            jobs.append(lambda c=challenger, o=owner, s=seed: _duel_chain(auth_headers, random.Random(s), c, o))
+        else:
+            buyer = rng.choice(farmers)
+            jobs.append(lambda b=buyer: _buy(auth_headers, b, item_id))
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = [future.result() for future in [pool.submit(job) for job in jobs]]
+    bought = [ok for ok in results if ok is not None]
+
+    db.expire_all()
+    user_ids = [f["user_id"] for f in farmers]
+    balances = dict(db.execute(select(User.id, User.hb_balance).where(User.id.in_(user_ids))).all())
+    ledger = dict(
+        db.execute(
+            select(WalletTransaction.user_id, func.sum(WalletTransaction.amount))
+            .group_by(WalletTransaction.user_id)
+        ).all()
+    )
+    assert all(balance >= 0 for balance in balances.values()), balances
+    assert balances == {user_id: int(ledger.get(user_id, 0)) for user_id in user_ids}
+
+    # 거래는 성공한 스테이크 / 보상 / 구매에만 남음 (거절된 차감은 거래도 없음)
+    by_reason = dict(
+        db.execute(
+            select(WalletTransaction.reason, func.count()).group_by(WalletTransaction.reason)  # pylint: disable=not-callable
+        ).all()
+    )
+    duels = db.scalar(select(func.count()).select_from(Duel))  # pylint: disable=not-callable
+    finished = db.scalar(select(func.count()).select_from(Duel).where(Duel.status == "finished"))  # pylint: disable=not-callable
+    pending = db.scalar(select(func.count()).select_from(ExchangeRequest))  # pylint: disable=not-callable
+    orders = db.scalar(select(func.count()).select_from(Order))  # pylint: disable=not-callable
+    assert by_reason.get("exchange_stake", 0) == pending + duels
+    assert by_reason.get("duel_stake", 0) == duels
+    assert by_reason.get("duel_reward", 0) == finished == duels
+    assert by_reason.get("shop_purchase", 0) == orders == sum(bought)
+    assert duels and orders, by_reason
+    assert not all(bought), "구매가 한 번도 거절되지 않으면 잔액 부족 경로를 못 본 것"
+
+    refresh_wallet_snapshots(db)
+    assert reconcile_wallets(db) == 0